@@ -0,0 +1,36 @@
+"""add_slug_aliases
+
+Revision ID: 3f8a1c6d2e57
+Revises: b52e0f6d3a27
+Create Date: 2026-10-16 23:20:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8a1c6d2e57'
+down_revision = 'b52e0f6d3a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('slug_aliases',
+    sa.Column('alias_id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('item_type', sa.String(length=20), nullable=False),
+    sa.Column('slug', sa.String(length=255), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('alias_id'),
+    sa.UniqueConstraint('item_type', 'slug', name='uq_slug_aliases_type_slug')
+    )
+    op.create_index(op.f('ix_slug_aliases_alias_id'), 'slug_aliases', ['alias_id'], unique=False)
+    op.create_index(op.f('ix_slug_aliases_item_id'), 'slug_aliases', ['item_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_slug_aliases_item_id'), table_name='slug_aliases')
+    op.drop_index(op.f('ix_slug_aliases_alias_id'), table_name='slug_aliases')
+    op.drop_table('slug_aliases')
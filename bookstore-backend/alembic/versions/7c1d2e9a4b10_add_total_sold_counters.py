@@ -0,0 +1,48 @@
+"""add_total_sold_counters
+
+Revision ID: 7c1d2e9a4b10
+Revises: eee44b00fe37
+Create Date: 2026-10-16 09:12:41.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1d2e9a4b10'
+down_revision = 'eee44b00fe37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('books', sa.Column('total_sold', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('stationery', sa.Column('total_sold', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill counters from existing order items (cancelled orders excluded)
+    op.execute("""
+        UPDATE books b
+        SET b.total_sold = (
+            SELECT COALESCE(SUM(oi.quantity), 0)
+            FROM order_items oi
+            JOIN orders o ON o.order_id = oi.order_id
+            WHERE oi.book_id = b.book_id
+              AND o.status NOT IN ('cancelled', 'Cancelled')
+        )
+    """)
+    op.execute("""
+        UPDATE stationery s
+        SET s.total_sold = (
+            SELECT COALESCE(SUM(oi.quantity), 0)
+            FROM order_items oi
+            JOIN orders o ON o.order_id = oi.order_id
+            WHERE oi.stationery_id = s.stationery_id
+              AND o.status NOT IN ('cancelled', 'Cancelled')
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('stationery', 'total_sold')
+    op.drop_column('books', 'total_sold')
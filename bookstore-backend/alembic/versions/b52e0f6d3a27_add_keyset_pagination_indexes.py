@@ -0,0 +1,39 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: b52e0f6d3a27
+Revises: 7c1d2e9a4b10
+Create Date: 2026-10-16 10:03:17.552940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b52e0f6d3a27'
+down_revision = '7c1d2e9a4b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The cursor is (created_at, id): rows without a creation time would be skipped by the
+    # seek and could not be encoded. Older rows get the earliest time, where NULLs sorted.
+    for table in ('books', 'stationery'):
+        op.execute(f"UPDATE {table} SET created_at = '1970-01-01 00:00:01' WHERE created_at IS NULL")
+        op.alter_column(table, 'created_at',
+                        existing_type=sa.DateTime(timezone=True),
+                        existing_server_default=sa.text('CURRENT_TIMESTAMP'),
+                        nullable=False)
+    op.create_index('ix_books_active_created_id', 'books', ['is_active', 'created_at', 'book_id'], unique=False)
+    op.create_index('ix_stationery_active_created_id', 'stationery', ['is_active', 'created_at', 'stationery_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stationery_active_created_id', table_name='stationery')
+    op.drop_index('ix_books_active_created_id', table_name='books')
+    for table in ('books', 'stationery'):
+        op.alter_column(table, 'created_at',
+                        existing_type=sa.DateTime(timezone=True),
+                        existing_server_default=sa.text('CURRENT_TIMESTAMP'),
+                        nullable=True)
@@ -0,0 +1,129 @@
+from fastapi import Depends, HTTPException, Request, Response, status
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+from redis.asyncio import Redis as AsyncRedis
+from app.database import get_redis, replicas
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Catalog content: products, categories, authors, slides, notifications. Bumped by admin writes.
+VERSION_KEY = "catalog:version"
+MODIFIED_KEY = "catalog:modified"
+# Order-driven product data: stock, sales counters and the leaderboards. Kept apart so
+# order traffic leaves the validators of content orders never change intact, and
+# does not count as a catalog write for the read-replica guard.
+SALES_VERSION_KEY = "catalog:sales_version"
+SALES_MODIFIED_KEY = "catalog:sales_modified"
+
+_KEYS = (VERSION_KEY, MODIFIED_KEY, SALES_VERSION_KEY, SALES_MODIFIED_KEY)
+
+
+async def catalog_version(redis: AsyncRedis, sales: bool = False) -> Optional[Tuple[str, int]]:
+    """(version, last-modified epoch seconds) of the catalog content, or of content and
+    sales data together if `sales`; None if Redis is unavailable.
+
+    Counters start from the current time in milliseconds, so after a Redis
+    flush they restart above any value clients may still hold in an ETag.
+    """
+    try:
+        values = await redis.mget(*_KEYS)
+        if None in values:
+            now = time.time()
+            pipe = redis.pipeline()
+            for key, initial in zip(_KEYS, (int(now * 1000), int(now)) * 2):
+                pipe.set(key, initial, nx=True)
+            pipe.mget(*_KEYS)
+            *_, values = await pipe.execute()
+        version, modified, sales_version, sales_modified = (int(value) for value in values)
+    except Exception as e:
+        logger.error(f"Catalog version read error: {e}")
+        return None
+    if sales:
+        return f"{version}.{sales_version}", max(modified, sales_modified)
+    return str(version), modified
+
+
+async def _bump(redis: AsyncRedis, version_key: str, modified_key: str) -> Optional[int]:
+    # Initializes missing counters first; returns the new last-modified time, None on failure
+    if await catalog_version(redis) is None:
+        return None
+    modified = int(time.time())
+    try:
+        pipe = redis.pipeline()
+        pipe.incr(version_key)
+        pipe.set(modified_key, modified)
+        await pipe.execute()
+    except Exception as e:
+        logger.error(f"Catalog version bump error: {e}")
+        return None
+    return modified
+
+
+async def bump_catalog_version(redis: AsyncRedis) -> None:
+    """Mark the public catalog as changed. Call after the commit of any admin write that alters it."""
+    modified = await _bump(redis, VERSION_KEY, MODIFIED_KEY)
+    if modified is not None:
+        # Other workers pick the write up on their next lag probe
+        replicas.note_catalog_write(modified)
+
+
+async def bump_sales_version(redis: AsyncRedis) -> None:
+    """Mark stock, sales counters or rankings as changed. Call after the commit of an order write."""
+    await _bump(redis, SALES_VERSION_KEY, SALES_MODIFIED_KEY)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison: W/"x" and "x" are the same validator
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def _not_modified(request: Request, etag: str, modified: int) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(if_modified_since).timestamp() >= modified
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def _conditional(request: Request, response: Response, redis: AsyncRedis, sales: bool) -> None:
+    current = await catalog_version(redis, sales)
+    if current is None:
+        return
+    version, modified = current
+    etag = f'W/"catalog-{version}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    if _not_modified(request, etag, modified):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+
+async def conditional_get(request: Request, response: Response, redis: AsyncRedis = Depends(get_redis)) -> None:
+    """Route dependency for public catalog GETs.
+
+    Answers If-None-Match / If-Modified-Since with 304 from a single Redis read,
+    before the endpoint runs, so MySQL and the response cache are never touched.
+    Otherwise tags the response with ETag and Last-Modified. Add it with
+    `dependencies=[Depends(conditional_get)]` so it resolves first.
+    """
+    await _conditional(request, response, redis, sales=False)
+
+
+async def sales_conditional_get(request: Request, response: Response, redis: AsyncRedis = Depends(get_redis)) -> None:
+    """conditional_get for responses that also show stock, total_sold or rankings (bumped by orders)."""
+    await _conditional(request, response, redis, sales=True)
@@ -0,0 +1,190 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Dict, Tuple
+from uuid import UUID
+from pydantic import BaseModel
+from app.config import settings
+import json
+import logging
+import zlib
+
+try:
+    import orjson
+except ImportError:  # optional, fastest
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional, smallest
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is used without it
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Every value is a 3-byte header then the payload:
+#   byte 0  FORMAT_VERSION
+#   byte 1  serializer (JSON / ORJSON / MSGPACK)
+#   byte 2  compression (NO_COMPRESSION / ZLIB / ZSTD)
+FORMAT_VERSION = 1
+
+JSON = b"j"
+ORJSON = b"o"
+MSGPACK = b"m"
+
+NO_COMPRESSION = b"-"
+ZLIB = b"z"
+ZSTD = b"s"
+
+HEADER_SIZE = 3
+
+
+class CodecError(ValueError):
+    """A cached payload this worker cannot read."""
+
+
+def _default(value: Any) -> Any:
+    # Types the serializers do not know natively; mirrors model_dump(mode="json")
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _orjson_dumps(value: Any) -> bytes:
+    # Naive datetimes are written as-is, like isoformat()
+    return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, default=_default, use_bin_type=True, datetime=False)
+
+
+def _msgpack_loads(payload: bytes) -> Any:
+    # Integer dict keys (e.g. HomePage.slide_books) come back as strings in JSON;
+    # keep msgpack consistent so both formats decode to the same data
+    return msgpack.unpackb(payload, raw=False, strict_map_key=False, object_hook=_str_keys)
+
+
+def _str_keys(obj: Dict[Any, Any]) -> Dict[str, Any]:
+    return {k if isinstance(k, str) else str(k): v for k, v in obj.items()}
+
+
+def _zstd_compress(payload: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=3).compress(payload)
+
+
+def _zstd_decompress(payload: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(payload)
+
+
+SERIALIZERS: Dict[bytes, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    JSON: (_json_dumps, json.loads),
+}
+if orjson is not None:
+    SERIALIZERS[ORJSON] = (_orjson_dumps, orjson.loads)
+if msgpack is not None:
+    SERIALIZERS[MSGPACK] = (_msgpack_dumps, _msgpack_loads)
+
+# Fast levels: entries are rewritten often, and level 1 already shrinks a page of
+# JSON cards ~5x at a third of the cost of zlib's default (see benchmarks/cache_codec_benchmark.py)
+COMPRESSORS: Dict[bytes, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    ZLIB: (lambda payload: zlib.compress(payload, 1), zlib.decompress),
+}
+if zstandard is not None:
+    COMPRESSORS[ZSTD] = (_zstd_compress, _zstd_decompress)
+
+_SERIALIZER_NAMES = {"json": JSON, "orjson": ORJSON, "msgpack": MSGPACK}
+_COMPRESSION_NAMES = {"zlib": ZLIB, "zstd": ZSTD}
+
+
+class CacheCodec:
+    """Encodes cache values with one serializer and decodes any known format.
+
+    The header says how each payload was written, so workers configured with
+    different serializers (e.g. mid-deploy) read each other's entries, and a
+    later format change only needs a new version byte. Data without a known
+    header, such as values pickled by older releases, raises CodecError.
+
+    Values go in as JSON-like data, Pydantic models, datetimes and Decimals and
+    always come out as plain JSON types, the same as `model_dump(mode="json")`:
+    models become dicts, tuples lists, datetimes ISO strings, Decimals strings.
+    """
+
+    def __init__(self, serializer: str = "auto", compression: str = "auto", compress_threshold: int = 1024):
+        self.serializer = self._pick_serializer(serializer)
+        self.compression = self._pick_compression(compression) if compress_threshold > 0 else NO_COMPRESSION
+        self.compress_threshold = compress_threshold
+        self._dumps = SERIALIZERS[self.serializer][0]
+
+    @staticmethod
+    def _pick_serializer(name: str) -> bytes:
+        if name == "auto":
+            return ORJSON if orjson is not None else JSON
+        tag = _SERIALIZER_NAMES.get(name)
+        if tag is None:
+            raise ValueError(f"Unknown cache serializer: {name}")
+        if tag not in SERIALIZERS:
+            logger.warning(f"Cache serializer {name} is not installed, falling back to json")
+            return JSON
+        return tag
+
+    @staticmethod
+    def _pick_compression(name: str) -> bytes:
+        if name == "none":
+            return NO_COMPRESSION
+        if name == "auto":
+            return ZSTD if zstandard is not None else ZLIB
+        tag = _COMPRESSION_NAMES.get(name)
+        if tag is None:
+            raise ValueError(f"Unknown cache compression: {name}")
+        if tag not in COMPRESSORS:
+            logger.warning(f"Cache compression {name} is not installed, falling back to zlib")
+            return ZLIB
+        return tag
+
+    def encode(self, value: Any) -> bytes:
+        payload = self._dumps(value)
+        compression = NO_COMPRESSION
+        if self.compression != NO_COMPRESSION and len(payload) >= self.compress_threshold:
+            compressed = COMPRESSORS[self.compression][0](payload)
+            # Some payloads (already dense, or just over the threshold) do not shrink
+            if len(compressed) < len(payload):
+                payload, compression = compressed, self.compression
+        return bytes((FORMAT_VERSION,)) + self.serializer + compression + payload
+
+    def decode(self, data: bytes) -> Any:
+        if len(data) < HEADER_SIZE or data[0] != FORMAT_VERSION:
+            raise CodecError("Unknown cache format")
+        serializer, compression, payload = data[1:2], data[2:3], data[HEADER_SIZE:]
+        try:
+            loads = SERIALIZERS[serializer][1]
+            if compression != NO_COMPRESSION:
+                payload = COMPRESSORS[compression][1](payload)
+        except KeyError:
+            raise CodecError(f"Cache format {serializer!r}/{compression!r} is not available in this worker")
+        return loads(payload)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": FORMAT_VERSION,
+            "serializer": self.serializer.decode(),
+            "compression": self.compression.decode(),
+            "compress_threshold": self.compress_threshold,
+        }
+
+
+# Process-wide codec used by RedisCache
+codec = CacheCodec(settings.cache_serializer, settings.cache_compression, settings.cache_compress_threshold)
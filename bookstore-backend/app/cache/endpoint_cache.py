@@ -0,0 +1,64 @@
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Sequence
+from app.cache.redis_cache import RedisCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Passthrough(Exception):
+    """Carries a Response (redirect, file, ...) out of the loader uncached."""
+
+    def __init__(self, response: Response):
+        self.response = response
+
+
+def cached_endpoint(key: Callable[..., str], ttl: int, params: Sequence[str] = (),
+                    user: Optional[str] = None, tags: Sequence[str] = (),
+                    stale_ttl: Optional[int] = None):
+    """Cache a FastAPI endpoint's JSON result in Redis.
+
+    Put it under the route decorator:
+
+        @router.get("/", response_model=List[OrderResponse])
+        @cached_endpoint(CacheKeys.user_orders, 300, params=("skip", "limit", "status_filter"),
+                         user="current_user", tags=("orders:user:{user_id}",))
+        async def get_orders(skip: int = 0, ..., current_user: User = Depends(...)):
+
+    The key is `key(*generations, **values)`, where `values` holds the named
+    `params` of the endpoint (query or path parameters; injected dependencies
+    such as the DB session or Redis client are never part of it) plus
+    `user_id` taken from the `user` parameter (None for anonymous callers).
+    `tags` are generation namespaces, formatted with the same values; their
+    generations are passed to `key` in order, so `bump_generation(tag)`
+    invalidates every entry under it. Results go through jsonable_encoder and
+    get_or_set (single-flight, stale-while-revalidate), and FastAPI still
+    validates cached and fresh results alike against `response_model`.
+    Responses returned directly (redirects, files) are never cached.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(**kwargs):
+            values: Dict[str, Any] = {name: kwargs[name] for name in params}
+            if user is not None:
+                values["user_id"] = getattr(kwargs.get(user), "user_id", None)
+
+            cache = RedisCache()
+            namespaces = [tag.format(**values) for tag in tags]
+            generations = await cache.generations(*namespaces) if namespaces else []
+            cache_key = key(*generations, **values)
+
+            async def load():
+                result = await func(**kwargs)
+                if isinstance(result, Response):
+                    raise _Passthrough(result)
+                return jsonable_encoder(result)
+
+            try:
+                return await cache.get_or_set(cache_key, load, ttl, stale_ttl)
+            except _Passthrough as passthrough:
+                return passthrough.response
+        return wrapper
+    return decorator
@@ -0,0 +1,173 @@
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from redis import Redis
+from app.config import settings
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Small, hot, rarely-changing keys worth keeping in process (see CacheKeys)
+LOCAL_KEY_PATTERNS = (
+    "gen:*",
+    "categories:all",
+    "authors:all",
+    "stationery:g*:categories",
+    "books:g*:slide*",
+    "books:g*:discounted:*",
+    "home:*",
+)
+
+# Deleted keys and bumped generation counters are published here, newline-separated
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+_MISSING = object()
+
+
+class CacheStats:
+    """Hit/miss counters for one cache tier."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else None,
+            }
+
+
+class LocalCache:
+    """Per-process LRU cache with a TTL on every entry.
+
+    Values are stored as the deserialized objects and handed out shared, so
+    callers must treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int, default_ttl: int, enabled: bool = True):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        self.stats = CacheStats()
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def handles(self, key: str) -> bool:
+        """Whether `key` is kept in this tier."""
+        return self.enabled and any(fnmatchcase(key, pattern) for pattern in LOCAL_KEY_PATTERNS)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """(hit, value); expired entries count as misses."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] <= now:
+                del self._entries[key]
+                entry = _MISSING
+            if entry is _MISSING:
+                self.stats.record(False)
+                return False, None
+            self._entries.move_to_end(key)
+        self.stats.record(True)
+        return True, entry[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        ttl = min(ttl or self.default_ttl, self.default_ttl)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats.snapshot(),
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "enabled": self.enabled,
+        }
+
+
+# Process-wide L1 tier
+local_cache = LocalCache(settings.local_cache_max_entries, settings.local_cache_ttl, settings.local_cache_enabled)
+
+
+def invalidate_local(keys: Iterable[str]) -> List[str]:
+    """Drop keys from this worker's L1.
+
+    Returns the keys the other workers must drop too; the caller publishes
+    them on INVALIDATION_CHANNEL together with its Redis write.
+    """
+    keys = [key for key in keys if local_cache.handles(key)]
+    local_cache.delete(*keys)
+    return keys
+
+
+def _on_invalidation(message: Dict[str, Any]) -> None:
+    data = message.get("data")
+    if isinstance(data, bytes):
+        data = data.decode()
+    if data:
+        local_cache.delete(*data.split("\n"))
+
+
+def _on_listener_error(error: BaseException, pubsub, thread) -> None:
+    # Messages may have been missed while disconnected; start from a clean L1.
+    # The next get_message() reconnects and resubscribes.
+    logger.error(f"Cache invalidation listener error: {error}")
+    local_cache.clear()
+    time.sleep(1)
+
+
+_listener = None
+
+
+def start_invalidation_listener(redis: Redis) -> None:
+    """Subscribe this worker to L1 invalidations (call once at startup)."""
+    global _listener
+    if not local_cache.enabled or _listener is not None:
+        return
+    try:
+        pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{INVALIDATION_CHANNEL: _on_invalidation})
+        _listener = pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=_on_listener_error)
+    except Exception as e:
+        # Without the listener other workers' writes would go unseen; do not serve from L1
+        logger.error(f"Cache invalidation listener failed to start, L1 cache disabled: {e}")
+        local_cache.enabled = False
+
+
+def stop_invalidation_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,244 @@
+from bisect import bisect_left
+from collections import defaultdict
+from fnmatch import translate
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import re
+import threading
+
+# Key family of every CacheKeys builder; first match wins, anything else is "other"
+KEY_FAMILIES = (
+    ("generation", "gen:*"),
+    ("lock", "lock:*"),
+    ("books_list", "books:g*:skip:*"),
+    ("books_list", "books:g*:cursor:*"),
+    ("books_discounted", "books:g*:discounted:*"),
+    ("books_slide", "books:g*:slide*"),
+    ("book_detail", "book:*:detail"),
+    ("book_detail", "books:g*:detail:slug:*"),
+    ("stationery_list", "stationery:g*:list:*"),
+    ("stationery_list", "stationery:g*:cursor:*"),
+    ("stationery_categories", "stationery:g*:categories"),
+    ("stationery_detail", "stationery:detail:*"),
+    ("stationery_detail", "stationery:g*:detail:slug:*"),
+    ("missing", "miss:*"),
+    ("home", "home:*"),
+    ("categories", "categories:*"),
+    ("authors", "authors:*"),
+    ("orders", "orders:user:*"),
+    ("wishlist", "user:*:wishlist"),
+    ("chat_session", "chat:session:*"),
+)
+
+# Redis round trips, seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# Encoded value sizes, bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+_FAMILY_PATTERNS = [(family, re.compile(translate(pattern))) for family, pattern in KEY_FAMILIES]
+
+
+@lru_cache(maxsize=8192)
+def key_family(key: str) -> str:
+    for family, pattern in _FAMILY_PATTERNS:
+        if pattern.match(key):
+            return family
+    return "other"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout (not thread-safe on its own)."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(upper bound label, observations <= bound), ending with +Inf."""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (0 when empty)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+class FamilyMetrics:
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str], int] = defaultdict(int)  # (tier, result) -> n
+        self.errors: Dict[str, int] = defaultdict(int)  # op -> n
+        self.sets = 0
+        self.stale = 0
+        self.recomputes = 0
+        self.latency: Dict[str, Histogram] = {}  # op -> seconds
+        self.size: Dict[str, Histogram] = {}  # "get" / "set" -> bytes
+
+    def latency_for(self, op: str) -> Histogram:
+        if op not in self.latency:
+            self.latency[op] = Histogram(LATENCY_BUCKETS)
+        return self.latency[op]
+
+    def size_for(self, op: str) -> Histogram:
+        if op not in self.size:
+            self.size[op] = Histogram(SIZE_BUCKETS)
+        return self.size[op]
+
+
+class CacheMetrics:
+    """Per key-family counters and histograms for RedisCache, per worker process.
+
+    Requests are counted per tier (l1, redis) and result (hit, miss); latency
+    covers Redis round trips only, sizes are encoded bytes as stored in Redis.
+    Read with `snapshot()` (JSON) or `render_prometheus()` (text exposition).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families: Dict[str, FamilyMetrics] = defaultdict(FamilyMetrics)
+
+    def record_get(self, key: str, tier: str, hit: bool) -> None:
+        with self._lock:
+            self._families[key_family(key)].requests[(tier, "hit" if hit else "miss")] += 1
+
+    def record_set(self, key: str) -> None:
+        with self._lock:
+            self._families[key_family(key)].sets += 1
+
+    def record_stale(self, key: str) -> None:
+        """A get_or_set caller was served an entry past its soft TTL."""
+        with self._lock:
+            self._families[key_family(key)].stale += 1
+
+    def record_recompute(self, key: str) -> None:
+        with self._lock:
+            self._families[key_family(key)].recomputes += 1
+
+    def record_error(self, key: str, op: str) -> None:
+        with self._lock:
+            self._families[key_family(key)].errors[op] += 1
+
+    def observe_latency(self, key: str, op: str, seconds: float) -> None:
+        with self._lock:
+            self._families[key_family(key)].latency_for(op).observe(seconds)
+
+    def observe_size(self, key: str, op: str, size: int) -> None:
+        with self._lock:
+            self._families[key_family(key)].size_for(op).observe(size)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._families.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per family: hits/misses by tier, hit ratio, sets, errors, p50/p99 latency (ms) and mean sizes."""
+        with self._lock:
+            result = {}
+            for family, m in sorted(self._families.items()):
+                l1_hits = m.requests.get(("l1", "hit"), 0)
+                redis_hits = m.requests.get(("redis", "hit"), 0)
+                hits, misses = l1_hits + redis_hits, m.requests.get(("redis", "miss"), 0)
+                gets = m.latency.get("get")
+                sizes = {op: round(h.sum / h.count) for op, h in m.size.items() if h.count}
+                result[family] = {
+                    "l1_hits": l1_hits,
+                    "redis_hits": redis_hits,
+                    "misses": misses,
+                    "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+                    "stale": m.stale,
+                    "recomputes": m.recomputes,
+                    "sets": m.sets,
+                    "errors": sum(m.errors.values()),
+                    "get_p50_ms": gets.quantile(0.5) * 1000 if gets else None,
+                    "get_p99_ms": gets.quantile(0.99) * 1000 if gets else None,
+                    "mean_get_bytes": sizes.get("get"),
+                    "mean_set_bytes": sizes.get("set"),
+                }
+            return result
+
+    def render_prometheus(self, prefix: str = "bookstore_cache",
+                          gauges: Optional[Dict[str, Tuple[str, float]]] = None) -> str:
+        """Text exposition of every family; `gauges` adds {name: (help, value)} unlabelled gauges."""
+        lines = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        def histogram(name: str, labels: str, h: Histogram) -> None:
+            for bound, count in h.cumulative():
+                lines.append(f'{prefix}_{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{prefix}_{name}_sum{{{labels}}} {h.sum}")
+            lines.append(f"{prefix}_{name}_count{{{labels}}} {h.count}")
+
+        with self._lock:
+            families = sorted(self._families.items())
+            header("requests_total", "counter", "Cache lookups by key family, tier and result.")
+            for family, m in families:
+                for (tier, outcome), count in sorted(m.requests.items()):
+                    lines.append(f'{prefix}_requests_total{{family="{family}",tier="{tier}",result="{outcome}"}} {count}')
+            header("sets_total", "counter", "Values written to Redis by key family.")
+            for family, m in families:
+                lines.append(f'{prefix}_sets_total{{family="{family}"}} {m.sets}')
+            header("stale_total", "counter", "Entries served past their soft TTL while being rebuilt.")
+            for family, m in families:
+                lines.append(f'{prefix}_stale_total{{family="{family}"}} {m.stale}')
+            header("recomputes_total", "counter", "Single-flight rebuilds by key family.")
+            for family, m in families:
+                lines.append(f'{prefix}_recomputes_total{{family="{family}"}} {m.recomputes}')
+            header("errors_total", "counter", "Redis errors by key family and operation.")
+            for family, m in families:
+                for op, count in sorted(m.errors.items()):
+                    lines.append(f'{prefix}_errors_total{{family="{family}",op="{op}"}} {count}')
+            header("operation_seconds", "histogram", "Redis round-trip time by key family and operation.")
+            for family, m in families:
+                for op, h in sorted(m.latency.items()):
+                    histogram("operation_seconds", f'family="{family}",op="{op}"', h)
+            header("value_bytes", "histogram", "Encoded value size by key family, on read and on write.")
+            for family, m in families:
+                for op, h in sorted(m.size.items()):
+                    histogram("value_bytes", f'family="{family}",op="{op}"', h)
+        for name, (help_text, value) in (gauges or {}).items():
+            header(name, "gauge", help_text)
+            lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def format_table(self) -> str:
+        """Plain-text summary of `snapshot()`, for benchmarks and scripts."""
+        rows = [("family", "hit%", "l1", "redis", "miss", "stale", "rebuild", "p50 ms", "p99 ms", "get B", "set B")]
+        for family, s in self.snapshot().items():
+            rows.append((
+                family,
+                "-" if s["hit_ratio"] is None else f"{100 * s['hit_ratio']:.1f}",
+                str(s["l1_hits"]), str(s["redis_hits"]), str(s["misses"]), str(s["stale"]), str(s["recomputes"]),
+                "-" if s["get_p50_ms"] is None else f"{s['get_p50_ms']:g}",
+                "-" if s["get_p99_ms"] is None else f"{s['get_p99_ms']:g}",
+                str(s["mean_get_bytes"] or "-"), str(s["mean_set_bytes"] or "-"),
+            ))
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        return "\n".join(
+            "  ".join(cell.ljust(w) if i == 0 else cell.rjust(w) for i, (cell, w) in enumerate(zip(row, widths)))
+            for row in rows
+        )
+
+
+# Process-wide metrics for RedisCache
+cache_metrics = CacheMetrics()
@@ -1,26 +1,81 @@
-import json
-import pickle
-from typing import Any, Optional, List
-from redis import Redis
-from app.database import get_redis
-from app.config import settings
+import asyncio
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, List, Tuple
+from redis.asyncio import Redis as AsyncRedis
+from app.database import get_async_redis
+from app.cache.local_cache import INVALIDATION_CHANNEL, CacheStats, invalidate_local, local_cache
+from app.cache.codec import CodecError, codec
+from app.cache.metrics import cache_metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Redis (L2) tier counters; L1 counters live on local_cache
+redis_stats = CacheStats()
+
+# Single-flight recomputation (get_or_set): how long a rebuild may hold the
+# lock, and how often callers without a cached copy check for its result
+RECOMPUTE_LOCK_TTL = 5.0
+RECOMPUTE_POLL_INTERVAL = 0.05
+
+# Reverse indexes (product -> cached page keys) outlive the longest-lived page they point to
+PAGE_INDEX_TTL = 7200
+
+# Negative entries for product ids and slugs that 404; kept short because a lookup
+# racing a create can still mark the new product missing until the entry expires
+MISS_TTL = 60
+
+# Called with the namespaces of every bump_generation, after the bump (see app/cache/warmer.py)
+generation_listeners: List[Callable[[Tuple[str, ...]], None]] = []
+
+# Delete the lock only if we still own it
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
 class RedisCache:
-    def __init__(self, redis_client: Redis = None):
-        self.redis = redis_client or get_redis()
+    """Response cache on the shared redis.asyncio pool.
+    
+    Every operation is awaited on the event loop, so a slow Redis no longer
+    stalls other requests. Routers pass the client from `Depends(get_redis)`,
+    which is the same shared async client.
+    """
+    
+    def __init__(self, redis_client: Optional[AsyncRedis] = None):
+        self.redis = redis_client or get_async_redis()
         self.default_ttl = 3600  # 1 hour default TTL
     
     async def get(self, key: str) -> Optional[Any]:
-        """Get value from cache."""
+        """Get value from cache (in-process L1 first for keys it handles)."""
+        local = local_cache.handles(key)
+        if local:
+            hit, value = local_cache.get(key)
+            if hit:
+                cache_metrics.record_get(key, "l1", True)
+                return value
         try:
-            value = self.redis.get(key)
+            start = time.perf_counter()
+            value = await self.redis.get(key)
+            cache_metrics.observe_latency(key, "get", time.perf_counter() - start)
+            redis_stats.record(bool(value))
+            cache_metrics.record_get(key, "redis", bool(value))
             if value:
-                return pickle.loads(value)
+                cache_metrics.observe_size(key, "get", len(value))
+                value = codec.decode(value)
+                if local:
+                    local_cache.set(key, value)
+                return value
+            return None
+        except CodecError as e:
+            # Written by an older release or a worker with an extra codec; a miss
+            logger.debug(f"Redis get skipped {key}: {e}")
             return None
         except Exception as e:
+            cache_metrics.record_error(key, "get")
             logger.error(f"Redis get error: {e}")
             return None
     
@@ -28,35 +83,336 @@ class RedisCache:
         """Set value in cache."""
         try:
             ttl = ttl or self.default_ttl
-            serialized_value = pickle.dumps(value)
-            return self.redis.setex(key, ttl, serialized_value)
+            serialized_value = codec.encode(value)
+            start = time.perf_counter()
+            stored = await self.redis.setex(key, ttl, serialized_value)
+            cache_metrics.observe_latency(key, "set", time.perf_counter() - start)
+            cache_metrics.record_set(key)
+            cache_metrics.observe_size(key, "set", len(serialized_value))
+            if local_cache.handles(key):
+                # Keep what a Redis hit would return, not the caller's objects
+                local_cache.set(key, codec.decode(serialized_value), ttl)
+            return stored
         except Exception as e:
+            cache_metrics.record_error(key, "set")
             logger.error(f"Redis set error: {e}")
             return False
     
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values in one round trip (MGET); missing keys come back as None."""
+        if not keys:
+            return []
+        try:
+            start = time.perf_counter()
+            values = await self.redis.mget(keys)
+            # One round trip serves every key; charge it once to the first key's family
+            cache_metrics.observe_latency(keys[0], "mget", time.perf_counter() - start)
+        except Exception as e:
+            cache_metrics.record_error(keys[0], "mget")
+            logger.error(f"Redis mget error: {e}")
+            return [None] * len(keys)
+        results = []
+        for key, value in zip(keys, values):
+            cache_metrics.record_get(key, "redis", bool(value))
+            if value:
+                cache_metrics.observe_size(key, "get", len(value))
+            try:
+                results.append(codec.decode(value) if value else None)
+            except CodecError:
+                results.append(None)
+            except Exception as e:
+                logger.error(f"Redis get error: {e}")
+                results.append(None)
+        return results
+    
+    async def set_many(self, mapping: Dict[str, Any], ttl: int = None) -> bool:
+        """Set several values with the same TTL in one pipeline."""
+        if not mapping:
+            return True
+        try:
+            ttl = ttl or self.default_ttl
+            pipe = self.redis.pipeline(transaction=False)
+            for key, value in mapping.items():
+                serialized_value = codec.encode(value)
+                pipe.setex(key, ttl, serialized_value)
+                cache_metrics.record_set(key)
+                cache_metrics.observe_size(key, "set", len(serialized_value))
+            start = time.perf_counter()
+            await pipe.execute()
+            cache_metrics.observe_latency(next(iter(mapping)), "mset", time.perf_counter() - start)
+            return True
+        except Exception as e:
+            cache_metrics.record_error(next(iter(mapping)), "mset")
+            logger.error(f"Redis set many error: {e}")
+            return False
+    
     async def delete(self, key: str) -> bool:
-        """Delete key from cache."""
+        """Delete key from cache, including every worker's L1 copy."""
+        shared = invalidate_local([key])
         try:
-            return bool(self.redis.delete(key))
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.delete(key)
+            if shared:
+                pipe.publish(INVALIDATION_CHANNEL, "\n".join(shared))
+            results = await pipe.execute()
+            return bool(results[0])
         except Exception as e:
             logger.error(f"Redis delete error: {e}")
             return False
     
-    async def delete_pattern(self, pattern: str) -> int:
-        """Delete all keys matching pattern."""
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several keys, including every worker's L1 copy, in one round trip."""
+        keys = list(keys)
+        if not keys:
+            return 0
+        shared = invalidate_local(keys)
         try:
-            keys = self.redis.keys(pattern)
-            if keys:
-                return self.redis.delete(*keys)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.delete(*keys)
+            if shared:
+                pipe.publish(INVALIDATION_CHANNEL, "\n".join(shared))
+            results = await pipe.execute()
+            return results[0]
+        except Exception as e:
+            logger.error(f"Redis delete error: {e}")
             return 0
+    
+    async def delete_pattern(self, pattern: str) -> int:
+        """Delete all keys matching pattern.
+        
+        Walks the keyspace with SCAN, so it is O(keyspace) per call; invalidate
+        cached pages with `bump_generation` instead.
+        """
+        try:
+            deleted = 0
+            batch = []
+            async for key in self.redis.scan_iter(match=pattern, count=1000):
+                batch.append(key)
+                if len(batch) >= 1000:
+                    deleted += await self.redis.delete(*batch)
+                    batch = []
+            if batch:
+                deleted += await self.redis.delete(*batch)
+            return deleted
         except Exception as e:
             logger.error(f"Redis delete pattern error: {e}")
             return 0
     
+    async def generations(self, *namespaces: str) -> List[int]:
+        """Current generation of each namespace, in one round trip.
+        
+        A missing counter (new namespace, eviction, flush) is seeded from the
+        clock in milliseconds rather than 0, so it never lands back on a
+        generation whose entries may still be cached.
+        """
+        keys = [CacheKeys.generation(namespace) for namespace in namespaces]
+        found = {}
+        for key in keys:
+            if local_cache.handles(key):
+                hit, value = local_cache.get(key)
+                if hit:
+                    cache_metrics.record_get(key, "l1", True)
+                    found[key] = value
+        missing = [key for key in keys if key not in found]
+        if not missing:
+            return [found[key] for key in keys]
+        try:
+            start = time.perf_counter()
+            values = await self.redis.mget(missing)
+            cache_metrics.observe_latency(missing[0], "mget", time.perf_counter() - start)
+            for key, value in zip(missing, values):
+                cache_metrics.record_get(key, "redis", value is not None)
+            if any(value is None for value in values):
+                # Seed the absent counters and re-read all of them in one pipeline
+                seed = int(time.time() * 1000)
+                pipe = self.redis.pipeline(transaction=False)
+                for key, value in zip(missing, values):
+                    if value is None:
+                        pipe.set(key, seed, nx=True)
+                pipe.mget(missing)
+                values = (await pipe.execute())[-1]
+        except Exception as e:
+            cache_metrics.record_error(missing[0], "mget")
+            logger.error(f"Redis generation read error: {e}")
+            return [0] * len(keys)
+        for key, value in zip(missing, values):
+            found[key] = int(value)
+            if local_cache.handles(key):
+                local_cache.set(key, found[key])
+        return [found[key] for key in keys]
+    
+    async def generation(self, namespace: str) -> int:
+        """Current generation of a namespace; embed it in the namespace's cache keys."""
+        return (await self.generations(namespace))[0]
+    
+    async def bump_generation(self, *namespaces: str) -> None:
+        """Invalidate every cached entry of the namespaces with one INCR each.
+        
+        Keys built from the old generation are never read again and expire by TTL.
+        """
+        await self.generations(*namespaces)
+        keys = [CacheKeys.generation(namespace) for namespace in namespaces]
+        shared = invalidate_local(keys)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.incr(key)
+            if shared:
+                pipe.publish(INVALIDATION_CHANNEL, "\n".join(shared))
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis generation bump error: {e}")
+        for listener in generation_listeners:
+            listener(namespaces)
+    
+    async def get_or_set(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: int,
+                         stale_ttl: Optional[int] = None,
+                         index: Optional[Callable[[Any], Iterable[str]]] = None) -> Any:
+        """Cached value of `key`, computed by `loader` at most once at a time across workers.
+        
+        Entries are fresh for `ttl` seconds and may then be served stale for
+        `stale_ttl` more (default: `ttl`). The first caller to see a stale entry
+        takes a short Redis lock and rebuilds it; everyone else keeps getting the
+        stale copy meanwhile. On a cold miss, callers that lose the lock poll for
+        the winner's result instead of all querying MySQL. The rebuild runs in the
+        lock holder's request because loaders use that request's DB session.
+        Keys stored here hold an envelope, so read them only through this method.
+        `index(value)` names reverse indexes to add the key to on every rebuild
+        (see app/cache/write_through.py).
+        """
+        stale_ttl = ttl if stale_ttl is None else stale_ttl
+        entry = self._unwrap(await self.get(key))
+        if entry is not None:
+            fresh_until, value = entry
+            if time.time() < fresh_until:
+                return value
+            token = await self._acquire_lock(key)
+            if token is None:
+                cache_metrics.record_stale(key)
+                return value
+            return await self._recompute(key, loader, ttl, stale_ttl, token, index)
+        
+        token = await self._acquire_lock(key)
+        if token is None:
+            entry = await self._wait_for(key)
+            if entry is not None:
+                return entry[1]
+            # The lock holder failed or is too slow; do not wait any longer
+            token = ""
+        return await self._recompute(key, loader, ttl, stale_ttl, token, index)
+    
+    @staticmethod
+    def _unwrap(entry: Any) -> Optional[tuple]:
+        # The (fresh_until, value) envelope comes back from the codec as a list
+        if isinstance(entry, (tuple, list)) and len(entry) == 2 and isinstance(entry[0], float):
+            return tuple(entry)
+        return None
+    
+    async def _recompute(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: int, stale_ttl: int,
+                         token: str, index: Optional[Callable[[Any], Iterable[str]]] = None) -> Any:
+        cache_metrics.record_recompute(key)
+        try:
+            value = await loader()
+            if await self.set(key, (time.time() + ttl, value), ttl + stale_ttl) and index is not None:
+                await self.add_to_indexes(index(value), key)
+            return value
+        finally:
+            await self._release_lock(key, token)
+    
+    async def _acquire_lock(self, key: str) -> Optional[str]:
+        """A lock token, "" if Redis cannot arbitrate (compute anyway), or None if another caller holds it."""
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.redis.set(
+                CacheKeys.lock(key), token, nx=True, px=int(RECOMPUTE_LOCK_TTL * 1000)
+            )
+            return token if acquired else None
+        except Exception as e:
+            logger.error(f"Redis lock error: {e}")
+            return ""
+    
+    async def _release_lock(self, key: str, token: str) -> None:
+        if not token:
+            return
+        try:
+            await self.redis.eval(_RELEASE_LOCK, 1, CacheKeys.lock(key), token)
+        except Exception as e:
+            # The lock expires on its own shortly
+            logger.error(f"Redis unlock error: {e}")
+    
+    async def _wait_for(self, key: str) -> Optional[tuple]:
+        deadline = time.monotonic() + RECOMPUTE_LOCK_TTL
+        while time.monotonic() < deadline:
+            await asyncio.sleep(RECOMPUTE_POLL_INTERVAL)
+            entry = self._unwrap(await self.get(key))
+            if entry is not None:
+                return entry
+            if not await self.exists(CacheKeys.lock(key)):
+                return self._unwrap(await self.get(key))
+        return None
+    
+    async def add_to_indexes(self, index_keys: Iterable[str], key: str) -> None:
+        """Record `key` in each reverse index set (SADD), in one pipeline."""
+        index_keys = list(index_keys)
+        if not index_keys:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for index_key in index_keys:
+                pipe.sadd(index_key, key)
+                pipe.expire(index_key, PAGE_INDEX_TTL)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis index error: {e}")
+    
+    async def indexed_keys(self, index_key: str) -> List[str]:
+        """Keys recorded in a reverse index; some may have expired since."""
+        try:
+            return sorted(key.decode() if isinstance(key, bytes) else key
+                          for key in await self.redis.smembers(index_key))
+        except Exception as e:
+            logger.error(f"Redis index read error: {e}")
+            return []
+    
+    async def rewrite(self, key: str, transform: Callable[[Any], Any]) -> Optional[bool]:
+        """Replace a cached value in place, keeping its remaining TTL.
+        
+        `transform` gets the stored value and returns the new one, or None to
+        drop the key. Other workers drop their L1 copy. Returns None if the
+        key is gone, otherwise whether it was rewritten (False = dropped).
+        """
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            data, pttl = await pipe.execute()
+            if not data or pttl <= 0:
+                return None
+            value = transform(codec.decode(data))
+        except Exception as e:
+            logger.error(f"Redis rewrite error: {e}")
+            value = None
+        if value is None:
+            await self.delete(key)
+            return False
+        shared = invalidate_local([key])
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(key, codec.encode(value), px=pttl, xx=True)
+            if shared:
+                pipe.publish(INVALIDATION_CHANNEL, "\n".join(shared))
+            await pipe.execute()
+            cache_metrics.record_set(key)
+            return True
+        except Exception as e:
+            logger.error(f"Redis rewrite error: {e}")
+            await self.delete(key)
+            return False
+    
     async def exists(self, key: str) -> bool:
         """Check if key exists in cache."""
         try:
-            return bool(self.redis.exists(key))
+            return bool(await self.redis.exists(key))
         except Exception as e:
             logger.error(f"Redis exists error: {e}")
             return False
@@ -64,7 +420,7 @@ class RedisCache:
     async def increment(self, key: str, amount: int = 1) -> int:
         """Increment a counter."""
         try:
-            return self.redis.incr(key, amount)
+            return await self.redis.incr(key, amount)
         except Exception as e:
             logger.error(f"Redis increment error: {e}")
             return 0
@@ -73,24 +429,35 @@ class RedisCache:
         """Set a list in cache."""
         try:
             ttl = ttl or self.default_ttl
-            serialized_values = [pickle.dumps(value) for value in values]
+            serialized_values = [codec.encode(value) for value in values]
             pipe = self.redis.pipeline()
             pipe.delete(key)
             if serialized_values:
                 pipe.lpush(key, *serialized_values)
             pipe.expire(key, ttl)
-            pipe.execute()
+            start = time.perf_counter()
+            await pipe.execute()
+            cache_metrics.observe_latency(key, "set", time.perf_counter() - start)
+            cache_metrics.record_set(key)
+            cache_metrics.observe_size(key, "set", sum(len(value) for value in serialized_values))
             return True
         except Exception as e:
+            cache_metrics.record_error(key, "set")
             logger.error(f"Redis set list error: {e}")
             return False
     
     async def get_list(self, key: str) -> List[Any]:
         """Get a list from cache."""
         try:
-            values = self.redis.lrange(key, 0, -1)
-            return [pickle.loads(value) for value in values]
+            start = time.perf_counter()
+            values = await self.redis.lrange(key, 0, -1)
+            cache_metrics.observe_latency(key, "get", time.perf_counter() - start)
+            cache_metrics.record_get(key, "redis", bool(values))
+            if values:
+                cache_metrics.observe_size(key, "get", sum(len(value) for value in values))
+            return [codec.decode(value) for value in values]
         except Exception as e:
+            cache_metrics.record_error(key, "get")
             logger.error(f"Redis get list error: {e}")
             return []
 
@@ -98,8 +465,44 @@ class RedisCache:
 # Cache instance
 cache = RedisCache()
 
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit ratios and sizes of both cache tiers, and per key-family metrics, for this worker."""
+    return {"l1": local_cache.snapshot(), "redis": redis_stats.snapshot(), "families": cache_metrics.snapshot()}
+
+
+def cache_metrics_text() -> str:
+    """This worker's cache metrics in the Prometheus text format."""
+    return cache_metrics.render_prometheus(gauges={
+        "l1_entries": ("Entries held in the in-process L1 cache.", len(local_cache)),
+        "l1_evictions": ("L1 entries evicted by the size limit since start.", local_cache.evictions),
+    })
+
 # Cache key generators
 class CacheKeys:
+    # Generation namespaces; keys taking a `gen` argument belong to one of them
+    BOOKS = "books"
+    STATIONERY = "stationery"
+    HOME = "home"
+    
+    @staticmethod
+    def generation(namespace: str) -> str:
+        return f"gen:{namespace}"
+    
+    @staticmethod
+    def lock(key: str) -> str:
+        """Single-flight recomputation lock for a cache key."""
+        return f"lock:{key}"
+    
+    @staticmethod
+    def product_pages(kind: str, product_id: int) -> str:
+        """Reverse index: cached pages that contain a book or stationery item (kind "book" / "stationery")."""
+        return f"idx:{kind}:{product_id}:pages"
+    
+    @staticmethod
+    def user_orders_namespace(user_id: int) -> str:
+        return f"orders:user:{user_id}"
+    
     @staticmethod
     def book(book_id: int) -> str:
         return f"book:{book_id}"
@@ -109,8 +512,36 @@ class CacheKeys:
         return f"book:{book_id}:detail"
     
     @staticmethod
-    def books_list(skip: int, limit: int, category_id: int = None, author_id: int = None, search: str = None) -> str:
-        key = f"books:skip:{skip}:limit:{limit}"
+    def stationery_detail(stationery_id: int) -> str:
+        return f"stationery:detail:{stationery_id}"
+    
+    @staticmethod
+    def book_missing(book_id: int) -> str:
+        """Negative entry: no active book has this id."""
+        return f"miss:book:{book_id}"
+    
+    @staticmethod
+    def stationery_missing(stationery_id: int) -> str:
+        """Negative entry: no active stationery item has this id."""
+        return f"miss:stationery:{stationery_id}"
+    
+    @staticmethod
+    def slug_missing(item_type: str, slug: str) -> str:
+        """Negative entry: no active product (item_type "book" / "stationery") has this slug or alias."""
+        return f"miss:slug:{item_type}:{slug}"
+    
+    @staticmethod
+    def book_slug(gen: int, slug: str) -> str:
+        return f"books:g{gen}:detail:slug:{slug}"
+    
+    @staticmethod
+    def stationery_slug(gen: int, slug: str) -> str:
+        return f"stationery:g{gen}:detail:slug:{slug}"
+    
+    @staticmethod
+    def books_list(gen: int, skip: int, limit: int, category_id: int = None, author_id: int = None,
+                   search: str = None, view: str = "summary") -> str:
+        key = f"books:g{gen}:skip:{skip}:limit:{limit}:view:{view}"
         if category_id:
             key += f":category:{category_id}"
         if author_id:
@@ -119,15 +550,59 @@ class CacheKeys:
             key += f":search:{search}"
         return key
     
+    @staticmethod
+    def books_cursor(gen: int, cursor: str, limit: int, category_id: int = None, author_id: int = None,
+                     search: str = None, view: str = "summary") -> str:
+        """Cache key for a keyset-paginated book page (empty cursor = first page)."""
+        key = f"books:g{gen}:cursor:{cursor or 'start'}:limit:{limit}:view:{view}"
+        if category_id:
+            key += f":category:{category_id}"
+        if author_id:
+            key += f":author:{author_id}"
+        if search:
+            key += f":search:{search}"
+        return key
+    
+    @staticmethod
+    def books_discounted(gen: int, limit: int, view: str = "summary") -> str:
+        return f"books:g{gen}:discounted:{limit}:{view}"
+    
+    @staticmethod
+    def books_slide(gen: int, slide_number: int, limit: int, view: str = "summary") -> str:
+        return f"books:g{gen}:slide{slide_number}:{limit}:{view}"
+    
+    @staticmethod
+    def stationery_list(gen: int, skip: int, limit: int, category_id: int = None, search: str = None,
+                        is_best_seller: bool = None, is_new: bool = None, is_discount: bool = None,
+                        slide_number: int = None, view: str = "summary") -> str:
+        return (
+            f"stationery:g{gen}:list:{skip}:{limit}:{category_id}:{search}"
+            f":{is_best_seller}:{is_new}:{is_discount}:{slide_number}:{view}"
+        )
+    
+    @staticmethod
+    def stationery_cursor(gen: int, cursor: str, limit: int, category_id: int = None, search: str = None,
+                          is_best_seller: bool = None, is_new: bool = None, is_discount: bool = None,
+                          slide_number: int = None, view: str = "summary") -> str:
+        """Cache key for a keyset-paginated stationery page (empty cursor = first page)."""
+        return (
+            f"stationery:g{gen}:cursor:{cursor or 'start'}:limit:{limit}:{category_id}:{search}"
+            f":{is_best_seller}:{is_new}:{is_discount}:{slide_number}:{view}"
+        )
+    
+    @staticmethod
+    def stationery_categories(gen: int) -> str:
+        return f"stationery:g{gen}:categories"
+    
     @staticmethod
     def user(user_id: int) -> str:
         return f"user:{user_id}"
     
     @staticmethod
-    def user_orders(user_id: int, skip: int = 0, limit: int = 10, status_filter: str = None) -> str:
-        """Cache key for user orders with pagination and filtering."""
+    def user_orders(gen: int, user_id: int, skip: int = 0, limit: int = 10, status_filter: str = None) -> str:
+        """Cache key for user orders with pagination and filtering (generation of `user_orders_namespace`)."""
         status_part = f":status:{status_filter}" if status_filter else ""
-        return f"orders:user:{user_id}:skip:{skip}:limit:{limit}{status_part}"
+        return f"orders:user:{user_id}:g{gen}:skip:{skip}:limit:{limit}{status_part}"
     
     @staticmethod
     def user_wishlist(user_id: int) -> str:
@@ -152,6 +627,11 @@ class CacheKeys:
     @staticmethod
     def featured_books() -> str:
         return "books:featured"
+    
+    @staticmethod
+    def home(books_gen: int, home_gen: int, limit: int) -> str:
+        """The homepage blob depends on books (BOOKS generation) and on slides/notifications (HOME)."""
+        return f"home:g{home_gen}:books:g{books_gen}:limit:{limit}"
 
     # Chat memory keys
     @staticmethod
@@ -167,66 +647,29 @@ class CacheKeys:
         return f"chat:session:{session_id}:shipping"
 
 
-# Cache decorators and utilities
-def cache_result(key_func, ttl: int = 3600):
-    """Decorator to cache function results."""
-    def decorator(func):
-        async def wrapper(*args, **kwargs):
-            # Generate cache key
-            cache_key = key_func(*args, **kwargs)
-            
-            # Try to get from cache
-            cached_result = await cache.get(cache_key)
-            if cached_result is not None:
-                return cached_result
-            
-            # Execute function and cache result
-            result = await func(*args, **kwargs)
-            if result is not None:
-                await cache.set(cache_key, result, ttl)
-            
-            return result
-        return wrapper
-    return decorator
-
-
+# Cache utilities
 async def invalidate_book_cache(book_id: int):
     """Invalidate all cache entries related to a book."""
     await cache.delete(CacheKeys.book(book_id))
-    await cache.delete_pattern("books:page:*")
-    await cache.delete_pattern("books:popular")
-    await cache.delete_pattern("books:featured")
+    await cache.delete(CacheKeys.book_detail(book_id))
+    await cache.delete(CacheKeys.popular_books())
+    await cache.delete(CacheKeys.featured_books())
+    await cache.bump_generation(CacheKeys.BOOKS)
 
 
 async def invalidate_user_cache(user_id: int):
     """Invalidate all cache entries related to a user."""
     await cache.delete(CacheKeys.user(user_id))
-    await cache.delete(CacheKeys.user_orders(user_id))
     await cache.delete(CacheKeys.user_wishlist(user_id))
+    await cache.bump_generation(CacheKeys.user_orders_namespace(user_id))
 
 
 async def invalidate_category_cache():
     """Invalidate category cache."""
     await cache.delete(CacheKeys.categories())
-    await cache.delete_pattern("books:page:*")
+    await cache.bump_generation(CacheKeys.BOOKS)
 
 
 async def invalidate_author_cache():
     """Invalidate author cache."""
     await cache.delete(CacheKeys.authors())
-
-
-# Cache warming functions
-async def warm_popular_books_cache(books_data: List[Any]):
-    """Warm the popular books cache."""
-    await cache.set(CacheKeys.popular_books(), books_data, ttl=7200)  # 2 hours
-
-
-async def warm_categories_cache(categories_data: List[Any]):
-    """Warm the categories cache."""
-    await cache.set(CacheKeys.categories(), categories_data, ttl=86400)  # 24 hours
-
-
-async def warm_authors_cache(authors_data: List[Any]):
-    """Warm the authors cache."""
-    await cache.set(CacheKeys.authors(), authors_data, ttl=86400)  # 24 hours
\ No newline at end of file
@@ -0,0 +1,163 @@
+from fastapi import FastAPI
+from typing import Dict, List, Optional, Sequence
+from app.config import settings
+from app.database import get_async_redis
+from app.cache.redis_cache import CacheKeys, generation_listeners
+from app.services.leaderboard_service import BEST_SELLERS_KEY, POPULAR_KEY, top_ids
+import asyncio
+import httpx
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Storefront GETs worth keeping built, with the parameters the UI sends
+WARM_PATHS = (
+    "/api/v1/home/",
+    "/api/v1/categories/",
+    "/api/v1/authors/",
+    "/api/v1/books/categories/",
+    "/api/v1/books/authors/",
+    "/api/v1/books/discounted",
+    "/api/v1/books/slide/1",
+    "/api/v1/books/slide/2",
+    "/api/v1/books/slide/3",
+    "/api/v1/stationery/categories/",
+    "/api/v1/stationery/?skip=0&limit=10",
+    "/api/v1/stationery/?is_new=true&limit=12",
+    "/api/v1/stationery/?is_best_seller=true&limit=12",
+    "/api/v1/stationery/?skip=0&limit=100",
+)
+
+# Namespaces whose generation bump empties the entries above
+WARMED_NAMESPACES = {CacheKeys.BOOKS, CacheKeys.STATIONERY, CacheKeys.HOME}
+
+# Scheduled and startup passes run on one worker at a time
+WARM_LEASE_KEY = "warmer:lease"
+
+
+class CacheWarmer:
+    """Rebuilds the hottest catalog cache entries before shoppers ask for them.
+
+    Each pass replays the storefront GETs (WARM_PATHS, the first listing pages
+    and the best-selling book details) against the app in-process, so the
+    entries are built by the routers themselves with the same keys and values
+    a real request would produce. A pass runs at startup, on a schedule, and
+    shortly after any bump of a books / stationery / home generation, with at
+    most `concurrency` requests in flight.
+    """
+
+    def __init__(self, interval: int, concurrency: int, list_pages: int, top_books: int, debounce: float = 1.0):
+        self.interval = interval
+        self.concurrency = concurrency
+        self.list_pages = list_pages
+        self.top_books = top_books
+        self.debounce = debounce
+        self.last_pass: Optional[Dict[str, object]] = None
+        self._app: Optional[FastAPI] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Optional[asyncio.Event] = None
+
+    async def hot_paths(self) -> List[str]:
+        paths = list(WARM_PATHS)
+        paths += [f"/api/v1/books/?skip={page * 10}&limit=10" for page in range(self.list_pages)]
+        ranked = await top_ids(get_async_redis(), (BEST_SELLERS_KEY, POPULAR_KEY), self.top_books) or {}
+        book_ids = dict.fromkeys(book_id for ids in ranked.values() for book_id in ids)
+        paths += [f"/api/v1/books/{book_id}" for book_id in list(book_ids)[:self.top_books]]
+        return paths
+
+    async def warm(self, reason: str, paths: Optional[Sequence[str]] = None) -> Dict[str, object]:
+        """Request every hot path once; returns a summary of the pass."""
+        paths = list(paths) if paths is not None else await self.hot_paths()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        failed = []
+        start = time.perf_counter()
+
+        async def fetch(client: httpx.AsyncClient, path: str) -> None:
+            async with semaphore:
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        failed.append(path)
+                except Exception as e:
+                    logger.error(f"Cache warm error for {path}: {e}")
+                    failed.append(path)
+
+        transport = httpx.ASGITransport(app=self._app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://cache-warmer") as client:
+            await asyncio.gather(*[fetch(client, path) for path in paths])
+
+        self.last_pass = {
+            "reason": reason,
+            "paths": len(paths),
+            "failed": failed,
+            "seconds": round(time.perf_counter() - start, 3),
+            "finished_at": int(time.time()),
+        }
+        logger.info(f"Cache warm ({reason}): {len(paths)} paths, {len(failed)} failed, {self.last_pass['seconds']}s")
+        return self.last_pass
+
+    async def _take_lease(self) -> bool:
+        # Held for most of an interval and never released, so N workers do one pass per interval
+        try:
+            return bool(await get_async_redis().set(
+                WARM_LEASE_KEY, uuid.uuid4().hex, nx=True, px=int(self.interval * 900)
+            ))
+        except Exception as e:
+            logger.error(f"Cache warm lease error: {e}")
+            return True
+
+    def notify(self, namespaces: Sequence[str]) -> None:
+        """Generation listener: schedule a pass after a catalog invalidation."""
+        if self._pending is not None and WARMED_NAMESPACES.intersection(namespaces):
+            self._loop.call_soon_threadsafe(self._pending.set)
+
+    async def _run(self) -> None:
+        reason = "startup"
+        while True:
+            try:
+                # Invalidation passes warm this worker's bump right away; the others share the lease
+                if reason == "invalidation" or await self._take_lease():
+                    await self.warm(reason)
+            except Exception as e:
+                logger.error(f"Cache warm pass failed: {e}")
+            try:
+                await asyncio.wait_for(self._pending.wait(), timeout=self.interval)
+                # Let a burst of admin edits settle into one pass
+                await asyncio.sleep(self.debounce)
+                reason = "invalidation"
+            except asyncio.TimeoutError:
+                reason = "schedule"
+            self._pending.clear()
+
+    def start(self, app: FastAPI) -> None:
+        """Start warming in the background (call from the lifespan, once per worker)."""
+        if self._task is not None:
+            return
+        self._app = app
+        self._loop = asyncio.get_running_loop()
+        self._pending = asyncio.Event()
+        generation_listeners.append(self.notify)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        generation_listeners.remove(self.notify)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._pending = None
+
+
+cache_warmer = CacheWarmer(
+    settings.cache_warm_interval,
+    settings.cache_warm_concurrency,
+    settings.cache_warm_list_pages,
+    settings.cache_warm_top_books,
+)
@@ -0,0 +1,92 @@
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Set, Tuple
+from app.cache.redis_cache import RedisCache, CacheKeys
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fields that decide which cached pages list a product and where: list filters,
+# search text, ordering and slug keys. An edit touching one of them still bumps
+# the namespace generation; any other edit is written through in place.
+BOOK_LIST_FIELDS = (
+    "is_active", "is_discount", "is_new", "is_best_seller", "is_slide1", "is_slide2", "is_slide3",
+    "slug", "title", "publisher", "brief_description", "full_description", "created_at",
+)
+STATIONERY_LIST_FIELDS = (
+    "is_active", "is_discount", "is_new", "is_best_seller", "is_slide1", "is_slide2", "is_slide3",
+    "slug", "title", "sku", "brief_description", "full_description", "created_at",
+)
+
+
+class _Unpatchable(Exception):
+    pass
+
+
+def list_snapshot(product: Any, fields: Iterable[str]) -> Tuple:
+    """Values of `fields` plus category and author ids; compare before and after an edit."""
+    values = tuple(getattr(product, field, None) for field in fields)
+    categories = tuple(sorted(c.category_id for c in getattr(product, "categories", None) or []))
+    authors = tuple(sorted(a.author_id for a in getattr(product, "authors", None) or []))
+    return values + (categories, authors)
+
+
+def _product_ids(value: Any, id_field: str, found: Set[int]) -> Set[int]:
+    if isinstance(value, dict):
+        product_id = value.get(id_field)
+        if isinstance(product_id, int):
+            found.add(product_id)
+        for child in value.values():
+            if isinstance(child, (dict, list)):
+                _product_ids(child, id_field, found)
+    elif isinstance(value, list):
+        for child in value:
+            if isinstance(child, (dict, list)):
+                _product_ids(child, id_field, found)
+    return found
+
+
+def page_index(kind: str) -> Callable[[Any], List[str]]:
+    """`index` callback for RedisCache.get_or_set: the reverse indexes of every product in a page."""
+    id_field = f"{kind}_id"
+
+    def index(value: Any) -> List[str]:
+        return [CacheKeys.product_pages(kind, product_id) for product_id in _product_ids(value, id_field, set())]
+    return index
+
+
+def _replace(value: Any, id_field: str, product_id: int, forms: Dict[FrozenSet[str], dict]) -> Any:
+    if isinstance(value, dict):
+        if value.get(id_field) == product_id:
+            # Same shape as the cached item (summary card or full response)
+            form = forms.get(frozenset(value))
+            if form is None:
+                raise _Unpatchable()
+            return form
+        return {k: _replace(v, id_field, product_id, forms) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_replace(v, id_field, product_id, forms) for v in value]
+    return value
+
+
+async def write_through(cache: RedisCache, kind: str, product_id: int, forms: Iterable[dict]) -> int:
+    """Replace a product in every cached page that lists it, in place.
+
+    `forms` are the product's current JSON-ready representations (e.g. the
+    summary card and the full response); each cached occurrence is swapped for
+    the form with the same fields. Pages holding a shape not in `forms` are
+    dropped and rebuilt on demand. Returns how many pages were rewritten.
+    """
+    id_field = f"{kind}_id"
+    forms = {frozenset(form): form for form in forms}
+
+    def transform(value: Any) -> Any:
+        try:
+            return _replace(value, id_field, product_id, forms)
+        except _Unpatchable:
+            return None
+
+    rewritten = 0
+    for key in await cache.indexed_keys(CacheKeys.product_pages(kind, product_id)):
+        if await cache.rewrite(key, transform):
+            rewritten += 1
+    logger.debug(f"Wrote {kind} {product_id} through {rewritten} cached pages")
+    return rewritten
@@ -1,9 +1,23 @@
-from sqlalchemy import create_engine
+from contextvars import ContextVar
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
+from typing import Any, Dict, List, Optional
+import itertools
+import logging
 import redis
+import redis.asyncio
+import threading
+import time
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 # MySQL Database
 engine = create_engine(
     settings.database_url,
@@ -12,13 +26,257 @@ engine = create_engine(
     echo=settings.debug
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-# Redis Connection
+# Async drivers for the sync URLs settings.database_url may hold
+_ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql+mysqldb": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """`url` with its driver swapped for the asyncio one (mysql+pymysql -> mysql+aiomysql)."""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# Same database through an asyncio driver, for routers on AsyncSession. Queries
+# await the socket instead of blocking the event loop; sync services (slug,
+# search re-indexing, sales helpers) are called through AsyncSession.run_sync.
+_async_url = settings.async_database_url or async_database_url(settings.database_url)
+async_engine = create_async_engine(
+    _async_url,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    pool_size=settings.async_db_pool_size,
+    max_overflow=settings.async_db_max_overflow,
+    echo=settings.debug
+)
+
+# Sync Redis, for background threads and CLI scripts only; request handlers use the async client
 redis_client = redis.from_url(settings.redis_url, decode_responses=True)
 
-# Dependency to get DB session
+# Async Redis for everything on the event loop. Responses are stored encoded by
+# app/cache/codec.py, so replies stay raw bytes. Short timeouts let a slow
+# Redis degrade to a cache miss instead of holding the request.
+async_redis_pool = redis.asyncio.ConnectionPool.from_url(
+    settings.redis_url,
+    max_connections=settings.redis_max_connections,
+    socket_timeout=settings.redis_socket_timeout,
+    socket_connect_timeout=settings.redis_connect_timeout,
+    health_check_interval=30,
+)
+async_redis_client = redis.asyncio.Redis(connection_pool=async_redis_pool)
+
+# Set per request by ReadRoutingMiddleware: may this request's reads go to a replica?
+read_replica: ContextVar[bool] = ContextVar("read_replica", default=False)
+
+
+def _replica_lag(replica: Engine) -> Optional[float]:
+    """Seconds `replica` is behind its source; 0 for a database that is not replicating, None if stopped."""
+    with replica.connect() as conn:
+        if replica.dialect.name != "mysql":
+            conn.execute(text("SELECT 1"))
+            return 0.0
+        # SHOW SLAVE STATUS for MySQL before 8.0.22
+        for statement, column in (("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+                                  ("SHOW SLAVE STATUS", "Seconds_Behind_Master")):
+            try:
+                row = conn.execute(text(statement)).mappings().first()
+            except DBAPIError:
+                continue
+            if row is None:
+                return 0.0
+            lag = row.get(column)
+            return None if lag is None else float(lag)
+    return None
+
+
+def _catalog_modified() -> Optional[int]:
+    # Imported here: catalog_version imports this module
+    from app.cache.catalog_version import MODIFIED_KEY
+    try:
+        modified = redis_client.get(MODIFIED_KEY)
+    except Exception as e:
+        logger.error(f"Catalog modified read error: {e}")
+        return None
+    return int(modified) if modified is not None else None
+
+
+class ReplicaSet:
+    """Read replicas (a sync and an async engine each) behind a lag guard.
+
+    A background thread measures every replica's lag and reads the time of the
+    last catalog write (catalog:modified). `pick` only hands out a replica that
+    answered the last probe, is at most replica_max_lag_seconds behind and has
+    caught up with that write, so a cache rebuilt right after an admin edit
+    never reads the old row. `pick` runs inside Session.get_bind and only reads
+    what the probe stored; it never does I/O.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.engines = [
+            create_engine(url, pool_pre_ping=True, pool_recycle=300, echo=settings.debug)
+            for url in urls
+        ]
+        self.async_engines = [
+            create_async_engine(async_database_url(url), pool_pre_ping=True, pool_recycle=300,
+                                pool_size=settings.async_db_pool_size,
+                                max_overflow=settings.async_db_max_overflow, echo=settings.debug)
+            for url in urls
+        ]
+        self._lags: List[Optional[float]] = [None] * len(urls)
+        self._modified: Optional[int] = None
+        self._checked_at = 0.0
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        self._routed = {"replica": 0, "primary": 0}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> None:
+        """Probe every replica's lag now."""
+        for i, replica in enumerate(self.engines):
+            try:
+                self._lags[i] = _replica_lag(replica)
+            except Exception as e:
+                logger.warning(f"Replica {i} lag check failed: {e}")
+                self._lags[i] = None
+        self._modified = _catalog_modified()
+        self._checked_at = time.time()
+
+    def note_catalog_write(self, modified: int) -> None:
+        """Record a catalog write made by this worker, so `pick` sees it before the next probe."""
+        if self._modified is not None and modified > self._modified:
+            self._modified = modified
+
+    def _run(self) -> None:
+        while True:
+            self.check()
+            if self._stop.wait(settings.replica_check_interval):
+                return
+
+    def start(self) -> None:
+        if not self.engines or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-lag-probe", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def pick(self, use_async: bool) -> Optional[Engine]:
+        """A replica that passes the lag guard (round robin), or None for the primary."""
+        replica = None
+        if self.engines:
+            now = time.time()
+            # A probe result older than a few intervals means the probe is stuck or stopped
+            probed = now - self._checked_at < 3 * settings.replica_check_interval
+            modified = self._modified if probed else None
+            # Lag is measured up to one interval ago, in whole seconds
+            candidates = [
+                i for i, lag in enumerate(self._lags)
+                if lag is not None and lag <= settings.replica_max_lag_seconds
+                and modified is not None and now - modified > lag + settings.replica_check_interval + 1
+            ]
+            if candidates:
+                i = candidates[next(self._turn) % len(candidates)]
+                replica = self.async_engines[i].sync_engine if use_async else self.engines[i]
+        with self._lock:
+            self._routed["replica" if replica is not None else "primary"] += 1
+        return replica
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            routed = dict(self._routed)
+        return {
+            "replicas": len(self.engines),
+            "lag_seconds": list(self._lags),
+            "catalog_modified": self._modified,
+            "checked_at": self._checked_at or None,
+            "routed_reads": routed,
+        }
+
+    async def dispose(self) -> None:
+        self.stop()
+        for replica in self.engines:
+            replica.dispose()
+        for replica in self.async_engines:
+            await replica.dispose()
+
+
+replicas = ReplicaSet(settings.get_replica_urls())
+
+
+def _is_read(clause) -> bool:
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+def _is_write(clause) -> bool:
+    return isinstance(clause, UpdateBase) or (isinstance(clause, Select) and clause._for_update_arg is not None)
+
+
+class RoutingSession(Session):
+    """Session that sends plain SELECTs to a read replica when the request allows it.
+
+    Only requests marked by ReadRoutingMiddleware are eligible. The replica is
+    chosen once, on the first read. Flushes, INSERT/UPDATE/DELETE and
+    SELECT ... FOR UPDATE go to the primary, and so does every later statement
+    of the session, so a request reads its own writes.
+    """
+
+    use_async = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._route_reads = read_replica.get()
+        self._replica: Optional[Engine] = None
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if self._route_reads:
+            if self._flushing or _is_write(clause):
+                self._route_reads = False
+            elif _is_read(clause):
+                if self._replica is None:
+                    self._replica = replicas.pick(self.use_async)
+                    self._route_reads = self._replica is not None
+                if self._replica is not None:
+                    return self._replica
+        return super().get_bind(mapper, clause=clause, **kw)
+
+    def use_primary(self) -> None:
+        """Send the rest of this session's statements to the primary (e.g. before a read-then-insert)."""
+        self._route_reads = False
+
+
+class AsyncRoutingSession(RoutingSession):
+    """RoutingSession behind an AsyncSession: picks the replica's async engine."""
+
+    use_async = True
+
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+# expire_on_commit=False: objects stay readable after commit without a lazy
+# reload, which AsyncSession cannot do implicitly
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, sync_session_class=AsyncRoutingSession,
+    autoflush=False, expire_on_commit=False
+)
+
+# Dependency to get DB session. Sessions are lazy: the pool checkout (and its
+# pre-ping) happens on the first query, so a request answered from the cache
+# never touches MySQL. FastAPI resolves the dependency once per request, so the
+# endpoint and its auth dependencies share the session.
 def get_db():
     db = SessionLocal()
     try:
@@ -26,6 +284,19 @@ def get_db():
     finally:
         db.close()
 
-# Dependency to get Redis client
+# Dependency to get an AsyncSession (books, stationery, orders, reviews)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependency to get Redis client: the shared async client, awaited on the event loop
 def get_redis():
-    return redis_client
\ No newline at end of file
+    return async_redis_client
+
+# Same shared async client, for code outside a request (RedisCache, cache warmer, shutdown)
+def get_async_redis():
+    return async_redis_client
+
+# Sync Redis client, for threads and scripts that cannot await
+def get_sync_redis():
+    return redis_client
@@ -1,14 +1,21 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 import os
 from app.config import settings
-from app.database import engine, get_db
+from app.database import engine, async_engine, replicas, AsyncSessionLocal, get_db, get_async_redis, get_sync_redis
 from app.models.models import Base
-from app.routers import auth, books, orders, addresses, users, authors, categories, chat, reviews, moderation, stationery, slides, notifications
+from app.routers import auth, books, orders, addresses, users, authors, categories, chat, reviews, moderation, stationery, slides, notifications, search, home, facets, diagnostics
 from app.auth.auth import init_roles, create_admin_user
+from app.cache.local_cache import start_invalidation_listener, stop_invalidation_listener
+from app.cache.redis_cache import cache_stats, cache_metrics_text
+from app.cache.warmer import cache_warmer
+from app.search.catalog import catalog_search
+from app.middleware.db_routing import ReadRoutingMiddleware
+from app.monitoring.db_stats import DBStatsMiddleware, db_metrics
+from app.monitoring.slow_queries import slow_query_log
 
 
 @asynccontextmanager
@@ -25,6 +32,8 @@ async def lifespan(app: FastAPI):
     try:
         init_roles(db)
         create_admin_user(db)
+        # The homepage reads slides 1..3 and never creates them itself
+        slides.ensure_default_slides(db)
         
         # Initialize admin login code system
         from app.services.admin_code_service import initialize_admin_code
@@ -36,6 +45,28 @@ async def lifespan(app: FastAPI):
     finally:
         db.close()
     
+    # Build the in-memory search index off the event loop; searches use SQL LIKE until it is ready
+    catalog_search.build_in_background()
+    
+    # Seed the Redis leaderboards if they are missing
+    async with AsyncSessionLocal() as db:
+        from app.services.leaderboard_service import ensure_leaderboards
+        await ensure_leaderboards(db, get_async_redis())
+    
+    # Measure replica lag in the background; catalog reads use a replica only once it is known to be fresh
+    replicas.start()
+    
+    # Run EXPLAIN for slow statements and publish this worker's slow-query figures
+    if settings.slow_query_log_enabled:
+        slow_query_log.start(get_sync_redis())
+    
+    # Keep this worker's L1 cache consistent with writes made by other workers
+    start_invalidation_listener(get_sync_redis())
+    
+    # Rebuild the hottest catalog entries now, after every catalog invalidation and on a schedule
+    if settings.cache_warm_enabled:
+        cache_warmer.start(app)
+    
     # Create upload directories
     os.makedirs(settings.upload_dir, exist_ok=True)
     os.makedirs(os.path.join(settings.upload_dir, "books"), exist_ok=True)
@@ -46,6 +77,12 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("Shutting down...")
+    await cache_warmer.stop()
+    stop_invalidation_listener()
+    slow_query_log.stop()
+    await get_async_redis().aclose()
+    await async_engine.dispose()
+    await replicas.dispose()
 
 
 # Create FastAPI app
@@ -63,8 +100,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified",
+                    "X-DB-Queries", "X-DB-Time-Ms", "X-DB-Checkouts", "X-DB-Repeated"],
 )
 
+# Catalog GETs read from a replica when one is configured and fresh enough
+app.add_middleware(ReadRoutingMiddleware)
+
+# Per-request database use (checkouts, statements, time, N+1 suspects) for /metrics,
+# /health/db and, in debug mode, X-DB-* response headers
+app.add_middleware(DBStatsMiddleware)
+db_metrics.instrument(engine, "primary")
+db_metrics.instrument(async_engine.sync_engine, "primary_async")
+for i, (replica, async_replica) in enumerate(zip(replicas.engines, replicas.async_engines)):
+    db_metrics.instrument(replica, f"replica{i}")
+    db_metrics.instrument(async_replica.sync_engine, f"replica{i}_async")
+
+# Opt-in slow-query log; EXPLAIN runs on the sync engine of the same database
+if settings.slow_query_log_enabled:
+    db_metrics.statement_listeners.append(slow_query_log.record)
+    slow_query_log.explain_with("primary", engine)
+    slow_query_log.explain_with("primary_async", engine)
+    for i, replica in enumerate(replicas.engines):
+        slow_query_log.explain_with(f"replica{i}", replica)
+        slow_query_log.explain_with(f"replica{i}_async", replica)
+
 # Static files for serving images
 # Get the backend directory (parent of app directory)
 backend_dir = os.path.dirname(os.path.dirname(__file__))
@@ -86,6 +146,10 @@ app.include_router(moderation.router, prefix="/api/v1")
 app.include_router(stationery.router, prefix="/api/v1")
 app.include_router(slides.router, prefix="/api/v1")
 app.include_router(notifications.router, prefix="/api/v1")
+app.include_router(search.router, prefix="/api/v1")
+app.include_router(home.router, prefix="/api/v1")
+app.include_router(facets.router, prefix="/api/v1")
+app.include_router(diagnostics.router, prefix="/api/v1")
 
 
 @app.get("/")
@@ -105,6 +169,27 @@ async def health_check():
     return {"status": "healthy", "message": "Bookstore API is running"}
 
 
+@app.get("/health/cache")
+async def cache_health():
+    """Per-tier and per key-family cache hit ratios, and the last warm pass, for the worker that serves the request."""
+    return {**cache_stats(), "warmer": cache_warmer.last_pass}
+
+
+@app.get("/health/db")
+async def db_health():
+    """Replica lag, replica/primary read routing and per-request database use, for this worker."""
+    return {**replicas.snapshot(), "usage": db_metrics.snapshot()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Cache and database metrics of the worker that serves the request, in the Prometheus text format.
+    
+    Every worker keeps its own counters; scrape each one (or run a single worker).
+    """
+    return PlainTextResponse(cache_metrics_text() + db_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 @app.exception_handler(404)
 async def not_found_handler(request: Request, exc):
     """Custom 404 handler."""
@@ -1,7 +1,9 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from app.database import get_async_db, get_db
 from app.auth.auth import verify_token, get_user_by_email
 from app.models.models import User
 from typing import Optional
@@ -15,15 +17,47 @@ credentials_exception = HTTPException(
 )
 
 
+def _uses_async_db(dependant) -> bool:
+    """True if the endpoint or any of its dependencies, at any depth, declares get_async_db.
+
+    The user lookups are skipped: they declare both sessions themselves.
+    """
+    for dep in dependant.dependencies:
+        if dep.call is get_async_db:
+            return True
+        if dep.call in (get_current_user, get_current_user_optional):
+            continue
+        if _uses_async_db(dep):
+            return True
+    return False
+
+
+async def _load_user(request: Request, db: Session, async_db: AsyncSession, email: str) -> Optional[User]:
+    """Look the user up on the session the endpoint itself uses.
+
+    Both sessions are per request and lazy (no connection until the first
+    query), so only the one the endpoint's dependency tree declares ever
+    checks out a connection, and the user stays attached to it.
+    """
+    route = request.scope.get("route")
+    dependant = getattr(route, "dependant", None)
+    if dependant is not None and _uses_async_db(dependant):
+        # Endpoints read current_user.role, which AsyncSession cannot lazy-load
+        return await async_db.scalar(select(User).options(selectinload(User.role)).filter(User.email == email))
+    return get_user_by_email(db, email=email)
+
+
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    async_db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get the current authenticated user."""
     token = credentials.credentials
     token_data = verify_token(token, credentials_exception)
     
-    user = get_user_by_email(db, email=token_data.email)
+    user = await _load_user(request, db, async_db, token_data.email)
     if user is None:
         raise credentials_exception
     
@@ -80,8 +114,10 @@ def require_customer_or_admin(current_user: User = Depends(get_current_active_us
 
 # Optional authentication (for endpoints that work with or without auth)
 async def get_current_user_optional(
+    request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    async_db: AsyncSession = Depends(get_async_db)
 ) -> Optional[User]:
     """Get the current user if authenticated, otherwise return None."""
     if credentials is None:
@@ -90,7 +126,7 @@ async def get_current_user_optional(
     try:
         token = credentials.credentials
         token_data = verify_token(token, credentials_exception)
-        user = get_user_by_email(db, email=token_data.email)
+        user = await _load_user(request, db, async_db, token_data.email)
         if user and user.is_active:
             return user
     except:
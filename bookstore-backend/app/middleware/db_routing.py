@@ -0,0 +1,77 @@
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+from app.database import read_replica, replicas
+
+# Public GETs whose reads may be served by a replica (see app.database.RoutingSession)
+REPLICA_READ_PREFIXES = (
+    "/api/v1/books",
+    "/api/v1/stationery",
+    "/api/v1/authors",
+    "/api/v1/categories",
+    "/api/v1/reviews",
+    "/api/v1/slides",
+    "/api/v1/notifications",
+    "/api/v1/home",
+    "/api/v1/facets",
+    "/api/v1/search",
+)
+
+# Per-request override: "primary", or "replica" for any GET (still lag guarded)
+ROUTE_HEADER = "x-db-route"
+# Set by a client's successful write; its reads stay on the primary while it lives
+STICKY_COOKIE = "db_primary"
+
+READ_METHODS = ("GET", "HEAD")
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+def wants_replica(method: str, path: str, headers: Headers) -> bool:
+    if method not in READ_METHODS:
+        return False
+    override = headers.get(ROUTE_HEADER, "").lower()
+    if override in ("primary", "replica"):
+        return override == "replica"
+    cookies = headers.get("cookie", "").split(";")
+    if any(cookie.strip().startswith(f"{STICKY_COOKIE}=") for cookie in cookies):
+        return False
+    return path.startswith(REPLICA_READ_PREFIXES)
+
+
+class ReadRoutingMiddleware:
+    """Mark read-only catalog requests as replica-eligible.
+
+    Every other request (writes, user data, admin) stays on the primary. A
+    successful write sets a short-lived cookie so the same client keeps reading
+    from the primary until the replicas have caught up. Does nothing when no
+    replica is configured.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not replicas.engines:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        if method in WRITE_METHODS:
+            await self.app(scope, receive, self._sticky(send))
+            return
+
+        token = read_replica.set(wants_replica(method, scope["path"], Headers(scope=scope)))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            read_replica.reset(token)
+
+    @staticmethod
+    def _sticky(send: Send) -> Send:
+        cookie = f"{STICKY_COOKIE}=1; Max-Age={settings.replica_sticky_seconds}; Path=/; HttpOnly; SameSite=Lax"
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+        return send_with_cookie
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DECIMAL, DateTime, Date, ForeignKey, Table, Boolean
+from sqlalchemy import Column, Integer, String, Text, DECIMAL, DateTime, Date, ForeignKey, Table, Boolean, Index, UniqueConstraint
 from sqlalchemy.dialects.mysql import LONGTEXT
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -109,6 +109,10 @@ class Category(Base):
 
 class Book(Base):
     __tablename__ = "books"
+    __table_args__ = (
+        # Supports keyset pagination: WHERE is_active ORDER BY created_at, book_id
+        Index("ix_books_active_created_id", "is_active", "created_at", "book_id"),
+    )
     
     book_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     title = Column(String(255), nullable=False)
@@ -125,7 +129,7 @@ class Book(Base):
     read_sample = Column(LONGTEXT, nullable=True)  # JSON array of image file paths
     audio_sample = Column(String(500), nullable=True)  # Audio file path
     is_active = Column(Boolean, nullable=False, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())  # keyset cursor key
     
     # Book physical information
     publisher = Column(String(255), nullable=True)
@@ -151,6 +155,9 @@ class Book(Base):
     discount_amount = Column(Integer, nullable=True)     # Fixed discount amount
     discounted_price = Column(Integer, nullable=True)   # Calculated discounted price
     
+    # Denormalized sales counter, kept in sync by order create/cancel (see sales_service)
+    total_sold = Column(Integer, nullable=False, default=0, server_default="0")
+    
     authors = relationship("Author", secondary=book_authors, back_populates="books")
     categories = relationship("Category", secondary=book_categories, back_populates="books")
     order_items = relationship("OrderItem", back_populates="book")
@@ -176,6 +183,10 @@ class Book(Base):
 
 class Stationery(Base):
     __tablename__ = "stationery"
+    __table_args__ = (
+        # Supports keyset pagination: WHERE is_active ORDER BY created_at, stationery_id
+        Index("ix_stationery_active_created_id", "is_active", "created_at", "stationery_id"),
+    )
 
     stationery_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     title = Column(String(255), nullable=False)
@@ -189,7 +200,7 @@ class Stationery(Base):
     image2_url = Column(String(500), nullable=True)
     image3_url = Column(String(500), nullable=True)
     is_active = Column(Boolean, nullable=False, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())  # keyset cursor key
 
     # Physical dimensions for shipping (in cm and grams)
     height = Column(DECIMAL(5, 2), nullable=True)
@@ -211,6 +222,9 @@ class Stationery(Base):
     discount_amount = Column(Integer, nullable=True)
     discounted_price = Column(Integer, nullable=True)
 
+    # Denormalized sales counter, kept in sync by order create/cancel (see sales_service)
+    total_sold = Column(Integer, nullable=False, default=0, server_default="0")
+
     # Relationships
     categories = relationship("Category", secondary=stationery_categories, back_populates="stationery")
     # Reviews relationship for stationery
@@ -397,5 +411,19 @@ class Notification(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
+
+# Previous or alternate slugs that should redirect to a product's current slug
+class SlugAlias(Base):
+    __tablename__ = "slug_aliases"
+    __table_args__ = (
+        UniqueConstraint("item_type", "slug", name="uq_slug_aliases_type_slug"),
+    )
+    
+    alias_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    item_type = Column(String(20), nullable=False)  # 'book' or 'stationery'
+    slug = Column(String(255), nullable=False)
+    item_id = Column(Integer, nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 # Import ZaloToken from separate file
 from app.models.zalo_tokens import ZaloToken
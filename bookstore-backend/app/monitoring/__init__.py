@@ -0,0 +1 @@
+# Database Monitoring Module
\ No newline at end of file
@@ -0,0 +1,230 @@
+from collections import defaultdict
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.cache.metrics import Histogram
+from app.config import settings
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Pool checkouts per request; 0 is a request served without touching the database
+CHECKOUT_BUCKETS = (0, 1, 2, 3, 5, 10)
+# Statements per request
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# Database time per request, seconds
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class RequestDBStats:
+    """Database use of one HTTP request."""
+
+    __slots__ = ("scope", "checkouts", "queries", "db_time", "statements")
+
+    def __init__(self, scope: Optional[Scope] = None):
+        self.scope = scope
+        self.checkouts = 0
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements: Dict[str, int] = defaultdict(int)  # SQL text -> executions
+
+    @property
+    def route(self) -> str:
+        """Route template ("/api/v1/books/{book_id}"), or the raw path when no route matched."""
+        if self.scope is None:
+            return "-"
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "-")
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Statements run at least `threshold` times (N+1 suspects), most repeated first."""
+        threshold = threshold or settings.db_repeat_threshold
+        return sorted(
+            ((sql, count) for sql, count in self.statements.items() if count >= threshold),
+            key=lambda item: -item[1],
+        )
+
+
+# Set by DBStatsMiddleware; None outside a request (startup, scripts, background tasks)
+current_request: ContextVar[Optional[RequestDBStats]] = ContextVar("current_request_db_stats", default=None)
+
+
+def _route_label(route: str) -> str:
+    return route.replace("\\", "\\\\").replace('"', '\\"')
+
+
+class DBMetrics:
+    """Pool checkouts, statements and database time, per engine and per request, for this worker process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engines: Dict[str, Engine] = {}
+        self._checkouts: Dict[str, int] = {}
+        self._outside_requests = 0
+        self._per_request = Histogram(CHECKOUT_BUCKETS)
+        self._queries = Histogram(QUERY_BUCKETS)
+        self._db_time = Histogram(DB_TIME_BUCKETS)
+        self._repeated: Dict[str, int] = defaultdict(int)  # route -> requests with an N+1 suspect
+        # Called with every finished request's stats (e.g. the query_budget pytest fixture)
+        self.request_listeners: List[Callable[[RequestDBStats], None]] = []
+        # Called after every statement as (engine name, statement, parameters, executemany,
+        # seconds, request stats or None), e.g. the slow-query log
+        self.statement_listeners: List[Callable[..., None]] = []
+
+    def instrument(self, engine: Engine, name: str) -> None:
+        """Count checkouts, statements and time of `engine` under `name` (pass AsyncEngine.sync_engine for async engines)."""
+        with self._lock:
+            if name in self._engines:
+                return
+            self._engines[name] = engine
+            self._checkouts[name] = 0
+
+        @event.listens_for(engine, "checkout")
+        def checkout(dbapi_connection, connection_record, connection_proxy):
+            stats = current_request.get()
+            with self._lock:
+                self._checkouts[name] += 1
+                if stats is None:
+                    self._outside_requests += 1
+            if stats is not None:
+                stats.checkouts += 1
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info["query_start"].pop()
+            stats = current_request.get()
+            if stats is not None:
+                stats.queries += 1
+                stats.db_time += elapsed
+                stats.statements[statement] += 1
+            for listener in self.statement_listeners:
+                listener(name, statement, parameters, executemany, elapsed, stats)
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(context):
+            # after_cursor_execute does not run for a failed statement
+            starts = context.connection.info.get("query_start") if context.connection is not None else None
+            if starts:
+                starts.pop()
+
+    def observe_request(self, stats: RequestDBStats) -> None:
+        repeated = stats.repeated()
+        if repeated:
+            sql, count = repeated[0]
+            logger.warning(
+                f"Possible N+1 on {stats.route}: {len(repeated)} statement(s) repeated, "
+                f"worst {count}x: {' '.join(sql.split())[:300]}"
+            )
+        with self._lock:
+            self._per_request.observe(stats.checkouts)
+            self._queries.observe(stats.queries)
+            self._db_time.observe(stats.db_time)
+            if repeated:
+                self._repeated[stats.route] += 1
+        for listener in list(self.request_listeners):
+            listener(stats)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._checkouts = dict.fromkeys(self._checkouts, 0)
+            self._outside_requests = 0
+            self._per_request = Histogram(CHECKOUT_BUCKETS)
+            self._queries = Histogram(QUERY_BUCKETS)
+            self._db_time = Histogram(DB_TIME_BUCKETS)
+            self._repeated.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            h, q, t = self._per_request, self._queries, self._db_time
+            return {
+                "checkouts": dict(self._checkouts),
+                "checkouts_outside_requests": self._outside_requests,
+                "requests": h.count,
+                "requests_without_checkout": h.counts[0],
+                "mean_checkouts_per_request": round(h.sum / h.count, 3) if h.count else None,
+                "mean_queries_per_request": round(q.sum / q.count, 3) if q.count else None,
+                "queries_p99": q.quantile(0.99) if q.count else None,
+                "db_ms_p99": t.quantile(0.99) * 1000 if t.count else None,
+                "n_plus_one_requests": dict(self._repeated),
+                "checked_out_now": {name: engine.pool.checkedout() for name, engine in self._engines.items()},
+            }
+
+    def render_prometheus(self, prefix: str = "bookstore_db") -> str:
+        lines = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        def histogram(name: str, h: Histogram) -> None:
+            for bound, count in h.cumulative():
+                lines.append(f'{prefix}_{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f"{prefix}_{name}_sum {h.sum}")
+            lines.append(f"{prefix}_{name}_count {h.count}")
+
+        with self._lock:
+            header("pool_checkouts_total", "counter", "Connections checked out of the pool, by engine.")
+            for name, count in sorted(self._checkouts.items()):
+                lines.append(f'{prefix}_pool_checkouts_total{{engine="{name}"}} {count}')
+            header("pool_checked_out", "gauge", "Connections currently checked out, by engine.")
+            for name, engine in sorted(self._engines.items()):
+                lines.append(f'{prefix}_pool_checked_out{{engine="{name}"}} {engine.pool.checkedout()}')
+            header("request_checkouts", "histogram", "Pool checkouts per HTTP request, all engines.")
+            histogram("request_checkouts", self._per_request)
+            header("request_queries", "histogram", "SQL statements per HTTP request, all engines.")
+            histogram("request_queries", self._queries)
+            header("request_seconds", "histogram", "Time spent in SQL statements per HTTP request.")
+            histogram("request_seconds", self._db_time)
+            header("n_plus_one_total", "counter", "Requests that repeated one statement db_repeat_threshold times or more, by route.")
+            for route, count in sorted(self._repeated.items()):
+                lines.append(f'{prefix}_n_plus_one_total{{route="{_route_label(route)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide database metrics
+db_metrics = DBMetrics()
+
+
+class DBStatsMiddleware:
+    """Collect RequestDBStats for every HTTP request and record them when it finishes.
+
+    In debug mode the response also carries X-DB-Queries, X-DB-Time-Ms,
+    X-DB-Checkouts and X-DB-Repeated (statements run db_repeat_threshold
+    times or more), counted up to the moment the headers are sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestDBStats(scope)
+        token = current_request.set(stats)
+        try:
+            await self.app(scope, receive, self._with_headers(send, stats) if settings.debug else send)
+        finally:
+            current_request.reset(token)
+            db_metrics.observe_request(stats)
+
+    @staticmethod
+    def _with_headers(send: Send, stats: RequestDBStats) -> Send:
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-queries", str(stats.queries).encode()),
+                    (b"x-db-time-ms", f"{stats.db_time * 1000:.1f}".encode()),
+                    (b"x-db-checkouts", str(stats.checkouts).encode()),
+                    (b"x-db-repeated", str(len(stats.repeated())).encode()),
+                ]
+            await send(message)
+        return send_with_headers
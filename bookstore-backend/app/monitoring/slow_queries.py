@@ -0,0 +1,334 @@
+from collections import defaultdict
+from sqlalchemy.engine import Engine
+from typing import Any, Dict, List, Optional, Tuple
+from redis import Redis
+from app.config import settings
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# One Redis key per worker process, holding its recent figures (see SlowQueryLog.publish)
+WORKER_KEY_PREFIX = "slow_queries:worker:"
+# Time of the last reset; workers drop older figures when they next publish
+RESET_KEY = "slow_queries:reset_at"
+# The rolling window is kept as this many time buckets
+WINDOW_BUCKETS = 12
+# Distinct (route, statement) pairs kept per bucket; the rest are only counted as dropped
+MAX_ENTRIES_PER_BUCKET = 500
+# Rows of EXPLAIN output kept per statement
+MAX_EXPLAIN_ROWS = 50
+
+_NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),  # string literals
+    (re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\$\d+|__\[POSTCOMPILE_\w+\]"), "?"),  # bind placeholders
+    (re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b"), "?"),  # numeric literals (not digits inside names)
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?+)"),  # IN lists of any length
+)
+
+
+def normalize_statement(statement: str) -> str:
+    """The statement's shape: literals and placeholders as ?, IN lists folded, whitespace collapsed."""
+    normalized = " ".join(statement.split())
+    for pattern, replacement in _NORMALIZE:
+        normalized = pattern.sub(replacement, normalized)
+    return normalized
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+def _explain_sql(engine: Engine, statement: str) -> Optional[str]:
+    # Plain EXPLAIN only: EXPLAIN ANALYZE would run the statement again
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    if engine.dialect.name == "sqlite":
+        return "EXPLAIN QUERY PLAN " + statement
+    return "EXPLAIN " + statement
+
+
+class SlowQueryLog:
+    """Statements slower than slow_query_threshold_ms, ranked per route over a rolling window.
+
+    `record` is a db_metrics statement listener. Each slow statement is logged
+    and counted under (route template, statement fingerprint); parameters are
+    never stored. With slow_query_explain, a background thread runs EXPLAIN
+    once per fingerprint (on a separate connection, with the parameters of
+    the slow execution). Every worker publishes its figures to Redis, so
+    `collect` + `report` see all workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # bucket number -> (route, fingerprint) -> [count, total ms, max ms]
+        self._buckets: Dict[int, Dict[Tuple[str, str], List[float]]] = {}
+        # fingerprint -> {"statement", "engine", "last_seen", "explain"}
+        self._statements: Dict[str, Dict[str, Any]] = {}
+        self.dropped = 0
+        self._explain_engines: Dict[str, Engine] = {}
+        self._explain_queue: "queue.Queue[Optional[Tuple[str, str, str, Any]]]" = queue.Queue(maxsize=100)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._redis: Optional[Redis] = None
+        self._reset_at = 0.0
+        self.worker_key = f"{WORKER_KEY_PREFIX}{socket.gethostname()}:{os.getpid()}"
+
+    @staticmethod
+    def _bucket_width() -> float:
+        return settings.slow_query_window_seconds / WINDOW_BUCKETS
+
+    def explain_with(self, name: str, engine: Engine) -> None:
+        """Run EXPLAIN for statements of the engine instrumented as `name` on `engine` (a sync engine)."""
+        self._explain_engines[name] = engine
+
+    def record(self, engine_name: str, statement: str, parameters: Any, executemany: bool,
+               seconds: float, stats: Any) -> None:
+        elapsed_ms = seconds * 1000
+        if elapsed_ms < settings.slow_query_threshold_ms or statement.startswith("EXPLAIN"):
+            return
+        route = stats.route if stats is not None else "(background)"
+        normalized = normalize_statement(statement)
+        fp = fingerprint(normalized)
+        logger.warning(f"Slow query {elapsed_ms:.0f} ms on {route} [{fp}]: {normalized[:500]}")
+
+        now = time.time()
+        needs_plan = False
+        with self._lock:
+            bucket = self._buckets.setdefault(int(now // self._bucket_width()), {})
+            entry = bucket.get((route, fp))
+            if entry is None:
+                if len(bucket) >= MAX_ENTRIES_PER_BUCKET:
+                    self.dropped += 1
+                    return
+                entry = bucket[(route, fp)] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += elapsed_ms
+            entry[2] = max(entry[2], elapsed_ms)
+            info = self._statements.setdefault(fp, {"statement": normalized, "engine": engine_name, "explain": None})
+            info["last_seen"] = now
+            if settings.slow_query_explain and info["explain"] is None and not executemany:
+                info["explain"] = "pending"
+                needs_plan = True
+        if needs_plan:
+            try:
+                self._explain_queue.put_nowait((fp, engine_name, statement, parameters))
+            except queue.Full:
+                with self._lock:
+                    self._statements[fp]["explain"] = None
+
+    def _explain(self, fp: str, engine_name: str, statement: str, parameters: Any) -> None:
+        engine = self._explain_engines.get(engine_name)
+        sql = _explain_sql(engine, statement) if engine is not None else None
+        if sql is None:
+            plan: Any = "not explainable"
+        else:
+            try:
+                with engine.connect() as conn:
+                    result = conn.exec_driver_sql(sql, parameters if parameters else ())
+                    plan = [dict(row) for row in result.mappings().fetchmany(MAX_EXPLAIN_ROWS)]
+            except Exception as e:
+                logger.warning(f"EXPLAIN failed for slow query [{fp}]: {e}")
+                plan = f"EXPLAIN failed: {e}"
+        with self._lock:
+            if fp in self._statements:
+                self._statements[fp]["explain"] = plan
+
+    def _prune(self, now: float) -> None:
+        # Callers hold the lock
+        oldest = int(now // self._bucket_width()) - WINDOW_BUCKETS + 1
+        for number in [n for n in self._buckets if n < oldest]:
+            del self._buckets[number]
+        horizon = now - settings.slow_query_window_seconds
+        for fp in [fp for fp, info in self._statements.items() if info.get("last_seen", 0) < horizon]:
+            del self._statements[fp]
+
+    def export(self) -> Dict[str, Any]:
+        """This worker's figures inside the window, JSON-ready."""
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            return {
+                "buckets": [
+                    [number, [[route, fp, *entry] for (route, fp), entry in entries.items()]]
+                    for number, entries in self._buckets.items()
+                ],
+                "statements": {fp: dict(info) for fp, info in self._statements.items()},
+                "dropped": self.dropped,
+                "published_at": now,
+            }
+
+    def publish(self) -> None:
+        if self._redis is None:
+            return
+        try:
+            reset_at = float(self._redis.get(RESET_KEY) or 0)
+            if reset_at > self._reset_at:
+                self.reset(reset_at)
+            self._redis.set(self.worker_key, json.dumps(self.export(), default=str),
+                            ex=settings.slow_query_window_seconds)
+        except Exception as e:
+            logger.error(f"Slow query publish error: {e}")
+
+    def collect(self, redis: Redis, local: bool = True) -> List[Dict[str, Any]]:
+        """Figures of every worker that published within the window (this one's taken live unless `local` is off)."""
+        exports = [self.export()] if local else []
+        try:
+            reset_at = float(redis.get(RESET_KEY) or 0)
+            keys = [key for key in redis.scan_iter(match=f"{WORKER_KEY_PREFIX}*") if key != self.worker_key]
+            for raw in redis.mget(keys) if keys else []:
+                export = json.loads(raw) if raw else None
+                # Published before the last reset: that worker clears itself on its next publish
+                if export and export.get("published_at", 0) >= reset_at:
+                    exports.append(export)
+        except Exception as e:
+            logger.error(f"Slow query collect error: {e}")
+        return exports
+
+    def reset(self, at: Optional[float] = None) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self._statements.clear()
+            self.dropped = 0
+            self._reset_at = at or time.time()
+
+    def reset_all(self, redis: Redis) -> None:
+        """Clear this worker's figures and have every other worker clear its own on its next publish."""
+        self.reset()
+        try:
+            redis.set(RESET_KEY, self._reset_at, ex=settings.slow_query_window_seconds)
+            keys = list(redis.scan_iter(match=f"{WORKER_KEY_PREFIX}*"))
+            if keys:
+                redis.delete(*keys)
+        except Exception as e:
+            logger.error(f"Slow query reset error: {e}")
+
+    def _run(self) -> None:
+        next_publish = time.monotonic() + settings.slow_query_publish_interval
+        while not self._stop.is_set():
+            try:
+                item = self._explain_queue.get(timeout=max(0.0, next_publish - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is not None:
+                self._explain(*item)
+            if time.monotonic() >= next_publish:
+                self.publish()
+                next_publish = time.monotonic() + settings.slow_query_publish_interval
+        self.publish()
+
+    def start(self, redis: Redis) -> None:
+        """Run EXPLAINs and publish to Redis in the background (startup, when the log is enabled)."""
+        self._redis = redis
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="slow-query-log", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._explain_queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def report(exports: List[Dict[str, Any]], top: int = 20, per_route: int = 5,
+           route: Optional[str] = None) -> Dict[str, Any]:
+    """Merge worker exports into the top statements by total time, overall and per route."""
+    now = time.time()
+    oldest = int(now // (settings.slow_query_window_seconds / WINDOW_BUCKETS)) - WINDOW_BUCKETS + 1
+    totals: Dict[Tuple[str, str], List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+    statements: Dict[str, Dict[str, Any]] = {}
+    dropped = 0
+    for export in exports:
+        dropped += export.get("dropped", 0)
+        for number, entries in export.get("buckets", []):
+            if number < oldest:
+                continue
+            for entry_route, fp, count, total_ms, max_ms in entries:
+                if route is not None and entry_route != route:
+                    continue
+                merged = totals[(entry_route, fp)]
+                merged[0] += count
+                merged[1] += total_ms
+                merged[2] = max(merged[2], max_ms)
+        for fp, info in export.get("statements", {}).items():
+            known = statements.get(fp)
+            # Prefer a captured plan over "pending" or a missing one
+            if known is None or (not isinstance(known.get("explain"), list) and isinstance(info.get("explain"), list)):
+                statements[fp] = info
+
+    def row(key: Tuple[str, str], figures: List[float]) -> Dict[str, Any]:
+        entry_route, fp = key
+        info = statements.get(fp, {})
+        count, total_ms, max_ms = figures
+        return {
+            "route": entry_route,
+            "fingerprint": fp,
+            "statement": info.get("statement"),
+            "engine": info.get("engine"),
+            "count": int(count),
+            "total_ms": round(total_ms, 1),
+            "mean_ms": round(total_ms / count, 1) if count else None,
+            "max_ms": round(max_ms, 1),
+            "explain": info.get("explain"),
+        }
+
+    ranked = sorted(totals.items(), key=lambda item: -item[1][1])
+    by_route: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for key, figures in ranked:
+        if len(by_route[key[0]]) < per_route:
+            by_route[key[0]].append(row(key, figures))
+    return {
+        "enabled": settings.slow_query_log_enabled,
+        "threshold_ms": settings.slow_query_threshold_ms,
+        "window_seconds": settings.slow_query_window_seconds,
+        "workers": len(exports),
+        "dropped": dropped,
+        "top": [row(key, figures) for key, figures in ranked[:top]],
+        "by_route": dict(sorted(by_route.items(), key=lambda item: -sum(r["total_ms"] for r in item[1]))),
+    }
+
+
+def format_report(result: Dict[str, Any], explain: bool = False) -> str:
+    """Plain-text rendering of `report()`, for the CLI."""
+    lines = [
+        f"Slow queries >= {result['threshold_ms']:g} ms over the last {result['window_seconds']} s, "
+        f"{result['workers']} worker(s)" + (f", {result['dropped']} dropped" if result["dropped"] else "")
+    ]
+    if not result["top"]:
+        lines.append("No slow statements recorded." if result["enabled"] else
+                     "No slow statements recorded (SLOW_QUERY_LOG_ENABLED is off).")
+        return "\n".join(lines)
+    lines.append("")
+    lines.append(f"{'total ms':>10} {'count':>6} {'mean ms':>9} {'max ms':>9}  fingerprint   route")
+    for r in result["top"]:
+        lines.append(f"{r['total_ms']:>10.1f} {r['count']:>6} {r['mean_ms']:>9.1f} {r['max_ms']:>9.1f}  "
+                     f"{r['fingerprint']}  {r['route']}")
+        lines.append(f"{'':>39}{r['statement'][:160] if r['statement'] else '?'}")
+        if explain and isinstance(r["explain"], list):
+            for plan_row in r["explain"]:
+                lines.append(f"{'':>41}{plan_row}")
+        elif explain and r["explain"]:
+            lines.append(f"{'':>41}{r['explain']}")
+    lines.append("")
+    lines.append("Per route:")
+    for route, rows in result["by_route"].items():
+        lines.append(f"  {route}")
+        for r in rows:
+            lines.append(f"    {r['total_ms']:>10.1f} ms {r['count']:>6}x  {r['fingerprint']}  "
+                         f"{(r['statement'] or '?')[:100]}")
+    return "\n".join(lines)
+
+
+# Process-wide slow-query log (records only when slow_query_log_enabled)
+slow_query_log = SlowQueryLog()
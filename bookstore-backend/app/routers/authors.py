@@ -6,33 +6,19 @@ from app.schemas.schemas import AuthorResponse, AuthorCreate
 from app.models.models import Author, User
 from app.middleware.auth_middleware import require_admin
 from app.cache.redis_cache import RedisCache, CacheKeys
-from redis import Redis
-import json
+from app.cache.catalog_version import bump_catalog_version, conditional_get
+from app.cache.endpoint_cache import cached_endpoint
+from redis.asyncio import Redis
 
 router = APIRouter(prefix="/authors", tags=["Authors"])
 
 
-@router.get("/", response_model=List[AuthorResponse])
-async def get_authors(
-    db: Session = Depends(get_db),
-    redis: Redis = Depends(get_redis)
-):
+@router.get("/", response_model=List[AuthorResponse], dependencies=[Depends(conditional_get)])
+@cached_endpoint(CacheKeys.authors, 1800)
+async def get_authors(db: Session = Depends(get_db)):
     """Get all authors with caching."""
-    cache = RedisCache(redis)
-    
-    # Try to get from cache
-    cache_key = CacheKeys.authors()
-    cached_authors = await cache.get(cache_key)
-    if cached_authors:
-        return json.loads(cached_authors)
-    
     authors = db.query(Author).all()
-    authors_response = [AuthorResponse.from_orm(author) for author in authors]
-    
-    # Cache for 30 minutes
-    await cache.set(cache_key, json.dumps([author.dict() for author in authors_response]), 1800)
-    
-    return authors_response
+    return [AuthorResponse.from_orm(author) for author in authors]
 
 
 @router.post("/", response_model=AuthorResponse)
@@ -54,6 +40,7 @@ async def create_author(
         # Invalidate cache
         cache = RedisCache(redis)
         await cache.delete(CacheKeys.authors())
+        await bump_catalog_version(redis)
         
         return AuthorResponse(
             author_id=author_id,
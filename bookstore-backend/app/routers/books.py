@@ -1,202 +1,269 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request, Response
+from fastapi.responses import RedirectResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, selectinload
 from typing import List, Optional
-from app.database import get_db, get_redis
+from app.database import get_async_db, get_redis
 from app.schemas.schemas import (
-    BookResponse, BookCreate, BookUpdate, MessageResponse,
-    AuthorResponse, CategoryResponse, AuthorCreate, CategoryCreate
+    BookResponse, BookSummary, BookCreate, BookUpdate, MessageResponse,
+    AuthorResponse, CategoryResponse
 )
-from app.models.models import Book, Author, Category, User, OrderItem
+from app.models.models import Book, Author, Category, User
 from app.middleware.auth_middleware import (
-    require_admin, require_customer_or_admin, get_current_user_optional
+    require_admin, get_current_user_optional
 )
 from app.services.image_service import ImageService
 from app.services.media_service import MediaService
-from app.cache.redis_cache import RedisCache, CacheKeys, cache_result
-from redis import Redis
-import json
+from app.cache.redis_cache import MISS_TTL, RedisCache, CacheKeys
+from app.cache.endpoint_cache import cached_endpoint
+from app.cache.catalog_version import bump_catalog_version, conditional_get, sales_conditional_get
+from app.cache.write_through import BOOK_LIST_FIELDS, list_snapshot, page_index, write_through
+from app.services.slug_service import resolve_slug, slugify, sync_aliases
+from app.utils.pagination import apply_keyset, decode_cursor, next_cursor_for, parse_id_list
+from app.search.catalog import catalog_search, BOOK
+from app.services.leaderboard_service import (
+    POPULAR_KEY, BEST_SELLERS_KEY, NEW_RELEASES_KEY, ensure_leaderboards, fallback_order, page_ids, refresh_books
+)
+from redis.asyncio import Redis
 import logging
-import unicodedata
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/books", tags=["Books"])
 
+# Upper bound on ids per /books/batch request
+MAX_BATCH_IDS = 100
+
+# LONGTEXT columns that list cards never show; not loaded for summary views
+SUMMARY_DEFERRED_COLUMNS = (Book.full_description, Book.read_sample)
+
+# OpenAPI shape of list endpoints (view=full returns BookResponse items instead)
+LIST_RESPONSES = {200: {"model": List[BookSummary], "description": "BookSummary items, or BookResponse items with view=full"}}
+
+
+def _list_options(view: str) -> list:
+    """Loader options for a page of books: batch-load relations, skip heavy columns unless view=full."""
+    options = [selectinload(Book.authors), selectinload(Book.categories)]
+    if view != "full":
+        options += [defer(column) for column in SUMMARY_DEFERRED_COLUMNS]
+    return options
+
+
+async def _get_book(db: AsyncSession, book_id: int, active_only: bool = False) -> Optional[Book]:
+    """One book with authors and categories loaded; AsyncSession cannot lazy-load them later."""
+    stmt = select(Book).options(*_list_options("full")).filter(Book.book_id == book_id)
+    if active_only:
+        stmt = stmt.filter(Book.is_active == True)
+    return (await db.scalars(stmt.execution_options(populate_existing=True))).first()
 
-@router.get("/", response_model=List[BookResponse])
+
+def _serialize_list(books: List[Book], view: str) -> List[dict]:
+    """JSON-ready list items in the requested shape."""
+    schema = BookResponse if view == "full" else BookSummary
+    return [schema.from_orm(book).model_dump(mode="json") for book in books]
+
+
+async def _write_through(cache: RedisCache, book: Book) -> None:
+    """Rewrite the cached detail and every cached page listing `book` in place."""
+    full = BookResponse.from_orm(book)
+    await cache.set(CacheKeys.book_detail(book.book_id), full.dict(), 600)
+    await write_through(cache, BOOK, book.book_id, [full.model_dump(mode="json"), *_serialize_list([book], "summary")])
+
+
+@router.get("/", response_model=None, responses=LIST_RESPONSES, dependencies=[Depends(sales_conditional_get)])
 async def get_books(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page"),
     category_id: Optional[int] = None,
     author_id: Optional[int] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    view: str = Query("summary", pattern="^(summary|full)$", description="'full' returns complete BookResponse items"),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
-    """Get books with optional filtering and caching."""
-    cache = RedisCache(redis)
+    """Get books with optional filtering and caching.
     
-    # Create cache key based on parameters
-    cache_key = CacheKeys.books_list(skip, limit, category_id, author_id, search)
-    
-    # Try to get from cache
-    cached_books = await cache.get(cache_key)
-    if cached_books:
-        return cached_books
-    
-    # Build query
-    query = db.query(Book).filter(Book.is_active == True)
+    Without `cursor` the legacy skip/limit paging is used. With `cursor`, pages are
+    ordered by (created_at, book_id) and the next page cursor is returned in the
+    X-Next-Cursor header (absent on the last page).
     
-    if category_id:
-        query = query.join(Book.categories).filter(Category.category_id == category_id)
-    
-    if author_id:
-        query = query.join(Book.authors).filter(Author.author_id == author_id)
-    
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            Book.title.ilike(search_term) |
-            Book.brief_description.ilike(search_term) |
-            Book.full_description.ilike(search_term)
-        )
-    
-    books = query.offset(skip).limit(limit).all()
-    
-    # Convert to response format and add sales data
-    books_response = []
-    for book in books:
-        # Calculate total sold from order_items
-        total_sold = db.query(func.sum(OrderItem.quantity))\
-            .filter(OrderItem.book_id == book.book_id)\
-            .scalar() or 0
-        
-        book_dict = BookResponse.from_orm(book).dict()
-        book_dict['total_sold'] = int(total_sold)
-        books_response.append(BookResponse(**book_dict))
-    
-    # Cache the result for 5 minutes
-    await cache.set(cache_key, [book.dict() for book in books_response], 300)
+    Items are BookSummary cards unless `view=full` is requested.
+    """
+    cache = RedisCache(redis)
     
-    return books_response
-
-
-@router.get("/popular", response_model=List[BookResponse])
+    # Create cache key based on parameters
+    gen = await cache.generation(CacheKeys.BOOKS)
+    if cursor is not None:
+        cache_key = CacheKeys.books_cursor(gen, cursor, limit, category_id, author_id, search, view)
+    else:
+        cache_key = CacheKeys.books_list(gen, skip, limit, category_id, author_id, search, view)
+    
+    async def load():
+        position = None
+        if cursor:
+            try:
+                position = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+    
+        # Build query
+        query = select(Book).filter(Book.is_active == True)
+    
+        if category_id:
+            query = query.join(Book.categories).filter(Category.category_id == category_id)
+    
+        if author_id:
+            query = query.join(Book.authors).filter(Author.author_id == author_id)
+    
+        # Full-text search goes through the accent-insensitive index; ILIKE is only a fallback
+        ranked_ids = None
+        if search:
+            ranked_ids = await catalog_search.search_ids(db, redis, search, BOOK)
+            if ranked_ids is not None:
+                query = query.filter(Book.book_id.in_(ranked_ids))
+            else:
+                search_term = f"%{search}%"
+                query = query.filter(
+                    Book.title.ilike(search_term) |
+                    Book.brief_description.ilike(search_term) |
+                    Book.full_description.ilike(search_term)
+                )
+    
+        if cursor is not None:
+            query = apply_keyset(query, Book.created_at, Book.book_id, position, limit)
+            books = (await db.scalars(query.options(*_list_options(view)))).all()
+            books, next_cursor = next_cursor_for(books, limit, "created_at", "book_id")
+        elif ranked_ids is not None:
+            # Relevance order: the other filters run on ids only, then just the page is loaded
+            matching = set((await db.scalars(query.with_only_columns(Book.book_id))).all())
+            wanted = [book_id for book_id in ranked_ids if book_id in matching][skip:skip + limit]
+            books = await _books_in_order(db, wanted, view)
+        else:
+            books = (await db.scalars(query.options(*_list_options(view)).offset(skip).limit(limit))).all()
+    
+        # total_sold comes from the denormalized counter column, no per-row queries
+        items = _serialize_list(books, view)
+        if cursor is not None:
+            return {"items": items, "next_cursor": next_cursor}
+        return items
+    
+    # Cached for 5 minutes; one request rebuilds an expired page while the others get the stale copy
+    page = await cache.get_or_set(cache_key, load, 300, index=page_index(BOOK))
+    if cursor is not None:
+        _set_next_cursor(response, page["next_cursor"])
+        return page["items"]
+    return page
+
+
+async def _books_in_order(db: AsyncSession, book_ids: List[int], view: str) -> List[Book]:
+    if not book_ids:
+        return []
+    books = {book.book_id: book for book in await db.scalars(
+        select(Book).options(*_list_options(view)).filter(Book.book_id.in_(book_ids))
+    )}
+    return [books[book_id] for book_id in book_ids if book_id in books]
+
+
+def _set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """Expose the cursor for the following page, if there is one."""
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+
+async def _leaderboard_page(db: AsyncSession, redis: Redis, key: str, skip: int, limit: int,
+                            view: str = "summary") -> List[Book]:
+    """Books ranked skip..skip+limit-1 on a leaderboard, in rank order.
+    
+    Only the requested ids come out of the sorted set, so the cost does not grow
+    with the catalog. If Redis is unavailable, the same ranking comes from SQL.
+    """
+    query = select(Book).options(*_list_options(view)).filter(Book.is_active == True)
+    ranked_ids = await page_ids(redis, key, skip, limit)
+    if ranked_ids is None and await ensure_leaderboards(db, redis):
+        ranked_ids = await page_ids(redis, key, skip, limit)
+    if ranked_ids is None:
+        return (await db.scalars(query.order_by(*fallback_order(key)).offset(skip).limit(limit))).all()
+    if not ranked_ids:
+        return []
+    books = {book.book_id: book for book in await db.scalars(query.filter(Book.book_id.in_(ranked_ids)))}
+    return [books[book_id] for book_id in ranked_ids if book_id in books]
+
+
+@router.get("/popular", response_model=None, responses=LIST_RESPONSES, dependencies=[Depends(sales_conditional_get)])
 async def get_popular_books(
+    skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    view: str = Query("summary", pattern="^(summary|full)$"),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis)
 ):
-    """Get popular books - simplified to return active books, frontend will handle sorting."""
-    cache = RedisCache(redis)
-    
-    # Try to get from cache
-    cache_key = f"books:popular_simple:{limit}"
-    cached_books = await cache.get(cache_key)
-    if cached_books:
-        return cached_books
-    
-    # Simply return active books - frontend will handle popularity logic
-    books = db.query(Book).filter(
-        Book.is_active == True
-    ).limit(limit).all()
-    
-    books_response = [BookResponse.from_orm(book) for book in books]
-    
-    # Cache for 1 hour
-    await cache.set(cache_key, [book.dict() for book in books_response], 3600)
-    
-    return books_response
+    """Get the best-selling books by units sold."""
+    books = await _leaderboard_page(db, redis, POPULAR_KEY, skip, limit, view)
+    return _serialize_list(books, view)
 
 
-@router.get("/best-sellers", response_model=List[BookResponse])
+@router.get("/best-sellers", response_model=None, responses=LIST_RESPONSES, dependencies=[Depends(sales_conditional_get)])
 async def get_best_seller_books(
+    skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    view: str = Query("summary", pattern="^(summary|full)$"),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis)
 ):
-    """Get books marked as best sellers - simplified to return active books, frontend will handle filtering."""
-    cache = RedisCache(redis)
-    
-    cache_key = f"books:best_sellers_simple:{limit}"
-    cached_books = await cache.get(cache_key)
-    if cached_books:
-        return cached_books
-    
-    # Simply return active books - frontend will handle best-seller filtering
-    books = db.query(Book).filter(
-        Book.is_active == True
-    ).limit(limit).all()
-    
-    books_response = [BookResponse.from_orm(book) for book in books]
-    
-    # Cache for 30 minutes
-    await cache.set(cache_key, [book.dict() for book in books_response], 1800)
-    
-    return books_response
+    """Get books marked as best sellers first, then the rest by units sold."""
+    books = await _leaderboard_page(db, redis, BEST_SELLERS_KEY, skip, limit, view)
+    return _serialize_list(books, view)
 
 
-@router.get("/new-releases", response_model=List[BookResponse])
+@router.get("/new-releases", response_model=None, responses=LIST_RESPONSES, dependencies=[Depends(sales_conditional_get)])
 async def get_new_release_books(
+    skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    view: str = Query("summary", pattern="^(summary|full)$"),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis)
 ):
-    """Get recently published books - simplified to return active books, frontend will handle sorting."""
-    cache = RedisCache(redis)
-    
-    cache_key = f"books:new_releases_simple:{limit}"
-    cached_books = await cache.get(cache_key)
-    if cached_books:
-        return cached_books
-    
-    # Simply return active books - frontend will handle new release sorting
-    books = db.query(Book).filter(
-        Book.is_active == True
-    ).limit(limit).all()
-    
-    books_response = [BookResponse.from_orm(book) for book in books]
-    
-    # Cache for 30 minutes
-    await cache.set(cache_key, [book.dict() for book in books_response], 1800)
-    
-    return books_response
+    """Get books marked as new first, then the rest by publication date (newest first)."""
+    books = await _leaderboard_page(db, redis, NEW_RELEASES_KEY, skip, limit, view)
+    return _serialize_list(books, view)
 
 
-@router.get("/discounted", response_model=List[BookResponse])
+@router.get("/discounted", response_model=None, responses=LIST_RESPONSES, dependencies=[Depends(sales_conditional_get)])
 async def get_discounted_books(
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    view: str = Query("summary", pattern="^(summary|full)$"),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis)
 ):
     """Get books with discounts."""
     cache = RedisCache(redis)
     
-    cache_key = f"books:discounted:{limit}"
-    cached_books = await cache.get(cache_key)
-    if cached_books:
-        return json.loads(cached_books)
-    
-    books = db.query(Book).filter(
-        Book.is_active == True,
-        Book.is_discount == True
-    ).limit(limit).all()
-    
-    books_response = [BookResponse.from_orm(book) for book in books]
+    cache_key = CacheKeys.books_discounted(await cache.generation(CacheKeys.BOOKS), limit, view)
     
-    # Cache for 30 minutes
-    await cache.set(cache_key, json.dumps([book.dict() for book in books_response]), 1800)
+    async def load():
+        books = (await db.scalars(select(Book).options(*_list_options(view)).filter(
+            Book.is_active == True,
+            Book.is_discount == True
+        ).limit(limit))).all()
+        return _serialize_list(books, view)
     
-    return books_response
+    # Cached for 30 minutes, rebuilt single-flight
+    return await cache.get_or_set(cache_key, load, 1800, index=page_index(BOOK))
 
 
-@router.get("/slide/{slide_number}", response_model=List[BookResponse])
+@router.get("/slide/{slide_number}", response_model=None, responses=LIST_RESPONSES, dependencies=[Depends(sales_conditional_get)])
 async def get_slide_books(
     slide_number: int,
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    view: str = Query("summary", pattern="^(summary|full)$"),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis)
 ):
     """Get books for specific slide (1, 2, or 3)."""
@@ -208,77 +275,81 @@ async def get_slide_books(
     
     cache = RedisCache(redis)
     
-    cache_key = f"books:slide{slide_number}:{limit}"
-    cached_books = await cache.get(cache_key)
-    if cached_books:
-        return json.loads(cached_books)
+    cache_key = CacheKeys.books_slide(await cache.generation(CacheKeys.BOOKS), slide_number, limit, view)
     
-    # Map slide number to field
-    slide_field = getattr(Book, f"is_slide{slide_number}")
+    async def load():
+        # Map slide number to field
+        slide_field = getattr(Book, f"is_slide{slide_number}")
     
-    books = db.query(Book).filter(
-        Book.is_active == True,
-        slide_field == True
-    ).limit(limit).all()
+        books = (await db.scalars(select(Book).options(*_list_options(view)).filter(
+            Book.is_active == True,
+            slide_field == True
+        ).limit(limit))).all()
+        return _serialize_list(books, view)
     
-    books_response = [BookResponse.from_orm(book) for book in books]
-    
-    # Cache for 30 minutes
-    await cache.set(cache_key, json.dumps([book.dict() for book in books_response]), 1800)
-    
-    return books_response
+    # Cached for 30 minutes, rebuilt single-flight
+    return await cache.get_or_set(cache_key, load, 1800, index=page_index(BOOK))
 
 
-@router.get("/categories/", response_model=List[CategoryResponse])
-async def get_categories(
-    db: Session = Depends(get_db),
-    redis: Redis = Depends(get_redis)
-):
+@router.get("/categories/", response_model=List[CategoryResponse], dependencies=[Depends(conditional_get)])
+@cached_endpoint(CacheKeys.categories, 1800)
+async def get_categories(db: AsyncSession = Depends(get_async_db)):
     """Get all book categories with caching."""
-    cache = RedisCache(redis)
-    
-    # Try to get from cache
-    cache_key = CacheKeys.categories()
-    cached_categories = await cache.get(cache_key)
-    if cached_categories:
-        return cached_categories
-    
-    categories = db.query(Category).all()
-    categories_response = [CategoryResponse.from_orm(cat) for cat in categories]
-    
-    # Cache for 30 minutes
-    await cache.set(cache_key, [cat.dict() for cat in categories_response], 1800)
-    
-    return categories_response
+    categories = (await db.scalars(select(Category))).all()
+    return [CategoryResponse.from_orm(cat) for cat in categories]
+
+
+@router.get("/authors/", response_model=List[AuthorResponse], dependencies=[Depends(conditional_get)])
+@cached_endpoint(CacheKeys.authors, 1800)
+async def get_authors(db: AsyncSession = Depends(get_async_db)):
+    """Get all authors with caching."""
+    authors = (await db.scalars(select(Author))).all()
+    return [AuthorResponse.from_orm(author) for author in authors]
 
 
-@router.get("/authors/", response_model=List[AuthorResponse])
-async def get_authors(
-    db: Session = Depends(get_db),
+@router.get("/batch", response_model=List[BookResponse], dependencies=[Depends(sales_conditional_get)])
+async def get_books_batch(
+    ids: str = Query(..., description="Comma-separated book ids, e.g. 3,17,42"),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis)
 ):
-    """Get all authors with caching."""
-    cache = RedisCache(redis)
-    
-    # Try to get from cache
-    cache_key = CacheKeys.authors()
-    cached_authors = await cache.get(cache_key)
-    if cached_authors:
-        return cached_authors
+    """Get several books by id in one request, in the order requested.
     
-    authors = db.query(Author).all()
-    authors_response = [AuthorResponse.from_orm(author) for author in authors]
+    Cached books come from one MGET, the misses from one IN query, and the
+    misses are written back in one pipeline. Unknown or inactive ids are skipped.
+    """
+    try:
+        book_ids = parse_id_list(ids, MAX_BATCH_IDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    # Cache for 30 minutes
-    await cache.set(cache_key, [author.dict() for author in authors_response], 1800)
+    cache = RedisCache(redis)
+    cached = await cache.get_many([CacheKeys.book_detail(book_id) for book_id in book_ids])
+    found = {
+        book_id: BookResponse.parse_obj(value)
+        for book_id, value in zip(book_ids, cached) if value
+    }
+    
+    missing = [book_id for book_id in book_ids if book_id not in found]
+    if missing:
+        books = (await db.scalars(
+            select(Book).options(*_list_options("full")).filter(Book.book_id.in_(missing), Book.is_active == True)
+        )).all()
+        fetched = {book.book_id: BookResponse.from_orm(book) for book in books}
+        # Same value format and TTL as get_book
+        await cache.set_many(
+            {CacheKeys.book_detail(book_id): resp.dict() for book_id, resp in fetched.items()},
+            600
+        )
+        found.update(fetched)
     
-    return authors_response
+    return [found[book_id] for book_id in book_ids if book_id in found]
 
 
-@router.get("/{book_id}", response_model=BookResponse)
+@router.get("/{book_id}", response_model=BookResponse, dependencies=[Depends(sales_conditional_get)])
 async def get_book(
     book_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
@@ -289,14 +360,17 @@ async def get_book(
     cache_key = CacheKeys.book_detail(book_id)
     cached_book = await cache.get(cache_key)
     if cached_book:
-        return BookResponse.parse_raw(cached_book)
+        return BookResponse.parse_obj(cached_book)
     
-    book = db.query(Book).filter(
-        Book.book_id == book_id,
-        Book.is_active == True
-    ).first()
+    # Ids known not to exist (crawlers, stale links) skip MySQL
+    missing_key = CacheKeys.book_missing(book_id)
+    if await cache.get(missing_key):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
+    
+    book = await _get_book(db, book_id, active_only=True)
     
     if not book:
+        await cache.set(missing_key, 1, MISS_TTL)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Book not found"
@@ -305,7 +379,7 @@ async def get_book(
     book_response = BookResponse.from_orm(book)
     
     # Cache for 10 minutes
-    await cache.set(cache_key, book_response.json(), 600)
+    await cache.set(cache_key, book_response.dict(), 600)
     
     return book_response
 
@@ -313,15 +387,15 @@ async def get_book(
 @router.post("/", response_model=BookResponse)
 async def create_book(
     book: BookCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     """Create a new book (Admin only)."""
     try:
-        slug = book.slug or _slugify(book.title)
+        slug = book.slug or slugify(book.title)
         if slug:
-            existing = db.query(Book).filter(Book.slug == slug).first()
+            existing = await db.scalar(select(Book.book_id).filter(Book.slug == slug))
             if existing:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Slug already exists")
         db_book = Book(**book.dict(exclude={"author_ids", "category_ids", "slug"}), slug=slug)
@@ -329,30 +403,20 @@ async def create_book(
         # Calculate discounted price if discount is provided
         db_book.calculate_discounted_price()
         
-        db.add(db_book)
-        db.flush()  # Get the book_id
-        
-        # Add authors
+        # Add authors (while the book is still pending, so the collections need no load)
         if book.author_ids:
-            authors = db.query(Author).filter(Author.author_id.in_(book.author_ids)).all()
+            authors = (await db.scalars(select(Author).filter(Author.author_id.in_(book.author_ids)))).all()
             db_book.authors.extend(authors)
         
         # Add categories
         if book.category_ids:
-            categories = db.query(Category).filter(Category.category_id.in_(book.category_ids)).all()
+            categories = (await db.scalars(select(Category).filter(Category.category_id.in_(book.category_ids)))).all()
             db_book.categories.extend(categories)
         
-        db.commit()
-        db.refresh(db_book)
-        
-        # Invalidate cache
-        cache = RedisCache(redis)
-        await cache.delete_pattern("books:*")
-        
-        return BookResponse.from_orm(db_book)
-    
+        db.add(db_book)
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error creating book: {str(e)}")  # For immediate debugging
         import traceback
         traceback.print_exc()  # Print full stack trace
@@ -361,17 +425,34 @@ async def create_book(
             detail=f"Failed to create book: {str(e)}"
         )
 
+    # Reload for server defaults (created_at)
+    db_book = await _get_book(db, db_book.book_id)
+
+    # The write is committed: the steps below log their own failures instead of failing the request
+    cache = RedisCache(redis)
+    await cache.bump_generation(CacheKeys.BOOKS)
+    await bump_catalog_version(redis)
+    await catalog_search.notify_changed(db, redis, BOOK, db_book.book_id)
+    await refresh_books(db, redis, [db_book.book_id])
+    slugs = await db.run_sync(sync_aliases, BOOK, db_book)
+    # The new id and slugs must stop 404ing
+    await cache.delete_many(
+        [CacheKeys.book_missing(db_book.book_id)] + [CacheKeys.slug_missing(BOOK, s) for s in slugs]
+    )
+
+    return BookResponse.from_orm(db_book)
+
 
 @router.put("/{book_id}", response_model=BookResponse)
 async def update_book(
     book_id: int,
     book_update: BookUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     """Update a book (Admin only)."""
-    db_book = db.query(Book).filter(Book.book_id == book_id).first()
+    db_book = await _get_book(db, book_id)
     
     if not db_book:
         raise HTTPException(
@@ -380,6 +461,9 @@ async def update_book(
         )
     
     try:
+        old_slug = db_book.slug
+        listed_as = list_snapshot(db_book, BOOK_LIST_FIELDS)
+        
         # Update book fields
         update_data = book_update.dict(exclude_unset=True, exclude={"author_ids", "category_ids"})
         for field, value in update_data.items():
@@ -387,58 +471,69 @@ async def update_book(
 
         if "slug" in update_data and update_data.get("slug"):
             slug = update_data.get("slug")
-            existing = db.query(Book).filter(Book.slug == slug, Book.book_id != book_id).first()
+            existing = await db.scalar(select(Book.book_id).filter(Book.slug == slug, Book.book_id != book_id))
             if existing:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Slug already exists")
             db_book.slug = slug
         elif "title" in update_data and not db_book.slug:
-            slug = _slugify(update_data.get("title") or db_book.title)
+            slug = slugify(update_data.get("title") or db_book.title)
             if slug:
-                existing = db.query(Book).filter(Book.slug == slug, Book.book_id != book_id).first()
+                existing = await db.scalar(select(Book.book_id).filter(Book.slug == slug, Book.book_id != book_id))
                 if not existing:
                     db_book.slug = slug
         
         # Update authors if provided
         if book_update.author_ids is not None:
-            authors = db.query(Author).filter(Author.author_id.in_(book_update.author_ids)).all()
-            db_book.authors = authors
+            authors = (await db.scalars(select(Author).filter(Author.author_id.in_(book_update.author_ids)))).all()
+            db_book.authors = list(authors)
         
         # Update categories if provided
         if book_update.category_ids is not None:
-            categories = db.query(Category).filter(Category.category_id.in_(book_update.category_ids)).all()
-            db_book.categories = categories
+            categories = (await db.scalars(select(Category).filter(Category.category_id.in_(book_update.category_ids)))).all()
+            db_book.categories = list(categories)
         
         # Recalculate discounted price if discount fields were updated
         if any(field in update_data for field in ['discount_percentage', 'discount_amount', 'price']):
             db_book.calculate_discounted_price()
         
-        db.commit()
-        db.refresh(db_book)
-        
-        # Invalidate cache
-        cache = RedisCache(redis)
-        await cache.delete_pattern("books:*")
-        await cache.delete(CacheKeys.book_detail(book_id))
-        
-        return BookResponse.from_orm(db_book)
-    
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update book"
         )
 
+    # The write is committed: the steps below log their own failures instead of failing the request
+    cache = RedisCache(redis)
+    if list_snapshot(db_book, BOOK_LIST_FIELDS) != listed_as:
+        # Moves between listings (filters, search text, slug): rebuild them all
+        await cache.bump_generation(CacheKeys.BOOKS)
+        await cache.delete(CacheKeys.book_detail(book_id))
+    else:
+        # Same listings, new content: rewrite the cached copies in place
+        await _write_through(cache, db_book)
+    await bump_catalog_version(redis)
+    await catalog_search.notify_changed(db, redis, BOOK, book_id)
+    await refresh_books(db, redis, [book_id])
+    slugs = await db.run_sync(sync_aliases, BOOK, db_book, old_slug)
+    # A reactivated or renamed book must stop 404ing
+    await cache.delete_many(
+        [CacheKeys.book_missing(book_id)] + [CacheKeys.slug_missing(BOOK, s) for s in slugs]
+    )
+
+    return BookResponse.from_orm(db_book)
+
 
 @router.delete("/{book_id}", response_model=MessageResponse)
 async def delete_book(
     book_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     """Soft delete a book (Admin only)."""
-    db_book = db.query(Book).filter(Book.book_id == book_id).first()
+    db_book = await _get_book(db, book_id)
     
     if not db_book:
         raise HTTPException(
@@ -448,12 +543,15 @@ async def delete_book(
     
     # Soft delete
     db_book.is_active = False
-    db.commit()
+    await db.commit()
     
     # Invalidate cache
     cache = RedisCache(redis)
-    await cache.delete_pattern("books:*")
+    await cache.bump_generation(CacheKeys.BOOKS)
+    await bump_catalog_version(redis)
     await cache.delete(CacheKeys.book_detail(book_id))
+    await catalog_search.notify_changed(db, redis, BOOK, book_id)
+    await refresh_books(db, redis, [book_id])
     
     return MessageResponse(message="Book deleted successfully")
 
@@ -462,12 +560,12 @@ async def delete_book(
 async def upload_book_image(
     book_id: int,
     image: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     """Upload and optimize book cover image (Admin only)."""
-    db_book = db.query(Book).filter(Book.book_id == book_id).first()
+    db_book = await _get_book(db, book_id)
     
     if not db_book:
         raise HTTPException(
@@ -487,12 +585,11 @@ async def upload_book_image(
         
         # Update book with new image URL
         db_book.image_url = image_url
-        db.commit()
+        await db.commit()
         
-        # Invalidate cache
-        cache = RedisCache(redis)
-        await cache.delete_pattern("books:*")
-        await cache.delete(CacheKeys.book_detail(book_id))
+        # Listings are unchanged; rewrite the cached copies in place
+        await _write_through(RedisCache(redis), db_book)
+        await bump_catalog_version(redis)
         
         return MessageResponse(message="Book image uploaded successfully")
     
@@ -500,7 +597,7 @@ async def upload_book_image(
         # Re-raise HTTP exceptions (validation errors, etc.)
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error uploading book image: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -512,12 +609,12 @@ async def upload_book_image(
 async def upload_book_image2(
     book_id: int,
     image: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     """Upload and optimize book second image (Admin only)."""
-    db_book = db.query(Book).filter(Book.book_id == book_id).first()
+    db_book = await _get_book(db, book_id)
     
     if not db_book:
         raise HTTPException(
@@ -537,12 +634,11 @@ async def upload_book_image2(
         
         # Update book with new image URL
         db_book.image2_url = image_url
-        db.commit()
+        await db.commit()
         
-        # Invalidate cache
-        cache = RedisCache(redis)
-        await cache.delete_pattern("books:*")
-        await cache.delete(CacheKeys.book_detail(book_id))
+        # Listings are unchanged; rewrite the cached copies in place
+        await _write_through(RedisCache(redis), db_book)
+        await bump_catalog_version(redis)
         
         return MessageResponse(message="Book second image uploaded successfully")
     
@@ -550,7 +646,7 @@ async def upload_book_image2(
         # Re-raise HTTP exceptions (validation errors, etc.)
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error uploading book second image: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -562,12 +658,12 @@ async def upload_book_image2(
 async def upload_book_image3(
     book_id: int,
     image: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     """Upload and optimize book third image (Admin only)."""
-    db_book = db.query(Book).filter(Book.book_id == book_id).first()
+    db_book = await _get_book(db, book_id)
     
     if not db_book:
         raise HTTPException(
@@ -587,12 +683,11 @@ async def upload_book_image3(
         
         # Update book with new image URL
         db_book.image3_url = image_url
-        db.commit()
+        await db.commit()
         
-        # Invalidate cache
-        cache = RedisCache(redis)
-        await cache.delete_pattern("books:*")
-        await cache.delete(CacheKeys.book_detail(book_id))
+        # Listings are unchanged; rewrite the cached copies in place
+        await _write_through(RedisCache(redis), db_book)
+        await bump_catalog_version(redis)
         
         return MessageResponse(message="Book third image uploaded successfully")
     
@@ -600,7 +695,7 @@ async def upload_book_image3(
         # Re-raise HTTP exceptions (validation errors, etc.)
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error uploading book third image: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -612,12 +707,12 @@ async def upload_book_image3(
 async def upload_read_sample_images(
     book_id: int,
     images: List[UploadFile] = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     """Upload read sample images for a book (Admin only)."""
-    db_book = db.query(Book).filter(Book.book_id == book_id).first()
+    db_book = await _get_book(db, book_id)
     
     if not db_book:
         raise HTTPException(
@@ -643,19 +738,18 @@ async def upload_read_sample_images(
         
         # Update book with new read sample paths
         db_book.read_sample = read_sample_paths
-        db.commit()
+        await db.commit()
         
-        # Invalidate cache
-        cache = RedisCache(redis)
-        await cache.delete_pattern("books:*")
-        await cache.delete(CacheKeys.book_detail(book_id))
+        # Listings are unchanged; rewrite the cached copies in place
+        await _write_through(RedisCache(redis), db_book)
+        await bump_catalog_version(redis)
         
         return MessageResponse(message="Read sample images uploaded successfully")
     
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error uploading read sample images: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -667,12 +761,12 @@ async def upload_read_sample_images(
 async def upload_audio_sample(
     book_id: int,
     audio: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     """Upload audio sample for a book (Admin only)."""
-    db_book = db.query(Book).filter(Book.book_id == book_id).first()
+    db_book = await _get_book(db, book_id)
     
     if not db_book:
         raise HTTPException(
@@ -692,19 +786,18 @@ async def upload_audio_sample(
         
         # Update book with new audio sample path
         db_book.audio_sample = audio_sample_path
-        db.commit()
+        await db.commit()
         
-        # Invalidate cache
-        cache = RedisCache(redis)
-        await cache.delete_pattern("books:*")
-        await cache.delete(CacheKeys.book_detail(book_id))
+        # Listings are unchanged; rewrite the cached copies in place
+        await _write_through(RedisCache(redis), db_book)
+        await bump_catalog_version(redis)
         
         return MessageResponse(message="Audio sample uploaded successfully")
     
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error uploading audio sample: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -715,12 +808,12 @@ async def upload_audio_sample(
 @router.delete("/{book_id}/read-sample", response_model=MessageResponse)
 async def delete_read_sample_images(
     book_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     """Delete read sample images for a book (Admin only)."""
-    db_book = db.query(Book).filter(Book.book_id == book_id).first()
+    db_book = await _get_book(db, book_id)
     
     if not db_book:
         raise HTTPException(
@@ -735,17 +828,16 @@ async def delete_read_sample_images(
             
             # Update book to remove read sample
             db_book.read_sample = None
-            db.commit()
+            await db.commit()
             
-            # Invalidate cache
-            cache = RedisCache(redis)
-            await cache.delete_pattern("books:*")
-            await cache.delete(CacheKeys.book_detail(book_id))
+            # Listings are unchanged; rewrite the cached copies in place
+            await _write_through(RedisCache(redis), db_book)
+            await bump_catalog_version(redis)
         
         return MessageResponse(message="Read sample images deleted successfully")
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error deleting read sample images: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -756,12 +848,12 @@ async def delete_read_sample_images(
 @router.delete("/{book_id}/audio-sample", response_model=MessageResponse)
 async def delete_audio_sample(
     book_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     """Delete audio sample for a book (Admin only)."""
-    db_book = db.query(Book).filter(Book.book_id == book_id).first()
+    db_book = await _get_book(db, book_id)
     
     if not db_book:
         raise HTTPException(
@@ -776,66 +868,55 @@ async def delete_audio_sample(
             
             # Update book to remove audio sample
             db_book.audio_sample = None
-            db.commit()
+            await db.commit()
             
-            # Invalidate cache
-            cache = RedisCache(redis)
-            await cache.delete_pattern("books:*")
-            await cache.delete(CacheKeys.book_detail(book_id))
+            # Listings are unchanged; rewrite the cached copies in place
+            await _write_through(RedisCache(redis), db_book)
+            await bump_catalog_version(redis)
         
         return MessageResponse(message="Audio sample deleted successfully")
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error deleting audio sample: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete audio sample: {str(e)}"
         )
-def _slugify(text: str) -> str:
-    if not text:
-        return ""
-    n = unicodedata.normalize('NFKD', text)
-    ascii_text = ''.join(c for c in n if not unicodedata.combining(c))
-    ascii_text = ascii_text.lower()
-    allowed = []
-    for ch in ascii_text:
-        if ch.isalnum():
-            allowed.append(ch)
-        elif ch in [' ', '-', '_']:
-            allowed.append('-')
-    slug = ''.join(allowed)
-    while '--' in slug:
-        slug = slug.replace('--', '-')
-    return slug.strip('-')
-
-@router.get("/slug/{slug}", response_model=BookResponse)
+
+@router.get("/slug/{slug}", response_model=BookResponse, dependencies=[Depends(sales_conditional_get)])
 async def get_book_by_slug(
     slug: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     cache = RedisCache(redis)
-    cache_key = f"books:detail:slug:{slug}"
+    cache_key = CacheKeys.book_slug(await cache.generation(CacheKeys.BOOKS), slug)
     cached = await cache.get(cache_key)
     if cached:
         return BookResponse.parse_obj(cached)
 
-    book = db.query(Book).filter(Book.slug == slug, Book.is_active == True).first()
-    if not book:
-        # Fallback: compute slug from titles and find match, also backfill slug
-        candidates = db.query(Book).filter(Book.is_active == True).all()
-        for b in candidates:
-            if _slugify(b.title) == slug:
-                book = b
-                if not b.slug:
-                    b.slug = slug
-                    db.commit()
-                break
+    # Slugs known not to resolve (crawlers, stale links) skip MySQL
+    missing_key = CacheKeys.slug_missing(BOOK, slug)
+    if await cache.get(missing_key):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
+
+    # Indexed lookups only: current slug, then slug aliases
+    book, is_alias = await db.run_sync(resolve_slug, BOOK, slug)
+    if book and is_alias:
+        return RedirectResponse(
+            url=str(request.url_for("get_book_by_slug", slug=book.slug)),
+            status_code=status.HTTP_301_MOVED_PERMANENTLY
+        )
     if not book:
+        await cache.set(missing_key, 1, MISS_TTL)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
 
+    # resolve_slug loads the row only; the response needs the relations too
+    await db.refresh(book, ["authors", "categories"])
     resp = BookResponse.from_orm(book)
-    await cache.set(cache_key, resp.dict(), 600)
+    if await cache.set(cache_key, resp.dict(), 600):
+        await cache.add_to_indexes(page_index(BOOK)(resp.dict()), cache_key)
     return resp
@@ -6,33 +6,19 @@ from app.schemas.schemas import CategoryResponse, CategoryCreate
 from app.models.models import Category, User
 from app.middleware.auth_middleware import require_admin
 from app.cache.redis_cache import RedisCache, CacheKeys
-from redis import Redis
-import json
+from app.cache.catalog_version import bump_catalog_version, conditional_get
+from app.cache.endpoint_cache import cached_endpoint
+from redis.asyncio import Redis
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
 
-@router.get("/", response_model=List[CategoryResponse])
-async def get_categories(
-    db: Session = Depends(get_db),
-    redis: Redis = Depends(get_redis)
-):
+@router.get("/", response_model=List[CategoryResponse], dependencies=[Depends(conditional_get)])
+@cached_endpoint(CacheKeys.categories, 1800)
+async def get_categories(db: Session = Depends(get_db)):
     """Get all book categories with caching."""
-    cache = RedisCache(redis)
-    
-    # Try to get from cache
-    cache_key = CacheKeys.categories()
-    cached_categories = await cache.get(cache_key)
-    if cached_categories:
-        return json.loads(cached_categories)
-    
     categories = db.query(Category).all()
-    categories_response = [CategoryResponse.from_orm(cat) for cat in categories]
-    
-    # Cache for 30 minutes
-    await cache.set(cache_key, json.dumps([cat.dict() for cat in categories_response]), 1800)
-    
-    return categories_response
+    return [CategoryResponse.from_orm(cat) for cat in categories]
 
 
 @router.post("/", response_model=CategoryResponse)
@@ -54,6 +40,7 @@ async def create_category(
         # Invalidate cache
         cache = RedisCache(redis)
         await cache.delete(CacheKeys.categories())
+        await bump_catalog_version(redis)
         
         return CategoryResponse(
             category_id=category_id,
@@ -6,7 +6,7 @@ from app.config import settings
 from app.models.models import Book, Category, Stationery
 from app.services.ghn_service import GHNService
 from app.cache.redis_cache import RedisCache, CacheKeys
-from redis import Redis
+from redis.asyncio import Redis
 import uuid
 
 import chromadb
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+from redis import Redis
+from app.database import get_sync_redis
+from app.models.models import User
+from app.middleware.auth_middleware import require_admin
+from app.monitoring.slow_queries import report, slow_query_log
+import logging
+
+router = APIRouter(prefix="/admin/diagnostics", tags=["Diagnostics"])
+logger = logging.getLogger(__name__)
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    top: int = Query(20, ge=1, le=200),
+    per_route: int = Query(5, ge=1, le=50),
+    route: Optional[str] = Query(None, description="Route template, e.g. /api/v1/books/{book_id}"),
+    redis: Redis = Depends(get_sync_redis),
+    current_user: User = Depends(require_admin)
+):
+    """Slowest statement shapes by total time over the rolling window, overall and per route, across all workers (Admin only)."""
+    return report(await run_in_threadpool(slow_query_log.collect, redis), top=top, per_route=per_route, route=route)
+
+
+@router.delete("/slow-queries")
+async def reset_slow_queries(
+    redis: Redis = Depends(get_sync_redis),
+    current_user: User = Depends(require_admin)
+):
+    """Start the slow-query report afresh on every worker (Admin only)."""
+    await run_in_threadpool(slow_query_log.reset_all, redis)
+    logger.info(f"Slow query log reset by {current_user.email}")
+    return {"message": "Slow query log cleared"}
@@ -0,0 +1,122 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer, selectinload
+from typing import Dict, Hashable, List, Optional
+from app.database import get_async_db, get_redis
+from app.schemas.schemas import BookFacetPage, BookSummary, StationeryFacetPage, StationerySummary
+from app.models.models import Book, Stationery
+from app.search.catalog import catalog_search, BOOK, STATIONERY, FLAG_FACETS, PRICE_BUCKETS, IndexNotReady
+from app.search.facets import bitset_ids
+from app.cache.catalog_version import sales_conditional_get
+from redis.asyncio import Redis
+
+router = APIRouter(prefix="/facets", tags=["Facets"])
+
+PRICE_LABELS = {label for label, _, _ in PRICE_BUCKETS}
+
+
+async def _facet_query(db: AsyncSession, redis: Redis, kind: str, filters: Dict[str, List[Hashable]], top: int):
+    try:
+        return await catalog_search.facet_query(db, redis, kind, filters, top)
+    except IndexNotReady:
+        # Facet counts have no SQL fallback; the index is ready shortly after startup
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Catalog index is being built, try again shortly",
+            headers={"Retry-After": "5"}
+        )
+
+
+def _filters(category_id: Optional[List[int]], price: Optional[List[str]], flags: Dict[str, bool],
+             author_id: Optional[List[int]] = None) -> Dict[str, List[Hashable]]:
+    unknown = set(price or []) - PRICE_LABELS
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown price bucket(s): {', '.join(sorted(unknown))}"
+        )
+    filters = {"category": category_id or [], "author": author_id or [], "price": price or []}
+    for flag in FLAG_FACETS:
+        if flags.get(flag):
+            filters[flag] = [True]
+    return filters
+
+
+def _book_cards(db: Session, ids: List[int]) -> List[BookSummary]:
+    books = {
+        b.book_id: b for b in db.query(Book).options(
+            selectinload(Book.authors), selectinload(Book.categories),
+            defer(Book.full_description), defer(Book.read_sample)
+        ).filter(Book.book_id.in_(ids), Book.is_active == True).all()
+    }
+    return [BookSummary.from_orm(books[i]) for i in ids if i in books]
+
+
+def _stationery_cards(db: Session, ids: List[int]) -> List[StationerySummary]:
+    stationery = {
+        s.stationery_id: s for s in db.query(Stationery).options(
+            selectinload(Stationery.categories), defer(Stationery.full_description)
+        ).filter(Stationery.stationery_id.in_(ids), Stationery.is_active == True).all()
+    }
+    return [StationerySummary.from_orm(stationery[i]) for i in ids if i in stationery]
+
+
+def _facet_json(counts: Dict[str, Dict[Hashable, int]]) -> Dict[str, Dict[str, int]]:
+    return {
+        facet: {("true" if value is True else str(value)): count for value, count in values.items()}
+        for facet, values in counts.items()
+    }
+
+
+@router.get("/books", response_model=BookFacetPage, dependencies=[Depends(sales_conditional_get)])
+async def book_facets(
+    category_id: Optional[List[int]] = Query(None),
+    author_id: Optional[List[int]] = Query(None),
+    price: Optional[List[str]] = Query(None, description="Price bucket(s) on the effective price"),
+    is_discount: bool = False,
+    is_free_ship: bool = False,
+    is_new: bool = False,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=0, le=100),
+    top: int = Query(50, ge=1, le=500, description="Most frequent values returned per facet"),
+    db: AsyncSession = Depends(get_async_db),
+    redis: Redis = Depends(get_redis)
+):
+    """Filter active books by any mix of categories, authors, price buckets and flags,
+    and count every facet value among the results in the same call.
+
+    Repeat a parameter to OR values within a facet (`category_id=1&category_id=4`);
+    different facets are ANDed. Counts for a facet ignore that facet's own filter.
+    Items are BookSummary cards, newest first.
+    """
+    filters = _filters(category_id, price, {"is_discount": is_discount, "is_free_ship": is_free_ship, "is_new": is_new},
+                       author_id)
+    matched, counts = await _facet_query(db, redis, BOOK, filters, top)
+
+    ids = bitset_ids(matched, skip, limit)
+    items = await db.run_sync(_book_cards, ids) if ids else []
+
+    return BookFacetPage(total=matched.bit_count(), facets=_facet_json(counts), items=items)
+
+
+@router.get("/stationery", response_model=StationeryFacetPage, dependencies=[Depends(sales_conditional_get)])
+async def stationery_facets(
+    category_id: Optional[List[int]] = Query(None),
+    price: Optional[List[str]] = Query(None, description="Price bucket(s) on the effective price"),
+    is_discount: bool = False,
+    is_free_ship: bool = False,
+    is_new: bool = False,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=0, le=100),
+    top: int = Query(50, ge=1, le=500, description="Most frequent values returned per facet"),
+    db: AsyncSession = Depends(get_async_db),
+    redis: Redis = Depends(get_redis)
+):
+    """Stationery counterpart of /facets/books (no author facet)."""
+    filters = _filters(category_id, price, {"is_discount": is_discount, "is_free_ship": is_free_ship, "is_new": is_new})
+    matched, counts = await _facet_query(db, redis, STATIONERY, filters, top)
+
+    ids = bitset_ids(matched, skip, limit)
+    items = await db.run_sync(_stationery_cards, ids) if ids else []
+
+    return StationeryFacetPage(total=matched.bit_count(), facets=_facet_json(counts), items=items)
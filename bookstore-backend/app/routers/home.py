@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, get_redis
+from app.schemas.schemas import HomePage
+from app.cache.redis_cache import RedisCache, CacheKeys
+from app.cache.catalog_version import sales_conditional_get
+from app.cache.write_through import page_index
+from app.services.home_service import build_home
+from app.search.catalog import BOOK
+from redis.asyncio import Redis
+
+router = APIRouter(prefix="/home", tags=["Home"])
+
+# Best sellers and new releases move with every order, so the blob is short-lived
+HOME_TTL = 300
+
+
+@router.get("/", response_model=HomePage, dependencies=[Depends(sales_conditional_get)])
+async def get_home(
+    limit: int = Query(10, ge=1, le=50, description="Books per section"),
+    db: AsyncSession = Depends(get_async_db),
+    redis: Redis = Depends(get_redis)
+):
+    """Slides, slide books, active notification, discounted books, best sellers and
+    new releases in one response, cached as a single entry.
+
+    Book sections hold BookSummary cards. Any book, slide or notification change
+    drops the cached page; it is rebuilt on the next request. Default slides are
+    created at startup, so this GET never writes.
+    """
+    cache = RedisCache(redis)
+
+    books_gen, home_gen = await cache.generations(CacheKeys.BOOKS, CacheKeys.HOME)
+    cache_key = CacheKeys.home(books_gen, home_gen, limit)
+    async def load():
+        return await build_home(db, redis, limit)
+
+    # Rebuilt by one request at a time; concurrent ones get the previous page meanwhile
+    return await cache.get_or_set(cache_key, load, HOME_TTL, index=page_index(BOOK))
@@ -1,16 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_db, get_redis
 from app.schemas.schemas import NotificationResponse, NotificationCreate, NotificationUpdate, MessageResponse
 from app.models.models import Notification
 from app.middleware.auth_middleware import require_admin
+from app.cache.redis_cache import RedisCache, CacheKeys
+from app.cache.catalog_version import bump_catalog_version, conditional_get
+from redis.asyncio import Redis
 from datetime import datetime
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
 
-@router.get("/active", response_model=Optional[NotificationResponse])
+async def _invalidate_home(redis: Redis):
+    """The homepage blob and catalog ETags cover the active notification."""
+    cache = RedisCache(redis)
+    await cache.bump_generation(CacheKeys.HOME)
+    await bump_catalog_version(redis)
+
+
+@router.get("/active", response_model=Optional[NotificationResponse], dependencies=[Depends(conditional_get)])
 async def get_active_notification(db: Session = Depends(get_db)):
     """Get the current active notification (public endpoint)."""
     notification = db.query(Notification).filter(
@@ -34,6 +44,7 @@ async def get_all_notifications(
 async def create_notification(
     notification: NotificationCreate,
     db: Session = Depends(get_db),
+    redis: Redis = Depends(get_redis),
     current_user = Depends(require_admin)
 ):
     """Create a new notification (Admin only)."""
@@ -41,6 +52,7 @@ async def create_notification(
     db.add(db_notification)
     db.commit()
     db.refresh(db_notification)
+    await _invalidate_home(redis)
     return db_notification
 
 
@@ -49,6 +61,7 @@ async def update_notification(
     notification_id: int,
     notification_update: NotificationUpdate,
     db: Session = Depends(get_db),
+    redis: Redis = Depends(get_redis),
     current_user = Depends(require_admin)
 ):
     """Update a notification (Admin only)."""
@@ -69,6 +82,7 @@ async def update_notification(
     db_notification.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(db_notification)
+    await _invalidate_home(redis)
     return db_notification
 
 
@@ -76,6 +90,7 @@ async def update_notification(
 async def delete_notification(
     notification_id: int,
     db: Session = Depends(get_db),
+    redis: Redis = Depends(get_redis),
     current_user = Depends(require_admin)
 ):
     """Delete a notification (Admin only)."""
@@ -91,6 +106,7 @@ async def delete_notification(
     
     db.delete(db_notification)
     db.commit()
+    await _invalidate_home(redis)
     return MessageResponse(message="Notification deleted successfully")
 
 
@@ -98,6 +114,7 @@ async def delete_notification(
 async def toggle_notification(
     notification_id: int,
     db: Session = Depends(get_db),
+    redis: Redis = Depends(get_redis),
     current_user = Depends(require_admin)
 ):
     """Toggle notification active status (Admin only)."""
@@ -115,4 +132,5 @@ async def toggle_notification(
     db_notification.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(db_notification)
+    await _invalidate_home(redis)
     return db_notification
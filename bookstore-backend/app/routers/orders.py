@@ -1,22 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from datetime import datetime
 import asyncio
-from app.database import get_db, get_redis
+from app.database import get_async_db, get_redis
 from app.schemas.schemas import (
     OrderResponse, OrderCreate, OrderUpdate, MessageResponse,
     WishlistResponse, WishlistCreate
 )
 from app.models.models import Order, OrderItem, Book, Stationery, User, Wishlist, Address
 from app.middleware.auth_middleware import (
-    require_customer_or_admin, require_admin, get_current_active_user, get_current_user_optional
+    require_admin, get_current_active_user, get_current_user_optional
 )
 from app.services.email_service import send_order_confirmation_email, send_new_order_admin_notification
 from app.services.ghn_service import GHNService
 from app.services.zalo_service import ZaloService
+from app.services.sales_service import adjust_sales_counters, is_cancelled_status
+from app.services.leaderboard_service import refresh_books
 from app.cache.redis_cache import RedisCache, CacheKeys
-from redis import Redis
+from app.cache.catalog_version import bump_sales_version
+from app.cache.endpoint_cache import cached_endpoint
+from redis.asyncio import Redis
 import json
 import logging
 from app.schemas.schemas import GHNStatusResponse
@@ -24,11 +30,45 @@ from app.schemas.schemas import GHNStatusResponse
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
+# Everything OrderResponse serializes; AsyncSession cannot lazy-load it later
+ORDER_OPTIONS = (
+    selectinload(Order.order_items).selectinload(OrderItem.book).selectinload(Book.authors),
+    selectinload(Order.order_items).selectinload(OrderItem.book).selectinload(Book.categories),
+    selectinload(Order.order_items).selectinload(OrderItem.stationery).selectinload(Stationery.categories),
+)
+
+
+async def _get_order(db: AsyncSession, order_id: int) -> Optional[Order]:
+    stmt = select(Order).options(*ORDER_OPTIONS).filter(Order.order_id == order_id)
+    return (await db.scalars(stmt.execution_options(populate_existing=True))).first()
+
+
+async def _set_order_status(db: AsyncSession, redis: Redis, order: Order, new_status: str) -> None:
+    """Move an order to `new_status` and commit, keeping sales counters, leaderboards and caches in step.
+
+    `order.order_items` must be loaded.
+    """
+    # Keep sales counters consistent when an order moves in or out of a cancelled status
+    was_cancelled = is_cancelled_status(order.status)
+    now_cancelled = is_cancelled_status(new_status)
+    if was_cancelled != now_cancelled:
+        await db.run_sync(adjust_sales_counters, order.order_items, -1 if now_cancelled else 1)
+    
+    order.status = new_status
+    await db.commit()
+    if was_cancelled != now_cancelled:
+        await refresh_books(db, redis, [item.book_id for item in order.order_items])
+        await bump_sales_version(redis)
+    
+    # Invalidate cache
+    cache = RedisCache(redis)
+    await cache.bump_generation(CacheKeys.user_orders_namespace(order.user_id))
+
 
 @router.post("/", response_model=OrderResponse)
 async def create_order(
     order: OrderCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
@@ -80,7 +120,7 @@ async def create_order(
         stationery_order_items = []  # Track stationery items for stock updates
         
         for item in order.items:
-            book = db.query(Book).filter(Book.book_id == item.book_id).first()
+            book = (await db.scalars(select(Book).filter(Book.book_id == item.book_id))).first()
             
             if not book:
                 raise HTTPException(
@@ -126,7 +166,7 @@ async def create_order(
                 except Exception:
                     price = 0
                 if sid and qty > 0:
-                    st = db.query(Stationery).filter(Stationery.stationery_id == sid).first()
+                    st = await db.get(Stationery, sid)
                     if not st:
                         raise HTTPException(
                             status_code=status.HTTP_404_NOT_FOUND,
@@ -155,10 +195,10 @@ async def create_order(
         if current_user:
             if order.shipping_address_id:
                 # Use existing saved address
-                shipping_address = db.query(Address).filter(
+                shipping_address = (await db.scalars(select(Address).filter(
                     Address.address_id == order.shipping_address_id,
                     Address.user_id == current_user.user_id
-                ).first()
+                ))).first()
                 
                 if not shipping_address:
                     raise HTTPException(
@@ -173,7 +213,7 @@ async def create_order(
                     **order.shipping_address.dict()
                 )
                 db.add(new_address)
-                db.flush()
+                await db.flush()
                 shipping_address = new_address
             
             elif order.shipping_address:
@@ -306,9 +346,10 @@ async def create_order(
             db_order.ghn_order_code = ghn_order_code
 
         db.add(db_order)
-        db.flush()  # Get order_id
+        await db.flush()  # Get order_id
         
         # Create order items and update stock
+        created_items = []
         for item_data in order_items:
             if item_data.get("book_id"):
                 order_item = OrderItem(
@@ -318,8 +359,9 @@ async def create_order(
                     price_at_purchase=item_data["price_at_purchase"]
                 )
                 db.add(order_item)
+                created_items.append(order_item)
                 # Update book stock
-                book = db.query(Book).filter(Book.book_id == item_data["book_id"]).first()
+                book = await db.get(Book, item_data["book_id"])
                 if book:
                     book.stock_quantity -= item_data["quantity"]
             elif item_data.get("stationery_id"):
@@ -330,15 +372,22 @@ async def create_order(
                     price_at_purchase=item_data["price_at_purchase"]
                 )
                 db.add(order_item)
+                created_items.append(order_item)
 
         # Update stationery stock
         for s_item in stationery_order_items:
-            st = db.query(Stationery).filter(Stationery.stationery_id == s_item["stationery_id"]).first()
+            st = await db.get(Stationery, s_item["stationery_id"])
             if st:
                 st.stock_quantity -= s_item["quantity"]
         
-        db.commit()
-        db.refresh(db_order)
+        # Keep denormalized sales counters in the same transaction
+        await db.run_sync(adjust_sales_counters, created_items, 1)
+        
+        await db.commit()
+        # Reload with the items the response, Zalo and the admin email read
+        db_order = await _get_order(db, db_order.order_id)
+        await refresh_books(db, redis, [item.book_id for item in created_items])
+        await bump_sales_version(redis)
 
         # After GHN order is created successfully, send Zalo ZNS notification
         try:
@@ -427,7 +476,7 @@ async def create_order(
         try:
             if current_user:
                 cache = RedisCache(redis)
-                await cache.delete_pattern(f"orders:user:{current_user.user_id}:*")
+                await cache.bump_generation(CacheKeys.user_orders_namespace(current_user.user_id))
         except Exception as e:
             logger.error(f"Failed to invalidate cache: {str(e)}")
         
@@ -436,7 +485,7 @@ async def create_order(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         import logging
         logger = logging.getLogger(__name__)
         logger.error(f"Order creation failed: {str(e)}", exc_info=True)
@@ -447,45 +496,24 @@ async def create_order(
 
 
 @router.get("/", response_model=List[OrderResponse])
+@cached_endpoint(CacheKeys.user_orders, 300, params=("skip", "limit", "status_filter"),
+                 user="current_user", tags=("orders:user:{user_id}",))
 async def get_orders(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     status_filter: Optional[str] = None,
-    db: Session = Depends(get_db),
-    redis: Redis = Depends(get_redis),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get user's orders with optional status filtering."""
-    cache = RedisCache(redis)
-    
-    # Create cache key
-    cache_key = CacheKeys.user_orders(current_user.user_id, skip, limit, status_filter)
-    
-    # Try to get from cache
-    cached_orders = await cache.get(cache_key)
-    if cached_orders:
-        return json.loads(cached_orders)
-    
     # Build query
-    query = db.query(Order).filter(Order.user_id == current_user.user_id)
+    query = select(Order).options(*ORDER_OPTIONS).filter(Order.user_id == current_user.user_id)
     
     if status_filter:
         query = query.filter(Order.status == status_filter)
     
-    orders = query.order_by(Order.order_date.desc()).offset(skip).limit(limit).all()
-    orders_response = [OrderResponse.from_orm(order) for order in orders]
-    
-    # Cache for 5 minutes - use model_dump with mode='json' to handle datetime serialization
-    try:
-        serializable_orders = [order.model_dump(mode='json') for order in orders_response]
-        await cache.set(cache_key, json.dumps(serializable_orders), 300)
-    except Exception as e:
-        # Log cache error but don't fail the request
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Failed to cache orders: {str(e)}")
-    
-    return orders_response
+    orders = (await db.scalars(query.order_by(Order.order_date.desc()).offset(skip).limit(limit))).all()
+    return [OrderResponse.from_orm(order) for order in orders]
 
 
 @router.get("/all", response_model=List[OrderResponse])
@@ -494,11 +522,11 @@ async def get_all_orders(
     limit: int = Query(10000, ge=1, le=10000),
     status_filter: Optional[str] = None,
     user_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin)
 ):
     """Get all orders (Admin only)."""
-    query = db.query(Order)
+    query = select(Order).options(*ORDER_OPTIONS)
     
     if status_filter:
         query = query.filter(Order.status == status_filter)
@@ -506,21 +534,21 @@ async def get_all_orders(
     if user_id:
         query = query.filter(Order.user_id == user_id)
     
-    orders = query.order_by(Order.order_date.desc()).offset(skip).limit(limit).all()
+    orders = (await db.scalars(query.order_by(Order.order_date.desc()).offset(skip).limit(limit))).all()
     return [OrderResponse.from_orm(order) for order in orders]
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """Get a specific order.
     - Authenticated users: must be admin or owner of the order
     - Guests (no auth): can view guest orders (orders with user_id = None)
     """
-    order = db.query(Order).filter(Order.order_id == order_id).first()
+    order = await _get_order(db, order_id)
     
     if not order:
         raise HTTPException(
@@ -549,11 +577,11 @@ async def get_order(
 @router.get("/{order_id}/shipping-status", response_model=GHNStatusResponse)
 async def get_order_shipping_status(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin)
 ):
     """Get GHN shipping status for an order (Admin only)."""
-    order = db.query(Order).filter(Order.order_id == order_id).first()
+    order = await db.get(Order, order_id)
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
     if not order.ghn_order_code:
@@ -572,14 +600,14 @@ async def get_order_shipping_status(
 @router.get("/{order_id}/my-shipping-status", response_model=GHNStatusResponse)
 async def get_my_order_shipping_status(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get GHN shipping status for user's own order."""
-    order = db.query(Order).filter(
+    order = (await db.scalars(select(Order).filter(
         Order.order_id == order_id,
         Order.user_id == current_user.user_id  # Only allow user's own orders
-    ).first()
+    ))).first()
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
     if not order.ghn_order_code:
@@ -599,12 +627,12 @@ async def get_my_order_shipping_status(
 async def update_order_status(
     order_id: int,
     order_update: OrderUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     """Update order status (Admin only)."""
-    order = db.query(Order).filter(Order.order_id == order_id).first()
+    order = await _get_order(db, order_id)
     
     if not order:
         raise HTTPException(
@@ -612,21 +640,15 @@ async def update_order_status(
             detail="Order not found"
         )
     
-    # Update status
-    order.status = order_update.status
-    db.commit()
-    db.refresh(order)
-    
-    # Invalidate cache
-    cache = RedisCache(redis)
-    await cache.delete_pattern(f"orders:user:{order.user_id}:*")
+    await _set_order_status(db, redis, order, order_update.status)
     
     return OrderResponse.from_orm(order)
 
 
 @router.post("/sync-ghn-status", response_model=MessageResponse)
 async def sync_ghn_status(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     """
@@ -642,11 +664,11 @@ async def sync_ghn_status(
         )
     
     # Get all orders with GHN codes that are not completed/cancelled
-    orders_to_sync = db.query(Order).filter(
+    orders_to_sync = (await db.scalars(select(Order).filter(
         Order.ghn_order_code.isnot(None),
         Order.ghn_order_code != "",
-        ~Order.status.in_(['delivered', 'cancelled', 'returned', 'Delivered', 'Cancelled', 'Returned'])
-    ).all()
+        ~Order.status.in_(['delivered', 'cancelled', 'cancel', 'returned', 'Delivered', 'Cancelled', 'Returned'])
+    ))).all()
     
     if not orders_to_sync:
         return MessageResponse(message="Không có đơn hàng cần đồng bộ")
@@ -669,18 +691,21 @@ async def sync_ghn_status(
     # Fetch all statuses in parallel
     results = await asyncio.gather(*[fetch_and_update(o) for o in orders_to_sync])
     
-    # Update database with new statuses
+    # Apply each change like an admin status update, so GHN cancellations and returns leave the sales counters
     updated_count = 0
     for result in results:
         if result:
             order_id, new_status = result
-            order = db.query(Order).filter(Order.order_id == order_id).first()
-            if order:
-                order.status = new_status
-                updated_count += 1
-    
-    if updated_count > 0:
-        db.commit()
+            try:
+                # Fresh row and items: the status may have moved since the batch was read
+                stmt = select(Order).options(selectinload(Order.order_items)).filter(Order.order_id == order_id)
+                order = (await db.scalars(stmt.execution_options(populate_existing=True))).first()
+                if order and order.status != new_status:
+                    await _set_order_status(db, redis, order, new_status)
+                    updated_count += 1
+            except Exception as e:
+                await db.rollback()
+                logger.warning(f"Failed to apply GHN status {new_status} to order {order_id}: {e}")
     
     return MessageResponse(message=f"Đã đồng bộ {updated_count}/{len(orders_to_sync)} đơn hàng từ GHN")
 
@@ -688,12 +713,12 @@ async def sync_ghn_status(
 @router.delete("/{order_id}", response_model=MessageResponse)
 async def cancel_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(get_current_active_user)
 ):
     """Cancel an order (only if pending)."""
-    order = db.query(Order).filter(Order.order_id == order_id).first()
+    order = await _get_order(db, order_id)
     
     if not order:
         raise HTTPException(
@@ -718,26 +743,31 @@ async def cancel_order(
         # Restore stock quantities
         for item in order.order_items:
             if item.book_id:
-                book = db.query(Book).filter(Book.book_id == item.book_id).first()
+                book = await db.get(Book, item.book_id)
                 if book:
                     book.stock_quantity += item.quantity
             elif item.stationery_id:
-                st = db.query(Stationery).filter(Stationery.stationery_id == item.stationery_id).first()
+                st = await db.get(Stationery, item.stationery_id)
                 if st:
                     st.stock_quantity += item.quantity
         
+        # Remove the cancelled quantities from the sales counters
+        await db.run_sync(adjust_sales_counters, order.order_items, -1)
+        
         # Update order status
         order.status = "cancelled"
-        db.commit()
+        await db.commit()
+        await refresh_books(db, redis, [item.book_id for item in order.order_items])
+        await bump_sales_version(redis)
         
         # Invalidate cache
         cache = RedisCache(redis)
-        await cache.delete_pattern(f"orders:user:{order.user_id}:*")
+        await cache.bump_generation(CacheKeys.user_orders_namespace(order.user_id))
         
         return MessageResponse(message="Order cancelled successfully")
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to cancel order"
@@ -749,45 +779,35 @@ wishlist_router = APIRouter(prefix="/wishlist", tags=["Wishlist"])
 
 
 @wishlist_router.get("/", response_model=List[WishlistResponse])
+@cached_endpoint(CacheKeys.user_wishlist, 600, user="current_user")
 async def get_wishlist(
-    db: Session = Depends(get_db),
-    redis: Redis = Depends(get_redis),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get user's wishlist."""
-    cache = RedisCache(redis)
-    
-    # Try to get from cache
-    cache_key = CacheKeys.user_wishlist(current_user.user_id)
-    cached_wishlist = await cache.get(cache_key)
-    if cached_wishlist:
-        return json.loads(cached_wishlist)
-    
-    wishlist_items = db.query(Wishlist).filter(
+    wishlist_items = (await db.scalars(select(Wishlist).options(
+        selectinload(Wishlist.book).selectinload(Book.authors),
+        selectinload(Wishlist.book).selectinload(Book.categories),
+    ).filter(
         Wishlist.user_id == current_user.user_id
-    ).all()
-    
-    wishlist_response = [WishlistResponse.from_orm(item) for item in wishlist_items]
-    
-    # Cache for 10 minutes
-    await cache.set(cache_key, json.dumps([item.dict() for item in wishlist_response]), 600)
+    ))).all()
     
-    return wishlist_response
+    return [WishlistResponse.from_orm(item) for item in wishlist_items]
 
 
 @wishlist_router.post("/", response_model=MessageResponse)
 async def add_to_wishlist(
     wishlist_item: WishlistCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(get_current_active_user)
 ):
     """Add book to wishlist."""
     # Check if book exists
-    book = db.query(Book).filter(
+    book = await db.scalar(select(Book.book_id).filter(
         Book.book_id == wishlist_item.book_id,
         Book.is_active == True
-    ).first()
+    ))
     
     if not book:
         raise HTTPException(
@@ -796,10 +816,10 @@ async def add_to_wishlist(
         )
     
     # Check if already in wishlist
-    existing = db.query(Wishlist).filter(
+    existing = (await db.scalars(select(Wishlist).filter(
         Wishlist.user_id == current_user.user_id,
         Wishlist.book_id == wishlist_item.book_id
-    ).first()
+    ))).first()
     
     if existing:
         raise HTTPException(
@@ -813,7 +833,7 @@ async def add_to_wishlist(
         book_id=wishlist_item.book_id
     )
     db.add(wishlist_entry)
-    db.commit()
+    await db.commit()
     
     # Invalidate cache
     cache = RedisCache(redis)
@@ -825,15 +845,15 @@ async def add_to_wishlist(
 @wishlist_router.delete("/{book_id}", response_model=MessageResponse)
 async def remove_from_wishlist(
     book_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(get_current_active_user)
 ):
     """Remove book from wishlist."""
-    wishlist_item = db.query(Wishlist).filter(
+    wishlist_item = (await db.scalars(select(Wishlist).filter(
         Wishlist.user_id == current_user.user_id,
         Wishlist.book_id == book_id
-    ).first()
+    ))).first()
     
     if not wishlist_item:
         raise HTTPException(
@@ -841,8 +861,8 @@ async def remove_from_wishlist(
             detail="Book not in wishlist"
         )
     
-    db.delete(wishlist_item)
-    db.commit()
+    await db.delete(wishlist_item)
+    await db.commit()
     
     # Invalidate cache
     cache = RedisCache(redis)
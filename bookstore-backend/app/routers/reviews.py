@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List
-from app.database import get_db
-from app.models.models import Book, User, Review
+from app.database import get_async_db
+from app.models.models import Book, User, Review, Order, OrderItem
 from app.schemas.schemas import (
     ReviewResponse, ReviewCreate, ReviewUpdate, MessageResponse
 )
@@ -15,23 +17,30 @@ router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
 books_router = APIRouter(prefix="/books", tags=["Book Reviews"])
 
+
+async def _get_review(db: AsyncSession, review_id: int):
+    return (await db.scalars(
+        select(Review).options(selectinload(Review.user)).filter(Review.review_id == review_id)
+    )).first()
+
+
 @router.get("/", response_model=List[ReviewResponse])
 async def list_reviews(
     limit: int = 50,
     offset: int = 0,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List reviews across all books, ordered by newest.
 
     Supports simple pagination via `limit` and `offset`.
     """
-    reviews = (
-        db.query(Review)
+    reviews = (await db.scalars(
+        select(Review)
+        .options(selectinload(Review.user), selectinload(Review.book))
         .order_by(Review.created_at.desc())
         .offset(offset)
         .limit(limit)
-        .all()
-    )
+    )).all()
 
     responses: List[ReviewResponse] = []
     for r in reviews:
@@ -58,14 +67,19 @@ async def list_reviews(
 @books_router.get("/{book_id}/reviews", response_model=List[ReviewResponse])
 async def get_book_reviews(
     book_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all reviews for a specific book."""
-    book = db.query(Book).filter(Book.book_id == book_id).first()
+    book = await db.scalar(select(Book.book_id).filter(Book.book_id == book_id))
     if not book:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
 
-    reviews = db.query(Review).filter(Review.book_id == book_id).order_by(Review.created_at.desc()).all()
+    reviews = (await db.scalars(
+        select(Review)
+        .options(selectinload(Review.user))
+        .filter(Review.book_id == book_id)
+        .order_by(Review.created_at.desc())
+    )).all()
     responses: List[ReviewResponse] = []
     for r in reviews:
         user_name = None
@@ -90,20 +104,19 @@ async def get_book_reviews(
 async def create_book_review(
     book_id: int,
     review_data: ReviewCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Create or replace the current user's review for a book."""
-    book = db.query(Book).filter(Book.book_id == book_id).first()
+    book = await db.scalar(select(Book.book_id).filter(Book.book_id == book_id))
     if not book:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
 
     # Enforce verified purchase: only users who ordered this book can review
-    from app.models.models import Order, OrderItem
-    purchased = db.query(OrderItem).join(Order).filter(
+    purchased = await db.scalar(select(OrderItem.order_item_id).join(Order).filter(
         Order.user_id == current_user.user_id,
         OrderItem.book_id == book_id
-    ).first()
+    ).limit(1))
     if not purchased:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -111,16 +124,16 @@ async def create_book_review(
         )
 
     # Check if user already reviewed this book; if so, update it
-    existing = db.query(Review).filter(
+    existing = (await db.scalars(select(Review).filter(
         Review.book_id == book_id,
         Review.user_id == current_user.user_id
-    ).first()
+    ))).first()
 
     if existing:
         existing.rating = review_data.rating
         existing.comment = review_data.comment
-        db.commit()
-        db.refresh(existing)
+        await db.commit()
+        await db.refresh(existing)
         user_name = f"{current_user.first_name} {current_user.last_name}".strip()
         return ReviewResponse(
             review_id=existing.review_id,
@@ -140,8 +153,8 @@ async def create_book_review(
         comment=review_data.comment,
     )
     db.add(new_review)
-    db.commit()
-    db.refresh(new_review)
+    await db.commit()
+    await db.refresh(new_review)
 
     user_name = f"{current_user.first_name} {current_user.last_name}".strip()
     return ReviewResponse(
@@ -160,11 +173,11 @@ async def create_book_review(
 async def update_review(
     review_id: int,
     review_update: ReviewUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_customer_or_admin)
 ):
     """Update a review. Only owner or admin can update."""
-    review = db.query(Review).filter(Review.review_id == review_id).first()
+    review = await _get_review(db, review_id)
     if not review:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
 
@@ -178,8 +191,7 @@ async def update_review(
     if 'comment' in data:
         review.comment = data['comment']
 
-    db.commit()
-    db.refresh(review)
+    await db.commit()
 
     user_name = None
     if review.user:
@@ -199,19 +211,19 @@ async def update_review(
 @router.delete("/{review_id}", response_model=MessageResponse)
 async def delete_review(
     review_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_customer_or_admin)
 ):
     """Delete a review. Only owner or admin can delete."""
-    review = db.query(Review).filter(Review.review_id == review_id).first()
+    review = await db.get(Review, review_id)
     if not review:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
 
     if current_user.role.role_name != "Admin" and review.user_id != current_user.user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
 
-    db.delete(review)
-    db.commit()
+    await db.delete(review)
+    await db.commit()
     return MessageResponse(message="Review deleted successfully")
 
 
@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from app.database import get_async_db, get_redis
+from app.schemas.schemas import SearchResult
+from app.models.models import Book, Stationery
+from app.search.catalog import catalog_search, BOOK, STATIONERY, IndexNotReady
+from app.cache.catalog_version import conditional_get
+from redis.asyncio import Redis
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+
+def _title_matches(db: Session, q: str, kind: Optional[str], limit: int) -> List[Tuple[str, int, float]]:
+    """Unranked title substring matches, used while the search index is still being built."""
+    hits = []
+    term = f"%{q}%"
+    if kind in (None, BOOK):
+        hits += [(BOOK, book_id, 0.0) for (book_id,) in db.query(Book.book_id).filter(
+            Book.is_active == True, Book.title.ilike(term)
+        ).order_by(Book.book_id.desc()).limit(limit)]
+    if kind in (None, STATIONERY):
+        hits += [(STATIONERY, item_id, 0.0) for (item_id,) in db.query(Stationery.stationery_id).filter(
+            Stationery.is_active == True, Stationery.title.ilike(term)
+        ).order_by(Stationery.stationery_id.desc()).limit(limit)]
+    return hits[:limit]
+
+
+def _results(db: Session, hits: List[Tuple[str, int, float]]) -> List[SearchResult]:
+    book_ids = [item_id for kind, item_id, _ in hits if kind == BOOK]
+    stationery_ids = [item_id for kind, item_id, _ in hits if kind == STATIONERY]
+    books = {}
+    if book_ids:
+        books = {b.book_id: b for b in db.query(Book).filter(Book.book_id.in_(book_ids), Book.is_active == True).all()}
+    stationery = {}
+    if stationery_ids:
+        stationery = {
+            s.stationery_id: s for s in db.query(Stationery).filter(
+                Stationery.stationery_id.in_(stationery_ids), Stationery.is_active == True
+            ).all()
+        }
+
+    results = []
+    for kind, item_id, score in hits:
+        item = books.get(item_id) if kind == BOOK else stationery.get(item_id)
+        if not item:
+            continue
+        results.append(SearchResult(
+            item_type=kind,
+            item_id=item_id,
+            title=item.title,
+            slug=item.slug,
+            image_url=item.image_url,
+            price=item.price,
+            discounted_price=item.discounted_price,
+            score=round(score, 4)
+        ))
+    return results
+
+
+@router.get("/", response_model=List[SearchResult], dependencies=[Depends(conditional_get)])
+async def search_catalog(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[str] = Query(None, pattern="^(book|stationery)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+    redis: Redis = Depends(get_redis)
+):
+    """Relevance-ranked, accent-insensitive search over books and stationery."""
+    try:
+        hits = (await catalog_search.search(db, redis, q, kind=type, limit=skip + limit))[skip:]
+    except IndexNotReady:
+        hits = (await db.run_sync(_title_matches, q, type, skip + limit))[skip:]
+    return await db.run_sync(_results, hits)
@@ -1,19 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
-from app.database import get_db
+from app.database import get_db, get_redis
 from app.models.models import SlideContent, User
 from app.schemas.schemas import SlideContentResponse, SlideContentUpdate
 from app.middleware.auth_middleware import require_admin
+from app.cache.redis_cache import RedisCache, CacheKeys
+from app.cache.catalog_version import bump_catalog_version, conditional_get
+from redis.asyncio import Redis
 
 router = APIRouter(prefix="/slides", tags=["Slides"])
 
 
-def ensure_default_slides(db: Session):
-    """Ensure slide contents exist for slide_number 1..3."""
-    existing = {
+def _existing_slides(db: Session):
+    return {
         sc.slide_number: sc for sc in db.query(SlideContent).filter(SlideContent.slide_number.in_([1, 2, 3])).all()
     }
+
+
+def ensure_default_slides(db: Session):
+    """Ensure slide contents exist for slide_number 1..3."""
+    existing = _existing_slides(db)
+    if len(existing) < 3:
+        # That read may have come from a replica; check the primary before inserting
+        db.use_primary()
+        existing = _existing_slides(db)
     created_any = False
     for n in [1, 2, 3]:
         if n not in existing:
@@ -24,7 +35,7 @@ def ensure_default_slides(db: Session):
         db.commit()
 
 
-@router.get("/contents", response_model=List[SlideContentResponse])
+@router.get("/contents", response_model=List[SlideContentResponse], dependencies=[Depends(conditional_get)])
 async def get_all_slide_contents(db: Session = Depends(get_db)):
     """Return slide contents for slides 1..3, creating defaults if missing."""
     ensure_default_slides(db)
@@ -32,7 +43,7 @@ async def get_all_slide_contents(db: Session = Depends(get_db)):
     return slides
 
 
-@router.get("/contents/{slide_number}", response_model=SlideContentResponse)
+@router.get("/contents/{slide_number}", response_model=SlideContentResponse, dependencies=[Depends(conditional_get)])
 async def get_slide_content(slide_number: int, db: Session = Depends(get_db)):
     if slide_number not in [1, 2, 3]:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Slide number must be 1, 2, or 3")
@@ -48,6 +59,7 @@ async def update_slide_content(
     slide_number: int,
     update: SlideContentUpdate,
     db: Session = Depends(get_db),
+    redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     if slide_number not in [1, 2, 3]:
@@ -62,4 +74,9 @@ async def update_slide_content(
         setattr(sc, field, value)
     db.commit()
     db.refresh(sc)
+
+    # The homepage blob embeds slide contents
+    cache = RedisCache(redis)
+    await cache.bump_generation(CacheKeys.HOME)
+    await bump_catalog_version(redis)
     return sc
\ No newline at end of file
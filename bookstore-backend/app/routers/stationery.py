@@ -1,133 +1,267 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Request, Response
+from fastapi.responses import RedirectResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, selectinload
 from typing import List, Optional
-from app.database import get_db, get_redis
+from app.database import get_async_db, get_redis
 from app.schemas.schemas import (
-    StationeryResponse, StationeryCreate, StationeryUpdate, MessageResponse, CategoryResponse,
+    StationeryResponse, StationerySummary, StationeryCreate, StationeryUpdate, MessageResponse, CategoryResponse,
     StationeryReviewResponse, StationeryReviewCreate
 )
-from app.models.models import Stationery, Category, User, StationeryReview, OrderItem
+from app.models.models import Stationery, Category, User, StationeryReview
 from app.middleware.auth_middleware import (
     require_admin, get_current_user_optional, get_current_active_user
 )
-from app.cache.redis_cache import RedisCache, CacheKeys
+from app.cache.redis_cache import MISS_TTL, RedisCache, CacheKeys
+from app.cache.endpoint_cache import cached_endpoint
+from app.cache.catalog_version import bump_catalog_version, conditional_get, sales_conditional_get
+from app.cache.write_through import STATIONERY_LIST_FIELDS, list_snapshot, page_index, write_through
 from app.services.image_service import ImageService
-from redis import Redis
-import unicodedata
+from app.services.slug_service import resolve_slug, slugify, sync_aliases
+from app.utils.pagination import apply_keyset, decode_cursor, next_cursor_for, parse_id_list
+from app.search.catalog import catalog_search, STATIONERY
+from redis.asyncio import Redis
 
 router = APIRouter(prefix="/stationery", tags=["Stationery"])
 
+# Upper bound on ids per /stationery/batch request
+MAX_BATCH_IDS = 100
 
-@router.get("/", response_model=List[StationeryResponse])
+# LONGTEXT columns that list cards never show; not loaded for summary views
+SUMMARY_DEFERRED_COLUMNS = (Stationery.full_description,)
+
+# OpenAPI shape of the list endpoint (view=full returns StationeryResponse items instead)
+LIST_RESPONSES = {
+    200: {"model": List[StationerySummary], "description": "StationerySummary items, or StationeryResponse items with view=full"}
+}
+
+
+def _list_options(view: str) -> list:
+    """Loader options for a page of stationery: batch-load categories, skip heavy columns unless view=full."""
+    options = [selectinload(Stationery.categories)]
+    if view != "full":
+        options += [defer(column) for column in SUMMARY_DEFERRED_COLUMNS]
+    return options
+
+
+async def _get_stationery(db: AsyncSession, stationery_id: int, active_only: bool = False) -> Optional[Stationery]:
+    """One item with its categories loaded; AsyncSession cannot lazy-load them later."""
+    stmt = select(Stationery).options(*_list_options("full")).filter(Stationery.stationery_id == stationery_id)
+    if active_only:
+        stmt = stmt.filter(Stationery.is_active == True)
+    return (await db.scalars(stmt.execution_options(populate_existing=True))).first()
+
+
+def _serialize_list(items: List[Stationery], view: str) -> List[dict]:
+    """JSON-ready list items in the requested shape."""
+    if view != "full":
+        return [StationerySummary.from_orm(item).model_dump(mode="json") for item in items]
+    resp = []
+    for item in items:
+        r = StationeryResponse.from_orm(item)
+        # Map model fields to response schema physical fields
+        r.height_cm = getattr(item, "height", None)
+        r.width_cm = getattr(item, "width", None)
+        r.length_cm = getattr(item, "length", None)
+        r.weight_grams = getattr(item, "weight", None)
+        resp.append(r.model_dump(mode="json"))
+    return resp
+
+
+async def _write_through(cache: RedisCache, item: Stationery) -> None:
+    """Rewrite the cached detail and every cached page listing `item` in place."""
+    full = _serialize_list([item], "full")[0]
+    await cache.set(CacheKeys.stationery_detail(item.stationery_id), full, 600)
+    await write_through(cache, STATIONERY, item.stationery_id, [full, *_serialize_list([item], "summary")])
+
+
+@router.get("/", response_model=None, responses=LIST_RESPONSES, dependencies=[Depends(sales_conditional_get)])
 async def get_stationery(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page"),
     category_id: Optional[int] = None,
     search: Optional[str] = None,
     is_best_seller: Optional[bool] = None,
     is_new: Optional[bool] = None,
     is_discount: Optional[bool] = None,
     slide_number: Optional[int] = Query(None, ge=1, le=3),
-    db: Session = Depends(get_db),
+    view: str = Query("summary", pattern="^(summary|full)$", description="'full' returns complete StationeryResponse items"),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
-    """List stationery items with optional filtering and caching."""
-    cache = RedisCache(redis)
-    cache_key = f"stationery:list:{skip}:{limit}:{category_id}:{search}:{is_best_seller}:{is_new}:{is_discount}:{slide_number}"
-    cached = await cache.get(cache_key)
-    if cached:
-        return cached
-
-    query = db.query(Stationery).filter(Stationery.is_active == True)
+    """List stationery items with optional filtering and caching.
 
-    if category_id:
-        query = query.join(Stationery.categories).filter(Category.category_id == category_id)
-
-    if search:
-        term = f"%{search}%"
-        query = query.filter(
-            Stationery.title.ilike(term) |
-            Stationery.brief_description.ilike(term) |
-            Stationery.full_description.ilike(term)
+    With `cursor`, pages are ordered by (created_at, stationery_id) and the next
+    page cursor is returned in the X-Next-Cursor header; otherwise skip/limit applies.
+    Items are StationerySummary cards unless `view=full` is requested.
+    """
+    cache = RedisCache(redis)
+    gen = await cache.generation(CacheKeys.STATIONERY)
+    if cursor is not None:
+        cache_key = CacheKeys.stationery_cursor(
+            gen, cursor, limit, category_id, search, is_best_seller, is_new, is_discount, slide_number, view
         )
-
-    if is_best_seller is not None:
-        query = query.filter(Stationery.is_best_seller == is_best_seller)
-    if is_new is not None:
-        query = query.filter(Stationery.is_new == is_new)
-    if is_discount is not None:
-        query = query.filter(Stationery.is_discount == is_discount)
-    if slide_number is not None:
-        slide_field = getattr(Stationery, f"is_slide{slide_number}")
-        query = query.filter(slide_field == True)
-
-    items = query.offset(skip).limit(limit).all()
+    else:
+        cache_key = CacheKeys.stationery_list(
+            gen, skip, limit, category_id, search, is_best_seller, is_new, is_discount, slide_number, view
+        )
+    async def load():
+        position = None
+        if cursor:
+            try:
+                position = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+        query = select(Stationery).filter(Stationery.is_active == True)
+
+        if category_id:
+            query = query.join(Stationery.categories).filter(Category.category_id == category_id)
+
+        # Full-text search goes through the accent-insensitive index; ILIKE is only a fallback
+        ranked_ids = None
+        if search:
+            ranked_ids = await catalog_search.search_ids(db, redis, search, STATIONERY)
+            if ranked_ids is not None:
+                query = query.filter(Stationery.stationery_id.in_(ranked_ids))
+            else:
+                term = f"%{search}%"
+                query = query.filter(
+                    Stationery.title.ilike(term) |
+                    Stationery.brief_description.ilike(term) |
+                    Stationery.full_description.ilike(term)
+                )
+
+        if is_best_seller is not None:
+            query = query.filter(Stationery.is_best_seller == is_best_seller)
+        if is_new is not None:
+            query = query.filter(Stationery.is_new == is_new)
+        if is_discount is not None:
+            query = query.filter(Stationery.is_discount == is_discount)
+        if slide_number is not None:
+            slide_field = getattr(Stationery, f"is_slide{slide_number}")
+            query = query.filter(slide_field == True)
+
+        next_cursor = None
+        if cursor is not None:
+            query = apply_keyset(query, Stationery.created_at, Stationery.stationery_id, position, limit)
+            items = (await db.scalars(query.options(*_list_options(view)))).all()
+            items, next_cursor = next_cursor_for(items, limit, "created_at", "stationery_id")
+        elif ranked_ids is not None:
+            # Relevance order: the other filters run on ids only, then just the page is loaded
+            matching = set((await db.scalars(query.with_only_columns(Stationery.stationery_id))).all())
+            wanted = [item_id for item_id in ranked_ids if item_id in matching][skip:skip + limit]
+            items = []
+            if wanted:
+                loaded = {item.stationery_id: item for item in await db.scalars(
+                    select(Stationery).options(*_list_options(view)).filter(Stationery.stationery_id.in_(wanted))
+                )}
+                items = [loaded[item_id] for item_id in wanted if item_id in loaded]
+        else:
+            items = (await db.scalars(query.options(*_list_options(view)).offset(skip).limit(limit))).all()
     
-    # Map model fields to response schema physical fields and add sales data
-    resp = []
-    for i in items:
-        # Calculate total sold from order_items
-        total_sold = db.query(func.sum(OrderItem.quantity))\
-            .filter(OrderItem.stationery_id == i.stationery_id)\
-            .scalar() or 0
-        
-        r = StationeryResponse.from_orm(i)
-        r.height_cm = getattr(i, "height", None)
-        r.width_cm = getattr(i, "width", None)
-        r.length_cm = getattr(i, "length", None)
-        r.weight_grams = getattr(i, "weight", None)
-        r.total_sold = int(total_sold)
-        resp.append(r)
-    await cache.set(cache_key, [r.dict() for r in resp], 300)
-    return resp
+        # total_sold is a counter column, no per-row queries
+        resp = _serialize_list(items, view)
+        if cursor is not None:
+            return {"items": resp, "next_cursor": next_cursor}
+        return resp
 
+    # Cached for 5 minutes; one request rebuilds an expired page while the others get the stale copy
+    page = await cache.get_or_set(cache_key, load, 300, index=page_index(STATIONERY))
+    if cursor is not None:
+        if page["next_cursor"]:
+            response.headers["X-Next-Cursor"] = page["next_cursor"]
+        return page["items"]
+    return page
 
-@router.get("/categories/", response_model=List[CategoryResponse])
-async def get_stationery_categories(
-    db: Session = Depends(get_db),
-    redis: Redis = Depends(get_redis)
-):
-    cache = RedisCache(redis)
-    cache_key = "stationery:categories"
-    cached = await cache.get(cache_key)
-    if cached:
-        return cached
 
-    categories = (
-        db.query(Category)
+@router.get("/categories/", response_model=List[CategoryResponse], dependencies=[Depends(conditional_get)])
+@cached_endpoint(CacheKeys.stationery_categories, 1800, tags=(CacheKeys.STATIONERY,))
+async def get_stationery_categories(db: AsyncSession = Depends(get_async_db)):
+    categories = (await db.scalars(
+        select(Category)
         .join(Category.stationery)
         .filter(Stationery.is_active == True)
         .distinct()
-        .all()
-    )
+    )).all()
+    return [CategoryResponse.from_orm(cat) for cat in categories]
 
-    resp = [CategoryResponse.from_orm(cat) for cat in categories]
-    await cache.set(cache_key, [c.dict() for c in resp], 1800)
-    return resp
+
+@router.get("/batch", response_model=List[StationeryResponse], dependencies=[Depends(sales_conditional_get)])
+async def get_stationery_batch(
+    ids: str = Query(..., description="Comma-separated stationery ids, e.g. 3,17,42"),
+    db: AsyncSession = Depends(get_async_db),
+    redis: Redis = Depends(get_redis)
+):
+    """Get several stationery items by id in one request, in the order requested.
+
+    Cached items come from one MGET, the misses from one IN query, and the
+    misses are written back in one pipeline. Unknown or inactive ids are skipped.
+    """
+    try:
+        stationery_ids = parse_id_list(ids, MAX_BATCH_IDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    cache = RedisCache(redis)
+    cached = await cache.get_many([CacheKeys.stationery_detail(stationery_id) for stationery_id in stationery_ids])
+    found = {
+        stationery_id: StationeryResponse.parse_obj(value)
+        for stationery_id, value in zip(stationery_ids, cached) if value
+    }
+
+    missing = [stationery_id for stationery_id in stationery_ids if stationery_id not in found]
+    if missing:
+        items = (await db.scalars(select(Stationery).options(*_list_options("full")).filter(
+            Stationery.stationery_id.in_(missing),
+            Stationery.is_active == True
+        ))).all()
+        fetched = {}
+        for item in items:
+            resp = StationeryResponse.from_orm(item)
+            # Map model fields to response schema physical fields
+            resp.height_cm = getattr(item, "height", None)
+            resp.width_cm = getattr(item, "width", None)
+            resp.length_cm = getattr(item, "length", None)
+            resp.weight_grams = getattr(item, "weight", None)
+            fetched[item.stationery_id] = resp
+        # Same value format and TTL as get_stationery_item
+        await cache.set_many(
+            {CacheKeys.stationery_detail(stationery_id): resp.dict() for stationery_id, resp in fetched.items()},
+            600
+        )
+        found.update(fetched)
+
+    return [found[stationery_id] for stationery_id in stationery_ids if stationery_id in found]
 
 
-@router.get("/{stationery_id}", response_model=StationeryResponse)
+@router.get("/{stationery_id}", response_model=StationeryResponse, dependencies=[Depends(sales_conditional_get)])
 async def get_stationery_item(
     stationery_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """Get a single stationery item by id with caching."""
     cache = RedisCache(redis)
-    cache_key = f"stationery:detail:{stationery_id}"
+    cache_key = CacheKeys.stationery_detail(stationery_id)
     cached = await cache.get(cache_key)
     if cached:
         return StationeryResponse.parse_obj(cached)
 
-    item = db.query(Stationery).filter(
-        Stationery.stationery_id == stationery_id,
-        Stationery.is_active == True
-    ).first()
+    # Ids known not to exist (crawlers, stale links) skip MySQL
+    missing_key = CacheKeys.stationery_missing(stationery_id)
+    if await cache.get(missing_key):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stationery not found")
+
+    item = await _get_stationery(db, stationery_id, active_only=True)
 
     if not item:
+        await cache.set(missing_key, 1, MISS_TTL)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stationery not found")
 
     resp = StationeryResponse.from_orm(item)
@@ -140,57 +274,64 @@ async def get_stationery_item(
     return resp
 
 
-@router.get("/slug/{slug}", response_model=StationeryResponse)
+@router.get("/slug/{slug}", response_model=StationeryResponse, dependencies=[Depends(sales_conditional_get)])
 async def get_stationery_by_slug(
     slug: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     cache = RedisCache(redis)
-    cache_key = f"stationery:detail:slug:{slug}"
+    cache_key = CacheKeys.stationery_slug(await cache.generation(CacheKeys.STATIONERY), slug)
     cached = await cache.get(cache_key)
     if cached:
         return StationeryResponse.parse_obj(cached)
 
-    item = db.query(Stationery).filter(Stationery.slug == slug, Stationery.is_active == True).first()
-    if not item:
-        candidates = db.query(Stationery).filter(Stationery.is_active == True).all()
-        for s in candidates:
-            if _slugify(s.title) == slug:
-                item = s
-                if not s.slug:
-                    s.slug = slug
-                    db.commit()
-                break
+    # Slugs known not to resolve (crawlers, stale links) skip MySQL
+    missing_key = CacheKeys.slug_missing(STATIONERY, slug)
+    if await cache.get(missing_key):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stationery not found")
+
+    # Indexed lookups only: current slug, then slug aliases
+    item, is_alias = await db.run_sync(resolve_slug, STATIONERY, slug)
+    if item and is_alias:
+        return RedirectResponse(
+            url=str(request.url_for("get_stationery_by_slug", slug=item.slug)),
+            status_code=status.HTTP_301_MOVED_PERMANENTLY
+        )
     if not item:
+        await cache.set(missing_key, 1, MISS_TTL)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stationery not found")
 
+    # resolve_slug loads the row only; the response needs the categories too
+    await db.refresh(item, ["categories"])
     resp = StationeryResponse.from_orm(item)
     resp.height_cm = getattr(item, "height", None)
     resp.width_cm = getattr(item, "width", None)
     resp.length_cm = getattr(item, "length", None)
     resp.weight_grams = getattr(item, "weight", None)
-    await cache.set(cache_key, resp.dict(), 600)
+    if await cache.set(cache_key, resp.dict(), 600):
+        await cache.add_to_indexes(page_index(STATIONERY)(resp.dict()), cache_key)
     return resp
 
 
 @router.get("/{stationery_id}/reviews", response_model=List[StationeryReviewResponse])
 async def get_stationery_reviews(
     stationery_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all reviews for a specific stationery item."""
-    item = db.query(Stationery).filter(Stationery.stationery_id == stationery_id).first()
+    item = await db.get(Stationery, stationery_id)
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stationery not found")
 
-    reviews = (
-        db.query(StationeryReview)
+    reviews = (await db.scalars(
+        select(StationeryReview)
+        .options(selectinload(StationeryReview.user))
         .filter(StationeryReview.stationery_id == stationery_id)
         .order_by(StationeryReview.created_at.desc())
-        .all()
-    )
+    )).all()
     responses: List[StationeryReviewResponse] = []
     for r in reviews:
         user_name = None
@@ -216,25 +357,25 @@ async def get_stationery_reviews(
 async def create_stationery_review(
     stationery_id: int,
     review_data: StationeryReviewCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Create or update the current user's review for a stationery item."""
-    item = db.query(Stationery).filter(Stationery.stationery_id == stationery_id).first()
+    item = await db.get(Stationery, stationery_id)
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stationery not found")
 
     # NOTE: We currently do not enforce purchase verification for stationery
-    existing = db.query(StationeryReview).filter(
+    existing = (await db.scalars(select(StationeryReview).filter(
         StationeryReview.stationery_id == stationery_id,
         StationeryReview.user_id == current_user.user_id
-    ).first()
+    ))).first()
 
     if existing:
         existing.rating = review_data.rating
         existing.comment = review_data.comment
-        db.commit()
-        db.refresh(existing)
+        await db.commit()
+        await db.refresh(existing)
         user_name = f"{current_user.first_name} {current_user.last_name}".strip()
         return StationeryReviewResponse(
             review_id=existing.review_id,
@@ -255,8 +396,8 @@ async def create_stationery_review(
         comment=review_data.comment,
     )
     db.add(new_review)
-    db.commit()
-    db.refresh(new_review)
+    await db.commit()
+    await db.refresh(new_review)
 
     user_name = f"{current_user.first_name} {current_user.last_name}".strip()
     return StationeryReviewResponse(
@@ -275,7 +416,7 @@ async def create_stationery_review(
 @router.post("/", response_model=StationeryResponse)
 async def create_stationery(
     stationery: StationeryCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
@@ -283,9 +424,9 @@ async def create_stationery(
     try:
         # Map schema fields to model fields where names differ
         data = stationery.dict(exclude={"category_ids"})
-        slug = data.get("slug") or _slugify(data.get("title") or "")
+        slug = data.get("slug") or slugify(data.get("title") or "")
         if slug:
-            existing = db.query(Stationery).filter(Stationery.slug == slug).first()
+            existing = await db.scalar(select(Stationery.stationery_id).filter(Stationery.slug == slug))
             if existing:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Slug already exists")
         if slug:
@@ -302,44 +443,56 @@ async def create_stationery(
 
         db_item = Stationery(**data)
         db_item.calculate_discounted_price()
-        db.add(db_item)
-        db.flush()
 
+        # Attach categories while the item is still pending, so the collection needs no load
         if stationery.category_ids:
-            cats = db.query(Category).filter(Category.category_id.in_(stationery.category_ids)).all()
+            cats = (await db.scalars(select(Category).filter(Category.category_id.in_(stationery.category_ids)))).all()
             db_item.categories.extend(cats)
 
-        db.commit()
-        db.refresh(db_item)
-
-        cache = RedisCache(redis)
-        await cache.delete_pattern("stationery:*")
-
-        resp = StationeryResponse.from_orm(db_item)
-        # Map model fields to response schema physical fields
-        resp.height_cm = getattr(db_item, "height", None)
-        resp.width_cm = getattr(db_item, "width", None)
-        resp.length_cm = getattr(db_item, "length", None)
-        resp.weight_grams = getattr(db_item, "weight", None)
-        return resp
+        db.add(db_item)
+        await db.commit()
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create stationery")
 
+    # Reload for server defaults (created_at)
+    db_item = await _get_stationery(db, db_item.stationery_id)
+
+    # The write is committed: the steps below log their own failures instead of failing the request
+    cache = RedisCache(redis)
+    await cache.bump_generation(CacheKeys.STATIONERY)
+    await bump_catalog_version(redis)
+    await catalog_search.notify_changed(db, redis, STATIONERY, db_item.stationery_id)
+    slugs = await db.run_sync(sync_aliases, STATIONERY, db_item)
+    # The new id and slugs must stop 404ing
+    await cache.delete_many(
+        [CacheKeys.stationery_missing(db_item.stationery_id)] + [CacheKeys.slug_missing(STATIONERY, s) for s in slugs]
+    )
+
+    resp = StationeryResponse.from_orm(db_item)
+    # Map model fields to response schema physical fields
+    resp.height_cm = getattr(db_item, "height", None)
+    resp.width_cm = getattr(db_item, "width", None)
+    resp.length_cm = getattr(db_item, "length", None)
+    resp.weight_grams = getattr(db_item, "weight", None)
+    return resp
+
 
 @router.put("/{stationery_id}", response_model=StationeryResponse)
 async def update_stationery(
     stationery_id: int,
     update: StationeryUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
-    db_item = db.query(Stationery).filter(Stationery.stationery_id == stationery_id).first()
+    db_item = await _get_stationery(db, stationery_id)
     if not db_item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stationery not found")
 
     try:
+        old_slug = db_item.slug
+        listed_as = list_snapshot(db_item, STATIONERY_LIST_FIELDS)
         data = update.dict(exclude_unset=True, exclude={"category_ids"})
         # Map schema physical fields to model names
         if "height_cm" in data:
@@ -355,60 +508,74 @@ async def update_stationery(
 
         if "slug" in data and data.get("slug"):
             slug = data.get("slug")
-            existing = db.query(Stationery).filter(Stationery.slug == slug, Stationery.stationery_id != stationery_id).first()
+            existing = await db.scalar(select(Stationery.stationery_id).filter(Stationery.slug == slug, Stationery.stationery_id != stationery_id))
             if existing:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Slug already exists")
             db_item.slug = slug
         elif "title" in data and not db_item.slug:
-            slug = _slugify(data.get("title") or db_item.title)
+            slug = slugify(data.get("title") or db_item.title)
             if slug:
-                existing = db.query(Stationery).filter(Stationery.slug == slug, Stationery.stationery_id != stationery_id).first()
+                existing = await db.scalar(select(Stationery.stationery_id).filter(Stationery.slug == slug, Stationery.stationery_id != stationery_id))
                 if not existing:
                     db_item.slug = slug
 
         if update.category_ids is not None:
-            cats = db.query(Category).filter(Category.category_id.in_(update.category_ids)).all()
-            db_item.categories = cats
+            cats = (await db.scalars(select(Category).filter(Category.category_id.in_(update.category_ids)))).all()
+            db_item.categories = list(cats)
 
         if any(k in data for k in ["discount_percentage", "discount_amount", "price"]):
             db_item.calculate_discounted_price()
 
-        db.commit()
-        db.refresh(db_item)
-
-        cache = RedisCache(redis)
-        await cache.delete_pattern("stationery:*")
-        await cache.delete(f"stationery:detail:{stationery_id}")
-
-        resp = StationeryResponse.from_orm(db_item)
-        # Map model fields to response schema physical fields
-        resp.height_cm = getattr(db_item, "height", None)
-        resp.width_cm = getattr(db_item, "width", None)
-        resp.length_cm = getattr(db_item, "length", None)
-        resp.weight_grams = getattr(db_item, "weight", None)
-        return resp
+        await db.commit()
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update stationery")
 
+    # The write is committed: the steps below log their own failures instead of failing the request
+    cache = RedisCache(redis)
+    if list_snapshot(db_item, STATIONERY_LIST_FIELDS) != listed_as:
+        # Moves between listings (filters, search text, slug): rebuild them all
+        await cache.bump_generation(CacheKeys.STATIONERY)
+        await cache.delete(CacheKeys.stationery_detail(stationery_id))
+    else:
+        # Same listings, new content: rewrite the cached copies in place
+        await _write_through(cache, db_item)
+    await bump_catalog_version(redis)
+    await catalog_search.notify_changed(db, redis, STATIONERY, stationery_id)
+    slugs = await db.run_sync(sync_aliases, STATIONERY, db_item, old_slug)
+    # A reactivated or renamed item must stop 404ing
+    await cache.delete_many(
+        [CacheKeys.stationery_missing(stationery_id)] + [CacheKeys.slug_missing(STATIONERY, s) for s in slugs]
+    )
+
+    resp = StationeryResponse.from_orm(db_item)
+    # Map model fields to response schema physical fields
+    resp.height_cm = getattr(db_item, "height", None)
+    resp.width_cm = getattr(db_item, "width", None)
+    resp.length_cm = getattr(db_item, "length", None)
+    resp.weight_grams = getattr(db_item, "weight", None)
+    return resp
+
 
 @router.delete("/{stationery_id}", response_model=MessageResponse)
 async def delete_stationery(
     stationery_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
-    db_item = db.query(Stationery).filter(Stationery.stationery_id == stationery_id).first()
+    db_item = await _get_stationery(db, stationery_id)
     if not db_item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stationery not found")
 
     db_item.is_active = False
-    db.commit()
+    await db.commit()
 
     cache = RedisCache(redis)
-    await cache.delete_pattern("stationery:*")
-    await cache.delete(f"stationery:detail:{stationery_id}")
+    await cache.bump_generation(CacheKeys.STATIONERY)
+    await bump_catalog_version(redis)
+    await cache.delete(CacheKeys.stationery_detail(stationery_id))
+    await catalog_search.notify_changed(db, redis, STATIONERY, stationery_id)
 
     return MessageResponse(message="Stationery deleted successfully")
 
@@ -419,12 +586,12 @@ async def delete_stationery(
 async def upload_stationery_image(
     stationery_id: int,
     image: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     """Upload and optimize primary stationery image (Admin only)."""
-    db_item = db.query(Stationery).filter(Stationery.stationery_id == stationery_id).first()
+    db_item = await _get_stationery(db, stationery_id)
 
     if not db_item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stationery not found")
@@ -441,18 +608,17 @@ async def upload_stationery_image(
 
         # Update stationery with new image URL
         db_item.image_url = image_url
-        db.commit()
+        await db.commit()
 
-        # Invalidate cache
-        cache = RedisCache(redis)
-        await cache.delete_pattern("stationery:*")
-        await cache.delete(f"stationery:detail:{stationery_id}")
+        # Listings are unchanged; rewrite the cached copies in place
+        await _write_through(RedisCache(redis), db_item)
+        await bump_catalog_version(redis)
 
         return MessageResponse(message="Stationery image uploaded successfully")
     except HTTPException:
         raise
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to upload image")
 
 
@@ -460,12 +626,12 @@ async def upload_stationery_image(
 async def upload_stationery_image2(
     stationery_id: int,
     image: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     """Upload and optimize secondary stationery image (Admin only)."""
-    db_item = db.query(Stationery).filter(Stationery.stationery_id == stationery_id).first()
+    db_item = await _get_stationery(db, stationery_id)
 
     if not db_item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stationery not found")
@@ -479,17 +645,17 @@ async def upload_stationery_image2(
         image_url = await image_service.save_image(image, f"stationery_{stationery_id}_image2")
 
         db_item.image2_url = image_url
-        db.commit()
+        await db.commit()
 
-        cache = RedisCache(redis)
-        await cache.delete_pattern("stationery:*")
-        await cache.delete(f"stationery:detail:{stationery_id}")
+        # Listings are unchanged; rewrite the cached copies in place
+        await _write_through(RedisCache(redis), db_item)
+        await bump_catalog_version(redis)
 
         return MessageResponse(message="Stationery second image uploaded successfully")
     except HTTPException:
         raise
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to upload second image")
 
 
@@ -497,12 +663,12 @@ async def upload_stationery_image2(
 async def upload_stationery_image3(
     stationery_id: int,
     image: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     redis: Redis = Depends(get_redis),
     current_user: User = Depends(require_admin)
 ):
     """Upload and optimize third stationery image (Admin only)."""
-    db_item = db.query(Stationery).filter(Stationery.stationery_id == stationery_id).first()
+    db_item = await _get_stationery(db, stationery_id)
 
     if not db_item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stationery not found")
@@ -516,31 +682,15 @@ async def upload_stationery_image3(
         image_url = await image_service.save_image(image, f"stationery_{stationery_id}_image3")
 
         db_item.image3_url = image_url
-        db.commit()
+        await db.commit()
 
-        cache = RedisCache(redis)
-        await cache.delete_pattern("stationery:*")
-        await cache.delete(f"stationery:detail:{stationery_id}")
+        # Listings are unchanged; rewrite the cached copies in place
+        await _write_through(RedisCache(redis), db_item)
+        await bump_catalog_version(redis)
 
         return MessageResponse(message="Stationery third image uploaded successfully")
     except HTTPException:
         raise
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to upload third image")
-def _slugify(text: str) -> str:
-    if not text:
-        return ""
-    n = unicodedata.normalize('NFKD', text)
-    ascii_text = ''.join(c for c in n if not unicodedata.combining(c))
-    ascii_text = ascii_text.lower()
-    allowed = []
-    for ch in ascii_text:
-        if ch.isalnum():
-            allowed.append(ch)
-        elif ch in [' ', '-', '_']:
-            allowed.append('-')
-    slug = ''.join(allowed)
-    while '--' in slug:
-        slug = slug.replace('--', '-')
-    return slug.strip('-')
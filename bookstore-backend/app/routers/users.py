@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
 from app.database import get_db
 from app.models.models import User, Address
@@ -90,7 +90,8 @@ async def get_all_users(
     current_user: User = Depends(require_admin)
 ):
     """Get all users (Admin only)"""
-    users = db.query(User).order_by(User.created_at.desc()).offset(skip).limit(limit).all()
+    # UserResponse lists each user's addresses; load them in one query, not one per user
+    users = db.query(User).options(selectinload(User.addresses)).order_by(User.created_at.desc()).offset(skip).limit(limit).all()
     return users
 
 
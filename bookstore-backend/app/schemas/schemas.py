@@ -1,6 +1,6 @@
 from __future__ import annotations
 from pydantic import BaseModel, EmailStr, validator
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime, date
 from decimal import Decimal
 
@@ -349,6 +349,39 @@ class BookResponse(Book):
     total_sold: Optional[int] = 0  # Total quantity sold from orders
 
 
+# Card-sized projection for list endpoints: no LONGTEXT description/read sample or shipping dimensions
+class BookSummary(BaseModel):
+    book_id: int
+    title: str
+    slug: Optional[str] = None
+    isbn: Optional[str] = None
+    brief_description: Optional[str] = None
+    price: int
+    stock_quantity: int
+    publication_date: Optional[date] = None
+    image_url: Optional[str] = None
+    image2_url: Optional[str] = None
+    image3_url: Optional[str] = None
+    is_active: bool = True
+    is_best_seller: bool = False
+    is_new: bool = False
+    is_discount: bool = False
+    is_slide1: bool = False
+    is_slide2: bool = False
+    is_slide3: bool = False
+    is_free_ship: bool = False
+    discount_percentage: Optional[Decimal] = None
+    discount_amount: Optional[int] = None
+    discounted_price: Optional[int] = None
+    created_at: datetime
+    authors: List[Author] = []
+    categories: List[Category] = []
+    total_sold: Optional[int] = 0
+    
+    class Config:
+        from_attributes = True
+
+
 class BookList(BaseModel):
     books: List[Book]
     total: int
@@ -442,6 +475,37 @@ class StationeryResponse(StationeryBase):
         from_attributes = True
 
 
+# Card-sized projection for list endpoints: no LONGTEXT description or shipping dimensions
+class StationerySummary(BaseModel):
+    stationery_id: int
+    title: str
+    slug: Optional[str] = None
+    sku: Optional[str] = None
+    brief_description: Optional[str] = None
+    price: int
+    stock_quantity: int = 0
+    image_url: Optional[str] = None
+    image2_url: Optional[str] = None
+    image3_url: Optional[str] = None
+    is_active: bool = True
+    is_best_seller: bool = False
+    is_new: bool = False
+    is_discount: bool = False
+    is_slide1: bool = False
+    is_slide2: bool = False
+    is_slide3: bool = False
+    is_free_ship: bool = False
+    discount_percentage: Optional[Decimal] = None
+    discount_amount: Optional[int] = None
+    discounted_price: Optional[int] = None
+    created_at: datetime
+    categories: List[Category] = []
+    total_sold: Optional[int] = 0
+
+    class Config:
+        from_attributes = True
+
+
 class StationeryList(BaseModel):
     stationery: List[StationeryResponse]
     total: int
@@ -450,6 +514,31 @@ class StationeryList(BaseModel):
     total_pages: int
 
 
+# Search schemas
+class SearchResult(BaseModel):
+    item_type: str  # 'book' or 'stationery'
+    item_id: int
+    title: str
+    slug: Optional[str] = None
+    image_url: Optional[str] = None
+    price: int
+    discounted_price: Optional[int] = None
+    score: float
+
+
+# Facet counts are keyed by facet name, then by value (category/author id, price bucket, or "true" for flags)
+class BookFacetPage(BaseModel):
+    total: int
+    facets: Dict[str, Dict[str, int]]
+    items: List[BookSummary]
+
+
+class StationeryFacetPage(BaseModel):
+    total: int
+    facets: Dict[str, Dict[str, int]]
+    items: List[StationerySummary]
+
+
 # Order schemas
 class OrderItemBase(BaseModel):
     book_id: Optional[int] = None
@@ -825,3 +914,13 @@ class NotificationResponse(NotificationBase):
     
     class Config:
         from_attributes = True
+
+
+# Homepage aggregate
+class HomePage(BaseModel):
+    slides: List[SlideContentResponse]
+    slide_books: Dict[int, List[BookSummary]]
+    notification: Optional[NotificationResponse] = None
+    discounted: List[BookSummary]
+    best_sellers: List[BookSummary]
+    new_releases: List[BookSummary]
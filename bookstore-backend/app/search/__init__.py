@@ -0,0 +1 @@
+# Search Module
\ No newline at end of file
@@ -0,0 +1,267 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple, Union
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from app.database import SessionLocal, redis_client
+from app.models.models import Book, Stationery
+from app.search.engine import SearchIndex
+from app.search.facets import FacetIndex
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+BOOK = "book"
+STATIONERY = "stationery"
+
+# Redis keys shared by all workers: a version counter and a log of changed items
+VERSION_KEY = "search:version"
+CHANGES_KEY = "search:changes"
+MAX_CHANGES = 5000
+
+# Long descriptions add little ranking signal beyond this many characters
+MAX_DESCRIPTION_CHARS = 5000
+
+# Price facet buckets on the effective (discounted if any) price, in VND
+PRICE_BUCKETS = (
+    ("under-50k", 0, 50_000),
+    ("50k-100k", 50_000, 100_000),
+    ("100k-200k", 100_000, 200_000),
+    ("200k-500k", 200_000, 500_000),
+    ("over-500k", 500_000, None),
+)
+FLAG_FACETS = ("is_discount", "is_free_ship", "is_new")
+
+
+class IndexNotReady(Exception):
+    """The index has not been built yet; a background build is running."""
+
+
+def _book_fields(book: Book) -> Dict[str, Tuple[Optional[str], float]]:
+    return {
+        "title": (book.title, 3.0),
+        "authors": (" ".join(a.name for a in book.authors), 2.0),
+        "publisher": (book.publisher, 1.0),
+        "brief_description": (book.brief_description, 1.5),
+        "full_description": ((book.full_description or "")[:MAX_DESCRIPTION_CHARS], 1.0),
+    }
+
+
+def _stationery_fields(item: Stationery) -> Dict[str, Tuple[Optional[str], float]]:
+    return {
+        "title": (item.title, 3.0),
+        "sku": (item.sku, 2.0),
+        "brief_description": (item.brief_description, 1.5),
+        "full_description": ((item.full_description or "")[:MAX_DESCRIPTION_CHARS], 1.0),
+    }
+
+
+def price_bucket(price: Optional[int]) -> Optional[str]:
+    if price is None:
+        return None
+    for label, low, high in PRICE_BUCKETS:
+        if price >= low and (high is None or price < high):
+            return label
+    return None
+
+
+def _facet_values(item: Union[Book, Stationery]) -> Dict[str, List[Hashable]]:
+    bucket = price_bucket(item.discounted_price if item.discounted_price is not None else item.price)
+    values = {
+        "category": [c.category_id for c in item.categories],
+        "price": [bucket] if bucket else [],
+    }
+    if isinstance(item, Book):
+        values["author"] = [a.author_id for a in item.authors]
+    for flag in FLAG_FACETS:
+        values[flag] = [True] if getattr(item, flag) else []
+    return values
+
+
+class CatalogSearch:
+    """Accent-insensitive full-text search and facet counts over active books and stationery.
+
+    Each worker keeps its own in-memory text and facet indexes. Admin writes call
+    `notify_changed`, which bumps a version counter in Redis and records the
+    item in a change log; other workers replay the log on their next search
+    and re-index only the changed items. Full builds (startup, or a log that
+    no longer reaches back to a worker's version) run on a background thread,
+    never in a request: until the first one finishes searches raise
+    IndexNotReady, afterwards they keep using the previous index.
+    """
+
+    def __init__(self):
+        self.indexes = {BOOK: SearchIndex(), STATIONERY: SearchIndex()}
+        self.facets = {BOOK: FacetIndex(), STATIONERY: FacetIndex()}
+        self.version: Optional[int] = None
+        self._build_lock = threading.Lock()
+        self._builder: Optional[threading.Thread] = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self.version is not None
+
+    def build(self, db: Session, redis: Optional[Redis] = None) -> None:
+        """(Re)build all indexes from the database."""
+        with self._build_lock:
+            version = self._remote_version(redis) if redis is not None else 0
+            books = SearchIndex()
+            book_facets = FacetIndex()
+            for book in db.query(Book).options(
+                selectinload(Book.authors), selectinload(Book.categories)
+            ).filter(Book.is_active == True).yield_per(1000):
+                books.add(book.book_id, _book_fields(book))
+                book_facets.add(book.book_id, _facet_values(book))
+            stationery = SearchIndex()
+            stationery_facets = FacetIndex()
+            for item in db.query(Stationery).options(
+                selectinload(Stationery.categories)
+            ).filter(Stationery.is_active == True).yield_per(1000):
+                stationery.add(item.stationery_id, _stationery_fields(item))
+                stationery_facets.add(item.stationery_id, _facet_values(item))
+            self.indexes = {BOOK: books, STATIONERY: stationery}
+            self.facets = {BOOK: book_facets, STATIONERY: stationery_facets}
+            self.version = version or 0
+            logger.info(f"Search index built: {len(books)} books, {len(stationery)} stationery")
+
+    def build_in_background(self) -> None:
+        """Start a full build on its own thread and session, unless one is already running."""
+        with self._build_lock:
+            if self._builder is not None and self._builder.is_alive():
+                return
+            self._builder = threading.Thread(target=self._background_build, name="search-index-build", daemon=True)
+            self._builder.start()
+
+    def _background_build(self) -> None:
+        db = SessionLocal()
+        try:
+            self.build(db, redis_client)
+        except Exception as e:
+            logger.error(f"Search index build error: {e}")
+        finally:
+            db.close()
+
+    def reindex(self, db: Session, kind: str, item_id: int) -> None:
+        """Refresh a single item from the database, dropping it if inactive or deleted."""
+        if kind == BOOK:
+            book = db.query(Book).filter(Book.book_id == item_id).first()
+            if book and book.is_active:
+                self.indexes[BOOK].add(item_id, _book_fields(book))
+                self.facets[BOOK].add(item_id, _facet_values(book))
+            else:
+                self.indexes[BOOK].remove(item_id)
+                self.facets[BOOK].remove(item_id)
+        elif kind == STATIONERY:
+            item = db.query(Stationery).filter(Stationery.stationery_id == item_id).first()
+            if item and item.is_active:
+                self.indexes[STATIONERY].add(item_id, _stationery_fields(item))
+                self.facets[STATIONERY].add(item_id, _facet_values(item))
+            else:
+                self.indexes[STATIONERY].remove(item_id)
+                self.facets[STATIONERY].remove(item_id)
+
+    async def notify_changed(self, db: AsyncSession, redis: AsyncRedis, kind: str, item_id: int) -> None:
+        """Record an admin change so every worker re-indexes the item."""
+        try:
+            version = await redis.incr(VERSION_KEY)
+            pipe = redis.pipeline()
+            pipe.zadd(CHANGES_KEY, {f"{kind}:{item_id}": version})
+            pipe.zremrangebyrank(CHANGES_KEY, 0, -MAX_CHANGES - 1)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Search change feed error: {e}")
+            version = None
+
+        if not self.is_ready:
+            return
+        try:
+            await db.run_sync(self.reindex, kind, item_id)
+            # Only fast-forward if no other worker's change slipped in between
+            if version is not None and version == self.version + 1:
+                self.version = version
+        except Exception as e:
+            logger.error(f"Search reindex error for {kind}:{item_id}: {e}")
+
+    async def pending_changes(self, redis: AsyncRedis) -> Optional[Tuple[int, List[Tuple[str, int]]]]:
+        """(version, changed items) the shared change log holds past the local version, or None if up to date."""
+        if not self.is_ready:
+            self.build_in_background()
+            raise IndexNotReady("Search index is being built")
+        try:
+            remote = int(await redis.get(VERSION_KEY) or 0)
+            if remote <= self.version:
+                return None
+            changes = await redis.zrangebyscore(CHANGES_KEY, self.version + 1, "+inf", withscores=True)
+        except Exception as e:
+            logger.error(f"Search change feed read error: {e}")
+            return None
+        # The log was trimmed past our version: we cannot replay, so rebuild (serving the current index meanwhile)
+        if not changes or int(changes[0][1]) > self.version + 1:
+            self.build_in_background()
+            return None
+        items = []
+        for member, _score in changes:
+            kind, _, item_id = member.decode().partition(":")
+            items.append((kind, int(item_id)))
+        return max(remote, int(changes[-1][1])), items
+
+    def apply_changes(self, db: Session, pending: Optional[Tuple[int, List[Tuple[str, int]]]]) -> None:
+        """Re-index what `pending_changes` returned and move to its version."""
+        if pending is None:
+            return
+        version, items = pending
+        for kind, item_id in items:
+            self.reindex(db, kind, item_id)
+        self.version = max(self.version, version)
+
+    async def sync(self, db: AsyncSession, redis: AsyncRedis) -> None:
+        """Bring the local index up to date with the shared change log."""
+        pending = await self.pending_changes(redis)
+        if pending is not None:
+            await db.run_sync(self.apply_changes, pending)
+
+    async def search(self, db: AsyncSession, redis: AsyncRedis, query: str, kind: Optional[str] = None,
+                     limit: int = 50) -> List[Tuple[str, int, float]]:
+        """Return (kind, item_id, score) tuples for the best matches."""
+        await self.sync(db, redis)
+        kinds = [kind] if kind else [BOOK, STATIONERY]
+        hits = []
+        for k in kinds:
+            hits.extend((k, item_id, score) for item_id, score in self.indexes[k].search(query, limit))
+        hits.sort(key=lambda hit: hit[2], reverse=True)
+        return hits[:limit]
+
+    async def search_ids(self, db: AsyncSession, redis: AsyncRedis, query: str, kind: str) -> Optional[List[int]]:
+        """Every `kind` id matching all words of `query`, best first, or None if the index is unavailable.
+
+        For listing filters: like the ILIKE filter it replaces, the result is the
+        whole match set (no cap, no partial-match fallback), so other SQL filters
+        and paging apply to all matches. Callers fall back to SQL on None.
+        """
+        try:
+            await self.sync(db, redis)
+            return [item_id for item_id, _ in self.indexes[kind].match_all(query)]
+        except IndexNotReady:
+            return None
+        except Exception as e:
+            logger.error(f"Search index unavailable, falling back to SQL: {e}")
+            return None
+
+    async def facet_query(self, db: AsyncSession, redis: AsyncRedis, kind: str,
+                          filters: Dict[str, Iterable[Hashable]],
+                          top: Optional[int] = None) -> Tuple[int, Dict[str, Dict[Hashable, int]]]:
+        """Bitset of matching ids and per-facet counts for `kind`; see FacetIndex.query."""
+        await self.sync(db, redis)
+        return self.facets[kind].query(filters, top)
+
+    def _remote_version(self, redis: Redis) -> Optional[int]:
+        try:
+            return int(redis.get(VERSION_KEY) or 0)
+        except Exception as e:
+            logger.error(f"Search version read error: {e}")
+            return None
+
+
+# Process-wide search index
+catalog_search = CatalogSearch()
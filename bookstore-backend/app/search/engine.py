@@ -0,0 +1,308 @@
+from bisect import bisect_left
+from collections import defaultdict
+from operator import itemgetter
+from typing import Dict, Hashable, List, Optional, Tuple
+import heapq
+import math
+import re
+import threading
+import unicodedata
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# How many vocabulary terms the last (possibly incomplete) query word may expand to
+MAX_PREFIX_EXPANSIONS = 10
+PREFIX_WEIGHT = 0.6
+
+# Relative change in average document length that invalidates cached impact lists
+RANKED_DRIFT = 0.05
+
+# How many best postings per term are kept for single-word queries
+RANKED_DEPTH = 500
+
+# Candidate sets larger than this are ranked with early termination instead of scored in full
+FULL_SCORE_LIMIT = 2000
+
+
+def fold_text(text: Optional[str]) -> str:
+    """Lowercase, strip HTML tags and remove Vietnamese diacritics.
+
+    "Đắc Nhân Tâm" and "dac nhan tam" fold to the same string. NFKD does not
+    decompose đ/Đ, so those are mapped explicitly.
+    """
+    if not text:
+        return ""
+    text = _TAG_RE.sub(" ", text)
+    text = text.replace("đ", "d").replace("Đ", "D")
+    normalized = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in normalized if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into accent-folded alphanumeric tokens."""
+    return _TOKEN_RE.findall(fold_text(text))
+
+
+class SearchIndex:
+    """In-memory inverted index with BM25 scoring.
+
+    Documents are identified by any hashable key and made of weighted fields,
+    e.g. {"title": ("...", 3.0), "brief_description": ("...", 1.5)}. A field
+    weight multiplies the term frequency of every token in that field.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[Hashable, float]] = defaultdict(dict)
+        self._doc_terms: Dict[Hashable, Dict[str, float]] = {}
+        self._doc_len: Dict[Hashable, float] = {}
+        self._total_len = 0.0
+        self._vocab: List[str] = []
+        self._vocab_dirty = False
+        self._ranked_cache: Dict[str, List[Tuple[Hashable, float]]] = {}
+        self._ranked_avg_len = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._doc_terms = {}
+            self._doc_len = {}
+            self._total_len = 0.0
+            self._vocab = []
+            self._vocab_dirty = False
+            self._ranked_cache = {}
+
+    def add(self, key: Hashable, fields: Dict[str, Tuple[Optional[str], float]]) -> None:
+        """Index (or re-index) a document."""
+        terms: Dict[str, float] = defaultdict(float)
+        for text, weight in fields.values():
+            for token in tokenize(text):
+                terms[token] += weight
+
+        with self._lock:
+            self._remove_locked(key)
+            if not terms:
+                return
+            for token, tf in terms.items():
+                postings = self._postings[token]
+                if not postings:
+                    self._vocab_dirty = True
+                postings[key] = tf
+                self._ranked_cache.pop(token, None)
+            length = sum(terms.values())
+            self._doc_terms[key] = dict(terms)
+            self._doc_len[key] = length
+            self._total_len += length
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove_locked(key)
+
+    def _remove_locked(self, key: Hashable) -> None:
+        terms = self._doc_terms.pop(key, None)
+        if terms is None:
+            return
+        for token in terms:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(key, None)
+                self._ranked_cache.pop(token, None)
+                if not postings:
+                    del self._postings[token]
+                    self._vocab_dirty = True
+        self._total_len -= self._doc_len.pop(key, 0.0)
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        if self._vocab_dirty:
+            self._vocab = sorted(self._postings)
+            self._vocab_dirty = False
+        start = bisect_left(self._vocab, prefix)
+        matches = []
+        for term in self._vocab[start:]:
+            if not term.startswith(prefix) or len(matches) >= MAX_PREFIX_EXPANSIONS:
+                break
+            if term != prefix:
+                matches.append(term)
+        return matches
+
+    def _ranked(self, term: str, avg_len: float, depth: int) -> List[Tuple[Hashable, float]]:
+        """The `depth` best postings of `term` by BM25 tf component (cached until the term changes)."""
+        # Cached impacts were computed against the average length at the time;
+        # start over once it has drifted noticeably
+        if abs(avg_len - self._ranked_avg_len) > RANKED_DRIFT * self._ranked_avg_len:
+            self._ranked_cache = {}
+            self._ranked_avg_len = avg_len
+        postings = self._postings[term]
+        ranked = self._ranked_cache.get(term)
+        if ranked is None or (len(ranked) < depth and len(ranked) < len(postings)):
+            ranked = heapq.nlargest(
+                max(depth, RANKED_DEPTH),
+                ((key, self._impact(tf, key, avg_len)) for key, tf in postings.items()),
+                key=itemgetter(1)
+            )
+            self._ranked_cache[term] = ranked
+        return ranked
+
+    def _impact(self, tf: float, key: Hashable, avg_len: float) -> float:
+        norm = K1 * (1 - B + B * self._doc_len[key] / avg_len)
+        return tf * (K1 + 1) / (tf + norm)
+
+    def _idf(self, term: str, doc_count: int) -> float:
+        df = len(self._postings[term])
+        return math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, limit: int = 50) -> List[Tuple[Hashable, float]]:
+        """Return up to `limit` (key, score) pairs, best first.
+
+        Documents must match every query word (the last word may also match as
+        a prefix, for search-as-you-type). If nothing matches all words, the
+        best documents matching at least half of them are returned instead.
+        """
+        if limit <= 0:
+            return []
+        with self._lock:
+            groups, avg_len = self._groups(query)
+            if not groups:
+                return []
+            if len(groups) == 1:
+                return self._top_single(groups[0], avg_len, limit)
+            if all(groups):
+                hits = self._top_matching_all(groups, avg_len, limit)
+                if hits:
+                    return hits
+            return self._top_partial(groups, avg_len, limit)
+
+    def match_all(self, query: str) -> List[Tuple[Hashable, float]]:
+        """Every document matching all query words, best first, with no cap and no partial fallback.
+
+        For using the index as a filter (catalog listings), where the result
+        must be the complete match set rather than the top of a ranking.
+        """
+        with self._lock:
+            groups, avg_len = self._groups(query)
+            if not groups or not all(groups):
+                return []
+            key_sets = sorted(
+                (set().union(*(self._postings[term].keys() for term, _ in group)) for group in groups),
+                key=len
+            )
+            candidates = key_sets[0].intersection(*key_sets[1:])
+            scored = [
+                (key, sum(self._group_score(group, key, avg_len) for group in groups))
+                for key in candidates
+            ]
+        scored.sort(key=itemgetter(1), reverse=True)
+        return scored
+
+    def _groups(self, query: str) -> Tuple[List[List[Tuple[str, float]]], float]:
+        """Each query word as a group of (term, weight * idf) alternatives, and the average document length."""
+        words = list(dict.fromkeys(tokenize(query)))
+        doc_count = len(self._doc_terms)
+        if not words or not doc_count:
+            return [], 0.0
+        groups: List[List[Tuple[str, float]]] = []
+        for i, word in enumerate(words):
+            alternatives = [(word, 1.0)] if word in self._postings else []
+            # The last word may also match as a prefix, for search-as-you-type
+            if i == len(words) - 1:
+                alternatives += [(t, PREFIX_WEIGHT) for t in self._expand_prefix(word)]
+            groups.append([(t, w * self._idf(t, doc_count)) for t, w in alternatives])
+        return groups, self._total_len / doc_count
+
+    def _group_score(self, group: List[Tuple[str, float]], key: Hashable, avg_len: float) -> float:
+        best = 0.0
+        for term, factor in group:
+            tf = self._postings[term].get(key)
+            if tf:
+                best = max(best, factor * self._impact(tf, key, avg_len))
+        return best
+
+    def _top_single(self, group: List[Tuple[str, float]], avg_len: float,
+                    limit: int) -> List[Tuple[Hashable, float]]:
+        # The overall top `limit` is contained in the union of each alternative's top `limit`
+        best: Dict[Hashable, float] = {}
+        for term, factor in group:
+            for key, impact in self._ranked(term, avg_len, limit):
+                score = factor * impact
+                if score > best.get(key, 0.0):
+                    best[key] = score
+        return heapq.nlargest(limit, best.items(), key=itemgetter(1))
+
+    def _top_matching_all(self, groups: List[List[Tuple[str, float]]], avg_len: float,
+                          limit: int) -> List[Tuple[Hashable, float]]:
+        # Intersect document sets first (in C), then score only the survivors
+        key_sets = sorted(
+            (set().union(*(self._postings[term].keys() for term, _ in group)) for group in groups),
+            key=len
+        )
+        candidates = key_sets[0].intersection(*key_sets[1:])
+        if len(candidates) > FULL_SCORE_LIMIT:
+            hits = self._top_by_threshold(groups, candidates, avg_len, limit)
+            if hits is not None:
+                return hits
+        scored = (
+            (key, sum(self._group_score(group, key, avg_len) for group in groups))
+            for key in candidates
+        )
+        return heapq.nlargest(limit, scored, key=itemgetter(1))
+
+    def _top_by_threshold(self, groups: List[List[Tuple[str, float]]], candidates: set,
+                          avg_len: float, limit: int) -> Optional[List[Tuple[Hashable, float]]]:
+        """Top `limit` of a large candidate set without scoring all of it.
+
+        Walks the most selective word's postings best-first and stops once no
+        remaining document can beat the current top `limit`, even with the
+        maximum possible score from the other words. Words found in nearly every
+        document have an idf close to zero, so that bound is usually tight.
+        Returns None if the cached postings run out before the bound is reached.
+        """
+        bounds = [
+            max(factor * self._ranked(term, avg_len, limit)[0][1] for term, factor in group)
+            for group in groups
+        ]
+        driver_index = bounds.index(max(bounds))
+        driver = groups[driver_index]
+        others = groups[:driver_index] + groups[driver_index + 1:]
+        others_max = sum(bounds) - bounds[driver_index]
+
+        streams = [
+            ((factor * impact, key) for key, impact in self._ranked(term, avg_len, RANKED_DEPTH))
+            for term, factor in driver
+        ]
+        top: List[Tuple[float, int, Hashable]] = []
+        seen = set()
+        for score, key in heapq.merge(*streams, key=itemgetter(0), reverse=True):
+            if len(top) >= limit and top[0][0] >= score + others_max:
+                return [(k, v) for v, _, k in sorted(top, reverse=True)]
+            # A document's first (highest) occurrence is its score for the driver word
+            if key in seen or key not in candidates:
+                continue
+            seen.add(key)
+            total = score + sum(self._group_score(group, key, avg_len) for group in others)
+            entry = (total, len(seen), key)
+            if len(top) < limit:
+                heapq.heappush(top, entry)
+            elif total > top[0][0]:
+                heapq.heapreplace(top, entry)
+        return None
+
+    def _top_partial(self, groups: List[List[Tuple[str, float]]], avg_len: float,
+                     limit: int) -> List[Tuple[Hashable, float]]:
+        scores: Dict[Hashable, float] = defaultdict(float)
+        matched_groups: Dict[Hashable, int] = defaultdict(int)
+        for group in groups:
+            for key in set().union(*(self._postings[term].keys() for term, _ in group)):
+                scores[key] += self._group_score(group, key, avg_len)
+                matched_groups[key] += 1
+
+        min_groups = max(1, (len(groups) + 1) // 2)
+        candidates = [(k, v) for k, v in scores.items() if matched_groups[k] >= min_groups]
+        return heapq.nlargest(limit, candidates, key=itemgetter(1))
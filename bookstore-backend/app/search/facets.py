@@ -0,0 +1,109 @@
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+import threading
+
+
+class FacetIndex:
+    """Per-value bitsets over integer document ids.
+
+    Every (facet, value) pair owns a Python int used as a bitset, with bit n
+    set when document n has that value, e.g. {"category": {3: 0b1010}}. A
+    filtered count is then an AND of a few bitsets and a popcount, no matter
+    how many documents match. Documents can be re-added at any time; only
+    the bits of the values that changed are touched.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._bits: Dict[str, Dict[Hashable, int]] = defaultdict(dict)
+        self._doc_values: Dict[int, Dict[str, Tuple[Hashable, ...]]] = {}
+        self._all = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_values)
+
+    def add(self, doc_id: int, values: Dict[str, Iterable[Hashable]]) -> None:
+        """Index (or re-index) a document. Facets may hold several values (e.g. categories)."""
+        values = {facet: tuple(dict.fromkeys(v)) for facet, v in values.items()}
+        bit = 1 << doc_id
+        with self._lock:
+            old = self._doc_values.get(doc_id, {})
+            for facet in old.keys() | values.keys():
+                before, after = set(old.get(facet, ())), set(values.get(facet, ()))
+                for value in before - after:
+                    self._clear(facet, value, bit)
+                bits = self._bits[facet]
+                for value in after - before:
+                    bits[value] = bits.get(value, 0) | bit
+            self._doc_values[doc_id] = values
+            self._all |= bit
+
+    def remove(self, doc_id: int) -> None:
+        bit = 1 << doc_id
+        with self._lock:
+            old = self._doc_values.pop(doc_id, None)
+            if old is None:
+                return
+            for facet, facet_values in old.items():
+                for value in facet_values:
+                    self._clear(facet, value, bit)
+            self._all &= ~bit
+
+    def _clear(self, facet: str, value: Hashable, bit: int) -> None:
+        bits = self._bits[facet]
+        remaining = bits.get(value, 0) & ~bit
+        if remaining:
+            bits[value] = remaining
+        else:
+            bits.pop(value, None)
+
+    def query(self, filters: Dict[str, Iterable[Hashable]],
+              top: Optional[int] = None) -> Tuple[int, Dict[str, Dict[Hashable, int]]]:
+        """Match `filters` and count every facet value among the matches.
+
+        Values within one facet are ORed, facets are ANDed. Each facet's counts
+        ignore that facet's own filter, so a shopper who picked one category
+        still sees how many results the other categories would give. Returns
+        (bitset of matching ids, {facet: {value: count}}) with zero counts
+        left out and, if `top` is given, only the `top` largest per facet.
+        """
+        filters = {facet: list(v) for facet, v in filters.items() if v}
+        with self._lock:
+            masks = {}
+            for facet, wanted in filters.items():
+                bits = self._bits.get(facet, {})
+                mask = 0
+                for value in wanted:
+                    mask |= bits.get(value, 0)
+                masks[facet] = mask
+
+            matched = self._all
+            for mask in masks.values():
+                matched &= mask
+
+            counts = {}
+            for facet, bits in self._bits.items():
+                base = self._all
+                for other, mask in masks.items():
+                    if other != facet:
+                        base &= mask
+                facet_counts = {}
+                if base:
+                    for value, value_bits in bits.items():
+                        count = (value_bits & base).bit_count()
+                        if count:
+                            facet_counts[value] = count
+                if top is not None and len(facet_counts) > top:
+                    facet_counts = dict(sorted(facet_counts.items(), key=lambda kv: kv[1], reverse=True)[:top])
+                counts[facet] = facet_counts
+        return matched, counts
+
+
+def bitset_ids(bits: int, skip: int = 0, limit: int = 20) -> List[int]:
+    """Ids set in `bits`, highest first, for the requested page."""
+    ids = []
+    while bits and len(ids) < skip + limit:
+        doc_id = bits.bit_length() - 1
+        ids.append(doc_id)
+        bits ^= 1 << doc_id
+    return ids[skip:]
@@ -0,0 +1,93 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer, selectinload
+from sqlalchemy import or_
+from typing import Dict, List
+from redis.asyncio import Redis
+from app.models.models import Book, Notification, SlideContent
+from app.schemas.schemas import BookSummary, NotificationResponse, SlideContentResponse
+from app.services.leaderboard_service import (
+    BEST_SELLERS_KEY, NEW_RELEASES_KEY, ensure_leaderboards, fallback_order, top_ids
+)
+
+SLIDE_NUMBERS = (1, 2, 3)
+
+# Card loader options: relations in one batch each, LONGTEXT columns never loaded
+_CARD_OPTIONS = [
+    selectinload(Book.authors), selectinload(Book.categories),
+    defer(Book.full_description), defer(Book.read_sample)
+]
+
+
+def _fallback_ranking(db: Session, keys: List[str], limit: int) -> Dict[str, List[int]]:
+    return {
+        key: [book_id for (book_id,) in db.query(Book.book_id).filter(Book.is_active == True)
+              .order_by(*fallback_order(key)).limit(limit)]
+        for key in keys
+    }
+
+
+async def _ranked_ids(db: AsyncSession, redis: Redis, limit: int) -> Dict[str, List[int]]:
+    keys = [BEST_SELLERS_KEY, NEW_RELEASES_KEY]
+    ranked = await top_ids(redis, keys, limit)
+    if ranked is None and await ensure_leaderboards(db, redis):
+        ranked = await top_ids(redis, keys, limit)
+    if ranked is None:
+        ranked = await db.run_sync(_fallback_ranking, keys, limit)
+    return ranked
+
+
+async def build_home(db: AsyncSession, redis: Redis, limit: int) -> dict:
+    """Everything the homepage shows, as one JSON-ready dict.
+
+    Section membership is resolved to book ids first (one pipelined read of the
+    leaderboards, one query for all three slides, one for discounts), then
+    every card is loaded by a single IN query, so a book that appears in
+    several sections is fetched and serialized once.
+    """
+    ranked = await _ranked_ids(db, redis, limit)
+    return await db.run_sync(_assemble_home, ranked, limit)
+
+
+def _assemble_home(db: Session, ranked: Dict[str, List[int]], limit: int) -> dict:
+    slides = db.query(SlideContent).filter(
+        SlideContent.slide_number.in_(SLIDE_NUMBERS)
+    ).order_by(SlideContent.slide_number.asc()).all()
+    notification = db.query(Notification).filter(
+        Notification.is_active == True
+    ).order_by(Notification.created_at.desc()).first()
+
+    slide_rows = db.query(Book.book_id, Book.is_slide1, Book.is_slide2, Book.is_slide3).filter(
+        Book.is_active == True,
+        or_(Book.is_slide1 == True, Book.is_slide2 == True, Book.is_slide3 == True)
+    ).order_by(Book.book_id).all()
+    sections = {
+        f"slide{n}": [row.book_id for row in slide_rows if getattr(row, f"is_slide{n}")][:limit]
+        for n in SLIDE_NUMBERS
+    }
+    sections["discounted"] = [book_id for (book_id,) in db.query(Book.book_id).filter(
+        Book.is_active == True,
+        Book.is_discount == True
+    ).order_by(Book.book_id).limit(limit)]
+    sections["best_sellers"] = ranked[BEST_SELLERS_KEY]
+    sections["new_releases"] = ranked[NEW_RELEASES_KEY]
+
+    wanted = set().union(*sections.values())
+    cards = {}
+    if wanted:
+        books = db.query(Book).options(*_CARD_OPTIONS).filter(
+            Book.book_id.in_(wanted),
+            Book.is_active == True
+        ).all()
+        cards = {book.book_id: BookSummary.from_orm(book).model_dump(mode="json") for book in books}
+
+    def section(name: str) -> List[dict]:
+        return [cards[book_id] for book_id in sections[name] if book_id in cards]
+
+    return {
+        "slides": [SlideContentResponse.from_orm(sc).model_dump(mode="json") for sc in slides],
+        "slide_books": {n: section(f"slide{n}") for n in SLIDE_NUMBERS},
+        "notification": NotificationResponse.from_orm(notification).model_dump(mode="json") if notification else None,
+        "discounted": section("discounted"),
+        "best_sellers": section("best_sellers"),
+        "new_releases": section("new_releases"),
+    }
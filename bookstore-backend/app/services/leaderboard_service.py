@@ -0,0 +1,193 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import func, select
+from typing import Dict, Iterable, List, Optional
+from datetime import date
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from app.models.models import Book
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Redis sorted sets of active book ids, highest score first
+POPULAR_KEY = "leaderboard:books:popular"
+BEST_SELLERS_KEY = "leaderboard:books:best_sellers"
+NEW_RELEASES_KEY = "leaderboard:books:new_releases"
+LEADERBOARD_KEYS = (POPULAR_KEY, BEST_SELLERS_KEY, NEW_RELEASES_KEY)
+# Set by every full rebuild. Readers go by this marker, not by the boards themselves: an
+# empty board has no key in Redis, and boards re-created by refresh_books after a flush
+# hold only the refreshed books. It expires daily, so a full rebuild also corrects drift.
+BUILT_KEY = "leaderboard:books:built"
+BUILT_TTL = 24 * 3600
+# Held (SET NX) by the one request that rebuilds once BUILT_KEY is gone; the others serve
+# SQL meanwhile. Never released: a finished rebuild sets BUILT_KEY, which callers check
+# first, and a failed one is retried once the lock expires.
+REBUILD_LOCK_KEY = "leaderboard:books:rebuild_lock"
+REBUILD_LOCK_TTL = 120
+
+# Flagged books rank ahead of every unflagged one; the rest of the score orders within each group
+FLAG_BOOST = 1_000_000_000
+
+# Only the columns the scores depend on (plus is_active), never the LONGTEXT ones
+_SCORE_COLUMNS = load_only(
+    Book.book_id, Book.is_active, Book.total_sold, Book.is_best_seller, Book.is_new,
+    Book.publication_date, Book.created_at
+)
+
+
+def popular_score(book: Book) -> float:
+    """Units sold."""
+    return float(book.total_sold or 0)
+
+
+def best_seller_score(book: Book) -> float:
+    """Books marked `is_best_seller` first, then by units sold."""
+    return (FLAG_BOOST if book.is_best_seller else 0) + float(book.total_sold or 0)
+
+
+def new_release_score(book: Book) -> float:
+    """Books marked `is_new` first, then by publication date (creation date if unknown)."""
+    released = book.publication_date or (book.created_at.date() if book.created_at else date.min)
+    return (FLAG_BOOST if book.is_new else 0) + released.toordinal()
+
+
+_SCORERS = {
+    POPULAR_KEY: popular_score,
+    BEST_SELLERS_KEY: best_seller_score,
+    NEW_RELEASES_KEY: new_release_score,
+}
+
+
+def fallback_order(key: str) -> list:
+    """SQL ORDER BY equivalent to a leaderboard, for when Redis is unavailable."""
+    if key == BEST_SELLERS_KEY:
+        order = [Book.is_best_seller.desc(), Book.total_sold.desc()]
+    elif key == NEW_RELEASES_KEY:
+        order = [Book.is_new.desc(), func.coalesce(Book.publication_date, func.date(Book.created_at)).desc()]
+    else:
+        order = [Book.total_sold.desc()]
+    return order + [Book.book_id.desc()]
+
+
+def _scores(books: Iterable[Book]) -> Dict[str, Dict[str, float]]:
+    boards = {key: {} for key in LEADERBOARD_KEYS}
+    for book in books:
+        for key, scorer in _SCORERS.items():
+            boards[key][str(book.book_id)] = scorer(book)
+    return boards
+
+
+def _active_scores(db: Session) -> Dict[str, Dict[str, float]]:
+    return _scores(db.query(Book).options(_SCORE_COLUMNS).filter(Book.is_active == True).yield_per(1000))
+
+
+def _queue_rebuild(pipe, boards: Dict[str, Dict[str, float]]) -> None:
+    # Works on a sync or an async pipeline: queueing a command does no I/O
+    for key, members in boards.items():
+        tmp_key = f"{key}:rebuild"
+        pipe.delete(tmp_key)
+        # Chunk ZADDs so a large catalog does not produce one huge command
+        items = list(members.items())
+        for i in range(0, len(items), 1000):
+            pipe.zadd(tmp_key, dict(items[i:i + 1000]))
+        if items:
+            pipe.rename(tmp_key, key)
+        else:
+            pipe.delete(key)
+    pipe.set(BUILT_KEY, int(time.time()), ex=BUILT_TTL)
+
+
+def rebuild_leaderboards(db: Session, redis: Redis) -> int:
+    """Recompute every leaderboard from MySQL and swap it in atomically.
+
+    Sync, for scripts (reconcile_sales.py); request code goes through ensure_leaderboards.
+    Returns the number of ranked books.
+    """
+    boards = _active_scores(db)
+    pipe = redis.pipeline()
+    _queue_rebuild(pipe, boards)
+    pipe.execute()
+    count = len(boards[POPULAR_KEY])
+    logger.info(f"Leaderboards rebuilt with {count} books")
+    return count
+
+
+async def ensure_leaderboards(db: AsyncSession, redis: AsyncRedis) -> bool:
+    """Build the leaderboards unless a full rebuild is on record (missing after a Redis flush or daily expiry).
+
+    Returns True if they are built. Only the caller that takes the rebuild lock
+    rebuilds; the others get False right away and should fall back to SQL.
+    """
+    try:
+        if await redis.exists(BUILT_KEY):
+            return True
+        if not await redis.set(REBUILD_LOCK_KEY, int(time.time()), nx=True, ex=REBUILD_LOCK_TTL):
+            return False
+        boards = await db.run_sync(_active_scores)
+        pipe = redis.pipeline()
+        _queue_rebuild(pipe, boards)
+        await pipe.execute()
+        logger.info(f"Leaderboards rebuilt with {len(boards[POPULAR_KEY])} books")
+        return True
+    except Exception as e:
+        logger.error(f"Leaderboard build error: {e}")
+        return False
+
+
+async def refresh_books(db: AsyncSession, redis: AsyncRedis, book_ids: Iterable[int]) -> None:
+    """Re-score the given books from their committed rows.
+
+    Call after any commit that changes sales counters, flags, dates or
+    active status. Scores are written absolutely rather than incremented, so
+    a retried or missed call never leaves a ranking permanently wrong.
+    """
+    book_ids = {book_id for book_id in book_ids if book_id}
+    if not book_ids:
+        return
+    try:
+        result = await db.execute(select(Book).options(_SCORE_COLUMNS).where(Book.book_id.in_(book_ids)))
+        active = [book for book in result.scalars() if book.is_active]
+        inactive = book_ids - {book.book_id for book in active}
+        pipe = redis.pipeline()
+        for key, members in _scores(active).items():
+            if members:
+                pipe.zadd(key, members)
+            if inactive:
+                pipe.zrem(key, *[str(book_id) for book_id in inactive])
+        await pipe.execute()
+    except Exception as e:
+        logger.error(f"Leaderboard refresh error for books {sorted(book_ids)}: {e}")
+
+
+async def page_ids(redis: AsyncRedis, key: str, skip: int, limit: int) -> Optional[List[int]]:
+    """Book ids ranked skip..skip+limit-1, or None if the leaderboards are not built."""
+    try:
+        pipe = redis.pipeline(transaction=False)
+        pipe.exists(BUILT_KEY)
+        pipe.zrevrange(key, skip, skip + limit - 1)
+        built, members = await pipe.execute()
+    except Exception as e:
+        logger.error(f"Leaderboard read error for {key}: {e}")
+        return None
+    if not built:
+        return None
+    return [int(member) for member in members]
+
+
+async def top_ids(redis: AsyncRedis, keys: Iterable[str], limit: int) -> Optional[Dict[str, List[int]]]:
+    """The top `limit` book ids of several leaderboards in one pipeline, or None if they are not built."""
+    keys = list(keys)
+    try:
+        pipe = redis.pipeline(transaction=False)
+        pipe.exists(BUILT_KEY)
+        for key in keys:
+            pipe.zrevrange(key, 0, limit - 1)
+        built, *results = await pipe.execute()
+    except Exception as e:
+        logger.error(f"Leaderboard read error for {keys}: {e}")
+        return None
+    if not built:
+        return None
+    return {key: [int(member) for member in members] for key, members in zip(keys, results)}
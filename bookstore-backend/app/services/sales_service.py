@@ -0,0 +1,95 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import Dict, Iterable
+from app.models.models import Book, Stationery, Order, OrderItem
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Orders in these statuses do not count towards total_sold: our own
+# cancellation plus GHN's cancel and return states (synced onto orders)
+CANCELLED_STATUSES = (
+    "cancelled", "Cancelled", "cancel",
+    "waiting_to_return", "return", "return_transporting", "return_sorting", "returning",
+    "returned", "Returned",
+)
+
+
+def is_cancelled_status(status_value: str) -> bool:
+    """Return True if an order status means the sale was cancelled."""
+    return status_value in CANCELLED_STATUSES
+
+
+def adjust_sales_counters(db: Session, items: Iterable, sign: int = 1) -> None:
+    """Add (sign=1) or subtract (sign=-1) order item quantities from the product counters.
+
+    Uses atomic `total_sold = total_sold + n` updates so concurrent orders do not
+    overwrite each other. The caller owns the transaction and must commit.
+    """
+    book_totals: Dict[int, int] = {}
+    stationery_totals: Dict[int, int] = {}
+    for item in items:
+        quantity = int(item.quantity or 0)
+        if item.book_id:
+            book_totals[item.book_id] = book_totals.get(item.book_id, 0) + quantity
+        elif item.stationery_id:
+            stationery_totals[item.stationery_id] = stationery_totals.get(item.stationery_id, 0) + quantity
+
+    for book_id, quantity in book_totals.items():
+        db.query(Book).filter(Book.book_id == book_id).update(
+            {Book.total_sold: Book.total_sold + sign * quantity},
+            synchronize_session=False
+        )
+    for stationery_id, quantity in stationery_totals.items():
+        db.query(Stationery).filter(Stationery.stationery_id == stationery_id).update(
+            {Stationery.total_sold: Stationery.total_sold + sign * quantity},
+            synchronize_session=False
+        )
+
+
+def rebuild_sales_counters(db: Session) -> Dict[str, int]:
+    """Recompute every total_sold counter from order_items and fix any drift.
+
+    Returns the number of books and stationery items whose counter changed.
+    """
+    active_sales = (
+        db.query(OrderItem)
+        .join(Order, Order.order_id == OrderItem.order_id)
+        .filter(~Order.status.in_(CANCELLED_STATUSES))
+    )
+    book_totals = dict(
+        active_sales.filter(OrderItem.book_id.isnot(None))
+        .with_entities(OrderItem.book_id, func.sum(OrderItem.quantity))
+        .group_by(OrderItem.book_id)
+        .all()
+    )
+    stationery_totals = dict(
+        active_sales.filter(OrderItem.stationery_id.isnot(None))
+        .with_entities(OrderItem.stationery_id, func.sum(OrderItem.quantity))
+        .group_by(OrderItem.stationery_id)
+        .all()
+    )
+
+    book_updates = [
+        {"book_id": book_id, "total_sold": int(book_totals.get(book_id) or 0)}
+        for book_id, current in db.query(Book.book_id, Book.total_sold).all()
+        if int(current or 0) != int(book_totals.get(book_id) or 0)
+    ]
+    stationery_updates = [
+        {"stationery_id": stationery_id, "total_sold": int(stationery_totals.get(stationery_id) or 0)}
+        for stationery_id, current in db.query(Stationery.stationery_id, Stationery.total_sold).all()
+        if int(current or 0) != int(stationery_totals.get(stationery_id) or 0)
+    ]
+
+    try:
+        if book_updates:
+            db.bulk_update_mappings(Book, book_updates)
+        if stationery_updates:
+            db.bulk_update_mappings(Stationery, stationery_updates)
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to rebuild sales counters: {e}")
+        db.rollback()
+        raise
+
+    return {"books": len(book_updates), "stationery": len(stationery_updates)}
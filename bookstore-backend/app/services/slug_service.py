@@ -0,0 +1,146 @@
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple, Union
+from app.models.models import Book, Stationery, SlugAlias
+import logging
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+BOOK = "book"
+STATIONERY = "stationery"
+
+_MODELS = {BOOK: Book, STATIONERY: Stationery}
+_ID_COLUMNS = {BOOK: "book_id", STATIONERY: "stationery_id"}
+
+Product = Union[Book, Stationery]
+
+
+def slugify(text: str) -> str:
+    if not text:
+        return ""
+    n = unicodedata.normalize('NFKD', text)
+    ascii_text = ''.join(c for c in n if not unicodedata.combining(c))
+    ascii_text = ascii_text.lower()
+    allowed = []
+    for ch in ascii_text:
+        if ch.isalnum():
+            allowed.append(ch)
+        elif ch in [' ', '-', '_']:
+            allowed.append('-')
+    slug = ''.join(allowed)
+    while '--' in slug:
+        slug = slug.replace('--', '-')
+    return slug.strip('-')
+
+
+def resolve_slug(db: Session, item_type: str, slug: str) -> Tuple[Optional[Product], bool]:
+    """Find the active product for a slug.
+
+    Returns (item, is_alias). When `is_alias` is True the slug is an old or
+    alternate one and callers should redirect to `item.slug`. Every lookup is
+    an indexed equality match. Callers cache misses under CacheKeys.slug_missing
+    and drop those entries for the slugs sync_aliases returns.
+    """
+    model = _MODELS[item_type]
+    item = db.query(model).filter(model.slug == slug, model.is_active == True).first()
+    if item:
+        return item, False
+
+    alias = db.query(SlugAlias).filter(SlugAlias.item_type == item_type, SlugAlias.slug == slug).first()
+    if alias:
+        id_column = getattr(model, _ID_COLUMNS[item_type])
+        item = db.query(model).filter(id_column == alias.item_id, model.is_active == True).first()
+        if item and item.slug:
+            return item, True
+    return None, False
+
+
+def _slug_taken(db: Session, item_type: str, slug: str, item_id: int) -> bool:
+    model = _MODELS[item_type]
+    id_column = getattr(model, _ID_COLUMNS[item_type])
+    if db.query(id_column).filter(model.slug == slug, id_column != item_id).first():
+        return True
+    alias = db.query(SlugAlias).filter(SlugAlias.item_type == item_type, SlugAlias.slug == slug).first()
+    return alias is not None and alias.item_id != item_id
+
+
+def add_alias(db: Session, item_type: str, item_id: int, slug: Optional[str]) -> bool:
+    """Point `slug` at an item unless it is empty, already the item's, or used elsewhere.
+
+    The caller owns the transaction and must commit. The insert runs in a
+    savepoint, so losing a race for the slug (unique index) only skips it.
+    """
+    if not slug or _slug_taken(db, item_type, slug, item_id):
+        return False
+    exists = db.query(SlugAlias).filter(SlugAlias.item_type == item_type, SlugAlias.slug == slug).first()
+    if exists:
+        return False
+    try:
+        with db.begin_nested():
+            db.add(SlugAlias(item_type=item_type, slug=slug, item_id=item_id))
+    except IntegrityError:
+        logger.warning(f"Slug alias {item_type}:{slug} was taken concurrently, not added for {item_id}")
+        return False
+    return True
+
+
+def sync_aliases(db: Session, item_type: str, item: Product, old_slug: Optional[str] = None) -> List[str]:
+    """Keep old and title-derived slugs resolving after a product is saved.
+
+    Records the previous slug (if it changed) and the slug derived from the
+    current title (if it differs from the stored slug), which is what the old
+    title-scan fallback used to match. Commits. Returns the slugs that may
+    resolve now, whose cached misses the caller must drop.
+    """
+    item_id = getattr(item, _ID_COLUMNS[item_type])
+    title_slug = slugify(item.title)
+    added = False
+    for slug in (old_slug, title_slug):
+        if slug and slug != item.slug:
+            added = add_alias(db, item_type, item_id, slug) or added
+    if added:
+        try:
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            logger.warning(f"Slug aliases for {item_type}:{item_id} not saved: {e}")
+    return list(dict.fromkeys(slug for slug in (item.slug, old_slug, title_slug) if slug))
+
+
+def backfill_slugs(db: Session, batch_size: int = 500) -> Dict[str, Dict[str, int]]:
+    """One-off maintenance job: give every product a slug and a title alias.
+
+    Products without a slug get one derived from their title (suffixed with
+    the id on collision). Products whose stored slug differs from their title
+    slug get an alias for the title slug, so URLs the old title-scan fallback
+    accepted keep working. Safe to re-run; already-filled rows are skipped.
+    """
+    report = {}
+    for item_type, model in _MODELS.items():
+        id_column = getattr(model, _ID_COLUMNS[item_type])
+        filled = aliased = 0
+        last_id = 0
+        while True:
+            batch = db.query(model).filter(id_column > last_id).order_by(id_column).limit(batch_size).all()
+            if not batch:
+                break
+            for item in batch:
+                item_id = getattr(item, _ID_COLUMNS[item_type])
+                title_slug = slugify(item.title)
+                if not item.slug and title_slug:
+                    slug = title_slug
+                    if _slug_taken(db, item_type, slug, item_id):
+                        slug = f"{title_slug}-{item_id}"
+                    item.slug = slug
+                    # Flush so later rows in the batch see this slug as taken
+                    db.flush()
+                    filled += 1
+                elif title_slug and title_slug != item.slug:
+                    aliased += add_alias(db, item_type, item_id, title_slug)
+                    db.flush()
+                last_id = item_id
+            db.commit()
+        report[item_type] = {"filled": filled, "aliased": aliased}
+        logger.info(f"Slug backfill for {item_type}: {filled} slugs filled, {aliased} aliases added")
+    return report
@@ -18,6 +18,8 @@ from typing import Any, Dict, Optional, Tuple
 from urllib.parse import urlencode
 
 import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.config import settings
@@ -201,7 +203,7 @@ class ZaloService:
             logger.error("Error exchanging Zalo authorization code: %s", e)
             return None
 
-    async def refresh_access_token(self, db: Session, token_record: ZaloToken) -> Optional[str]:
+    async def refresh_access_token(self, db: AsyncSession, token_record: ZaloToken) -> Optional[str]:
         """
         Refresh access token using refresh_token.
         Returns new access_token or None on failure.
@@ -242,7 +244,7 @@ class ZaloService:
             token_record.refresh_token = result["refresh_token"]  # New refresh token
             token_record.expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
             token_record.refresh_expires_at = datetime.utcnow() + timedelta(days=90)
-            db.commit()
+            await db.commit()
             
             logger.info("Zalo tokens refreshed for OA ID: %s", token_record.oa_id)
             return result["access_token"]
@@ -251,13 +253,13 @@ class ZaloService:
             logger.error("Error refreshing Zalo token: %s", e)
             return None
 
-    async def get_valid_token(self, db: Session) -> Optional[str]:
+    async def get_valid_token(self, db: AsyncSession) -> Optional[str]:
         """
         Get a valid access token, automatically refreshing if needed.
         Returns access_token or None if no valid token available.
         """
         # Get the first non-pending token
-        token_record = db.query(ZaloToken).filter(ZaloToken.oa_id != "pending").first()
+        token_record = await db.scalar(select(ZaloToken).filter(ZaloToken.oa_id != "pending").limit(1))
         
         if not token_record:
             logger.error("No Zalo token found in database. Please complete OAuth flow first.")
@@ -302,7 +304,7 @@ class ZaloService:
 
     async def send_zns(
         self, 
-        db: Session,
+        db: AsyncSession,
         phone: str, 
         template_data: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
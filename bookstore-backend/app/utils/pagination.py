@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, or_
+import base64
+import json
+
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """Encode a (created_at, id) sort position into an opaque URL-safe cursor."""
+    raw = json.dumps([created_at.isoformat(), item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(item_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def apply_keyset(query, created_col, id_col, position: Optional[Tuple[datetime, int]], limit: int):
+    """Order by (created_at, id) and seek past `position` instead of using OFFSET.
+
+    The OR form (rather than a row-value comparison) lets MySQL use the
+    (is_active, created_at, id) index as a range scan. One extra row is
+    fetched so the caller can tell whether another page exists.
+    """
+    if position is not None:
+        created_at, item_id = position
+        query = query.filter(or_(
+            created_col > created_at,
+            and_(created_col == created_at, id_col > item_id)
+        ))
+    return query.order_by(created_col.asc(), id_col.asc()).limit(limit + 1)
+
+
+def next_cursor_for(rows: list, limit: int, created_attr: str, id_attr: str) -> Tuple[list, Optional[str]]:
+    """Trim the look-ahead row and build the cursor for the following page."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, created_attr), getattr(last, id_attr))
+
+
+def parse_id_list(raw: str, max_ids: int) -> List[int]:
+    """Parse a comma-separated id list ("3,1,3") into unique ids, keeping first-seen order.
+
+    Raises ValueError if an entry is not a positive integer or there are too many ids.
+    """
+    ids = []
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit() or int(part) <= 0:
+            raise ValueError(f"Invalid id: {part}")
+        ids.append(int(part))
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > max_ids:
+        raise ValueError(f"At most {max_ids} ids per request")
+    return ids
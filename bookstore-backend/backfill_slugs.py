@@ -0,0 +1,32 @@
+"""
+Backfill product slugs and slug aliases.
+
+Gives every book and stationery item without a slug one derived from its
+title, and records the title-derived slug as an alias wherever it differs
+from the stored slug, so old title-based URLs keep redirecting. Slug lookups
+no longer scan titles, so run this once after deploying the slug_aliases
+migration. Safe to re-run.
+
+Usage:
+    python backfill_slugs.py
+"""
+
+from app.database import SessionLocal
+from app.services.slug_service import backfill_slugs
+
+
+def main():
+    print("Connecting to database...")
+    db = SessionLocal()
+    try:
+        print("Backfilling slugs and slug aliases...")
+        report = backfill_slugs(db)
+        for item_type, counts in report.items():
+            print(f"  {item_type}: {counts['filled']} slugs filled, {counts['aliased']} aliases added")
+        print("Done.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Compare a sync Session inside `async def` endpoints with AsyncSession under
+concurrent load.
+
+Each simulated request runs one slow query (`SELECT SLEEP(n)`, the stand-in
+for a real catalog or order query) followed by a small read. With the sync
+Session every query blocks the event loop, so requests served by one worker
+run one at a time no matter how many are in flight; with AsyncSession the
+worker waits on the socket and keeps serving the others. A heartbeat task
+measures how long the loop was stalled. Prints throughput, latency
+percentiles and the worst loop stall for both modes.
+
+Runs against MySQL (PyMySQL / aiomysql) or SQLite (pysqlite / aiosqlite, the
+default; SLEEP is registered as a SQL function). Use a scratch database; only
+SELECTs are issued.
+
+Usage:
+    python benchmarks/async_db_benchmark.py [--database-url sqlite:////tmp/bench.db] [--requests 500]
+        [--concurrency 50] [--query-ms 10]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import async_database_url
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return 0
+
+
+def _register_sleep(engine):
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, _):
+        dbapi_connection.create_function("sleep", 1, _sleep)
+
+
+async def heartbeat(stop: asyncio.Event, stalls: list, interval: float = 0.001):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - started - interval)
+
+
+async def drive(handler, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def request():
+        async with semaphore:
+            started = time.perf_counter()
+            await handler()
+            latencies.append(time.perf_counter() - started)
+
+    stop, stalls = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, stalls))
+    started = time.perf_counter()
+    await asyncio.gather(*[request() for _ in range(args.requests)])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    return elapsed, latencies, max(stalls, default=0.0)
+
+
+def report(name, elapsed, latencies, stall):
+    # Latency counts from the request getting a slot; under the sync Session
+    # the queue is the stalled loop itself, so read it with the stall column
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<14}{len(latencies) / elapsed:>10.0f} req/s"
+          f"{statistics.median(latencies) * 1000:>10.1f} ms p50"
+          f"{p99 * 1000:>10.1f} ms p99"
+          f"{stall * 1000:>10.1f} ms max loop stall")
+
+
+async def run(args):
+    delay = args.query_ms / 1000
+    slow_query = text("SELECT SLEEP(:seconds)")
+    read_query = text("SELECT 1")
+
+    engine = create_engine(args.database_url, pool_size=args.concurrency, max_overflow=0)
+    _register_sleep(engine)
+    SyncSession = sessionmaker(bind=engine)
+
+    async_engine = create_async_engine(async_database_url(args.database_url),
+                                       pool_size=args.concurrency, max_overflow=0)
+    _register_sleep(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession)
+
+    # What the routers did before: a sync Session inside an async endpoint
+    async def sync_handler():
+        with SyncSession() as db:
+            db.execute(slow_query, {"seconds": delay})
+            db.execute(read_query).scalar()
+
+    async def async_handler():
+        async with AsyncSessionLocal() as db:
+            await db.execute(slow_query, {"seconds": delay})
+            (await db.execute(read_query)).scalar()
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.query_ms} ms query, "
+          f"{engine.dialect.name}")
+    try:
+        for name, handler in (("sync Session", sync_handler), ("AsyncSession", async_handler)):
+            await handler()  # open a connection before timing
+            report(name, *await drive(handler, args))
+    finally:
+        engine.dispose()
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:////tmp/async_db_benchmark.db")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--query-ms", type=float, default=10.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Compare cache value formats: the old pickle (and json.dumps-then-pickle)
+entries against app/cache/codec.py with each available serializer, with and
+without compression.
+
+For every key family it builds a value shaped like what the routers store
+(a list page of BookSummary or BookResponse items, a book detail, the /home
+blob, categories:all, a chat history) and reports the bytes written to Redis
+and the median encode and decode times. Serializers and compressors that are
+not installed (msgpack, zstandard) are skipped. No database or Redis is needed.
+
+Usage:
+    python benchmarks/cache_codec_benchmark.py [--page-size 20] [--description-chars 6000] [--rounds 500]
+"""
+
+import argparse
+import json
+import os
+import pickle
+import random
+import statistics
+import sys
+import time
+import warnings
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.cache.codec import COMPRESSORS, SERIALIZERS, CacheCodec, _default
+from app.models.models import Category
+from app.schemas.schemas import BookResponse, BookSummary, CategoryResponse
+from list_payload_benchmark import make_page, make_text
+
+SERIALIZER_NAMES = {b"j": "json", b"o": "orjson", b"m": "msgpack"}
+COMPRESSION_NAMES = {b"z": "zlib", b"s": "zstd"}
+
+
+def key_families(rng: random.Random, page_size: int, description_chars: int):
+    books = make_page(rng, page_size, description_chars)
+    summaries = [BookSummary.from_orm(book).model_dump(mode="json") for book in books]
+    categories = [Category(category_id=i, name=f"Thể loại {i}", description=make_text(rng, 80)) for i in range(1, 31)]
+    return {
+        "books list (summary)": summaries,
+        "books list (full)": [BookResponse.from_orm(book).model_dump(mode="json") for book in books],
+        "book detail": BookResponse.from_orm(books[0]).dict(),
+        "home": {
+            "slides": [],
+            "slide_books": {n: summaries[:10] for n in (1, 2, 3)},
+            "notification": None,
+            "discounted": summaries[:10],
+            "best_sellers": summaries[5:15],
+            "new_releases": summaries[10:20],
+        },
+        "categories:all": [CategoryResponse.from_orm(c).dict() for c in categories],
+        "chat history": [
+            {"role": "user" if i % 2 == 0 else "assistant", "content": make_text(rng, 300)} for i in range(12)
+        ],
+    }
+
+
+def formats():
+    """(name, encode, decode) for the legacy formats and every installed codec variant."""
+    yield "pickle (old)", pickle.dumps, pickle.loads
+    yield (
+        "json+pickle (old)",
+        lambda value: pickle.dumps(json.dumps(value, default=_default)),
+        lambda data: json.loads(pickle.loads(data)),
+    )
+    for serializer in SERIALIZERS:
+        name = SERIALIZER_NAMES[serializer]
+        codec = CacheCodec(name, "none", 0)
+        yield name, codec.encode, codec.decode
+        for compression in COMPRESSORS:
+            codec = CacheCodec(name, COMPRESSION_NAMES[compression], 1024)
+            yield f"{name}+{COMPRESSION_NAMES[compression]}", codec.encode, codec.decode
+
+
+def measure(encode, decode, value, rounds: int):
+    encode_times, decode_times = [], []
+    data = b""
+    for _ in range(rounds):
+        start = time.perf_counter()
+        data = encode(value)
+        encode_times.append((time.perf_counter() - start) * 1e6)
+        start = time.perf_counter()
+        decode(data)
+        decode_times.append((time.perf_counter() - start) * 1e6)
+    return len(data), statistics.median(encode_times), statistics.median(decode_times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--description-chars", type=int, default=6000)
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    # from_orm / .dict() are what the routers call; their Pydantic v2 deprecation noise is not the point here
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    families = key_families(random.Random(args.seed), args.page_size, args.description_chars)
+    print(f"Pages of {args.page_size} books, ~{args.description_chars} chars of description each, "
+          f"{args.rounds} rounds; compression above 1024 bytes\n")
+    for family, value in families.items():
+        print(family)
+        print(f"  {'format':<20}{'bytes':>10}{'vs pickle':>11}{'encode us':>12}{'decode us':>12}")
+        baseline = None
+        for name, encode, decode in formats():
+            size, encode_us, decode_us = measure(encode, decode, value, args.rounds)
+            baseline = baseline or size
+            print(f"  {name:<20}{size:>10}{100 * size / baseline:>10.1f}%{encode_us:>12.1f}{decode_us:>12.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Replay a storefront-like read mix through RedisCache and report the cache
+metrics per key family (app/cache/metrics.py).
+
+Concurrent workers request book list pages, book details, /home, categories,
+order pages and chat sessions with a skewed (Zipf-like) popularity, through
+the same get / get_or_set / generation calls the routers make. Loaders return
+synthetic payloads shaped like the real ones after a fixed "database" delay.
+Optional admin edits bump the books generation mid-run. Prints throughput and
+the per-family table: hit ratio by tier, stale serves, rebuilds, Redis
+latency and value sizes.
+
+Needs a running Redis; use a scratch database, the keys it writes are deleted
+at the end.
+
+Usage:
+    python benchmarks/cache_families_benchmark.py [--redis-url redis://localhost:6379/15] [--requests 20000]
+        [--concurrency 50] [--db-ms 5] [--edits-per-1000 2]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import warnings
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from redis.asyncio import Redis as AsyncRedis
+
+from app.cache.metrics import cache_metrics
+from app.cache.redis_cache import CacheKeys, RedisCache
+from cache_codec_benchmark import key_families
+
+# (family, share of requests, number of distinct keys)
+MIX = (
+    ("books_list", 0.30, 200),
+    ("book_detail", 0.30, 5000),
+    ("home", 0.15, 3),
+    ("categories", 0.05, 1),
+    ("orders", 0.10, 2000),
+    ("chat_session", 0.10, 1000),
+)
+
+
+def zipf_index(rng: random.Random, n: int, s: float = 1.1) -> int:
+    # Inverse-CDF sample of a bounded power law; index 0 is the most popular key
+    u = rng.random()
+    return min(n - 1, int(n ** (u ** s)) - 1)
+
+
+async def run(args):
+    redis = AsyncRedis.from_url(args.redis_url)
+    cache = RedisCache(redis)
+    payloads = key_families(random.Random(args.seed), 20, 2000)
+    written = set()
+    families = [family for family, _, _ in MIX]
+    weights = [share for _, share, _ in MIX]
+    sizes = {family: keys for family, _, keys in MIX}
+    remaining = args.requests
+
+    def loader(value):
+        async def load():
+            await asyncio.sleep(args.db_ms / 1000)
+            return value
+        return load
+
+    async def one(rng: random.Random):
+        family = rng.choices(families, weights)[0]
+        i = zipf_index(rng, sizes[family])
+        if rng.random() * 1000 < args.edits_per_1000:
+            await cache.bump_generation(CacheKeys.BOOKS, CacheKeys.HOME)
+        if family == "books_list":
+            key = CacheKeys.books_list(await cache.generation(CacheKeys.BOOKS), i * 10, 10)
+            written.add(key)
+            await cache.get_or_set(key, loader(payloads["books list (summary)"][:10]), 300)
+        elif family == "home":
+            books_gen, home_gen = await cache.generations(CacheKeys.BOOKS, CacheKeys.HOME)
+            key = CacheKeys.home(books_gen, home_gen, 10 * (i + 1))
+            written.add(key)
+            await cache.get_or_set(key, loader(payloads["home"]), 300)
+        else:
+            key, value = {
+                "book_detail": (CacheKeys.book_detail(i), payloads["book detail"]),
+                "categories": (CacheKeys.categories(), payloads["categories:all"]),
+                "orders": (CacheKeys.user_orders(0, i, 0, 10), payloads["books list (summary)"][:3]),
+                "chat_session": (CacheKeys.chat_context(str(i)), payloads["chat history"][0]["content"]),
+            }[family]
+            written.add(key)
+            if await cache.get(key) is None:
+                await cache.set(key, await loader(value)(), 600)
+
+    async def worker(seed: int):
+        nonlocal remaining
+        rng = random.Random(seed)
+        while remaining > 0:
+            remaining -= 1
+            await one(rng)
+
+    cache_metrics.reset()
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(args.seed + n) for n in range(args.concurrency)])
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.requests} requests, {args.concurrency} workers, {args.db_ms} ms loaders, "
+          f"{args.edits_per_1000} edits per 1000 requests: {args.requests / elapsed:.0f} req/s\n")
+    print(cache_metrics.format_table())
+
+    keys = list(written) + [CacheKeys.generation(CacheKeys.BOOKS), CacheKeys.generation(CacheKeys.HOME)]
+    for n in range(0, len(keys), 1000):
+        await redis.delete(*keys[n:n + 1000])
+    await redis.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--db-ms", type=float, default=5.0)
+    parser.add_argument("--edits-per-1000", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", DeprecationWarning)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
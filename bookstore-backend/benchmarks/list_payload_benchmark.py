@@ -0,0 +1,123 @@
+"""
+Compare list payloads: full BookResponse items against BookSummary cards.
+
+Builds a page of in-memory Book rows shaped like the real catalog (HTML
+full_description of a few KB, a read_sample JSON array of page images, two
+authors, two categories) and, for each shape, reports the JSON payload size,
+the pickled cache entry size and the time to go from ORM rows to JSON.
+No database or Redis is needed.
+
+Usage:
+    python benchmarks/list_payload_benchmark.py [--page-size 20] [--description-chars 6000] [--rounds 200]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import pickle
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.models import Author, Book, Category
+from app.schemas.schemas import BookResponse, BookSummary
+
+WORDS = "sách hay cuốn tiểu thuyết tác giả câu chuyện nhân vật cuộc sống tình yêu gia đình thế giới".split()
+
+
+def make_text(rng: random.Random, chars: int) -> str:
+    words = []
+    length = 0
+    while length < chars:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def make_page(rng: random.Random, page_size: int, description_chars: int):
+    authors = [Author(author_id=i, name=f"Tác giả {i}", bio=make_text(rng, 300)) for i in range(1, 4)]
+    categories = [Category(category_id=i, name=f"Thể loại {i}", description=None) for i in range(1, 4)]
+    books = []
+    for i in range(1, page_size + 1):
+        paragraphs = [f"<p>{make_text(rng, 400)}</p>" for _ in range(max(1, description_chars // 400))]
+        book = Book(
+            book_id=i,
+            title=make_text(rng, 40),
+            slug=f"sach-{i}",
+            isbn=f"978{i:010d}",
+            brief_description=make_text(rng, 200),
+            full_description="".join(paragraphs),
+            price=120000,
+            stock_quantity=10,
+            publication_date=datetime.date(2024, 1, 1),
+            image_url=f"/static/books/{i}.webp",
+            image2_url=f"/static/books/{i}-2.webp",
+            image3_url=f"/static/books/{i}-3.webp",
+            read_sample=json.dumps([f"/static/samples/{i}/page-{p}.webp" for p in range(1, 13)]),
+            audio_sample=f"/static/audio/{i}.mp3",
+            is_active=True,
+            is_best_seller=i % 3 == 0,
+            is_new=i % 4 == 0,
+            is_discount=i % 2 == 0,
+            is_slide1=False,
+            is_slide2=False,
+            is_slide3=False,
+            is_free_ship=False,
+            discount_percentage=None,
+            discount_amount=None,
+            discounted_price=None,
+            height=None,
+            width=None,
+            length=None,
+            weight=None,
+            created_at=datetime.datetime(2024, 1, 1, 12, 0, 0),
+            total_sold=i * 3,
+        )
+        book.authors = authors[:2]
+        book.categories = categories[:2]
+        books.append(book)
+    return books
+
+
+def measure(schema, books, rounds: int):
+    timings = []
+    payload = b""
+    items = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        items = [schema.from_orm(book).model_dump(mode="json") for book in books]
+        payload = json.dumps(items, ensure_ascii=False).encode()
+        timings.append((time.perf_counter() - start) * 1000)
+    return len(payload), len(pickle.dumps(items)), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--description-chars", type=int, default=6000)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    books = make_page(random.Random(args.seed), args.page_size, args.description_chars)
+
+    print(f"Page of {args.page_size} books, ~{args.description_chars} chars of description each, {args.rounds} rounds\n")
+    print(f"{'shape':<14}{'JSON bytes':>12}{'pickle bytes':>14}{'median ms':>12}")
+    results = {}
+    for name, schema in (("BookResponse", BookResponse), ("BookSummary", BookSummary)):
+        results[name] = measure(schema, books, args.rounds)
+        size, pickled, ms = results[name]
+        print(f"{name:<14}{size:>12}{pickled:>14}{ms:>12.2f}")
+
+    full, summary = results["BookResponse"], results["BookSummary"]
+    print(f"\nSummary payload is {100 * summary[0] / full[0]:.1f}% of the full payload, "
+          f"serialization {full[2] / summary[2]:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark the catalog search index against a synthetic Vietnamese catalog.
+
+Builds an index of N items (default 100,000) with accented titles and
+descriptions, then runs accent-free queries the way shoppers type them and
+reports build time and query latency percentiles. A naive substring scan
+(what ILIKE '%term%' does) is timed on a sample of queries for comparison.
+
+Usage:
+    python benchmarks/search_benchmark.py [--items 100000] [--queries 2000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.search.engine import SearchIndex, fold_text
+
+ONSETS = ["", "b", "c", "ch", "d", "đ", "g", "gi", "h", "k", "kh", "l", "m", "n", "ng", "nh", "ph", "qu", "s", "t", "th", "tr", "v", "x"]
+RHYMES = ["a", "ai", "am", "an", "ang", "anh", "ao", "at", "ay", "em", "en", "eo", "i", "ich", "ien", "inh", "o", "oi", "om", "on", "ong", "u", "uc", "ung", "uoc", "uong", "uy", "ư", "ươi", "ương", "ân", "ât", "ơn", "ôi", "ông", "ê", "êu"]
+TONES = ["", "́", "̀", "̉", "̃", "̣"]
+
+
+def make_vocabulary(rng: random.Random, size: int = 3000):
+    words = set()
+    while len(words) < size:
+        syllable = rng.choice(ONSETS) + rng.choice(RHYMES)
+        # Put the tone mark on the first vowel, roughly like real orthography
+        for i, ch in enumerate(syllable):
+            if ch in "aeiouyươâêô":
+                syllable = syllable[:i + 1] + rng.choice(TONES) + syllable[i + 1:]
+                break
+        words.add(syllable)
+    return sorted(words)
+
+
+def zipf_weights(size: int, skew: float = 1.0):
+    # Word frequency proportional to 1 / rank, like real text
+    weights = []
+    total = 0.0
+    for rank in range(1, size + 1):
+        total += 1 / rank ** skew
+        weights.append(total)
+    return weights
+
+
+def make_item(rng: random.Random, vocabulary, weights):
+    def words(n):
+        return " ".join(rng.choices(vocabulary, cum_weights=weights, k=n))
+    title = words(rng.randint(2, 6)).title()
+    brief = words(rng.randint(10, 25))
+    full = "<p>" + words(rng.randint(60, 200)) + "</p>"
+    return title, brief, full
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng)
+    rng.shuffle(vocabulary)
+    weights = zipf_weights(len(vocabulary))
+
+    print(f"Generating {args.items} items...")
+    items = [make_item(rng, vocabulary, weights) for _ in range(args.items)]
+
+    print("Building index...")
+    index = SearchIndex()
+    start = time.perf_counter()
+    for item_id, (title, brief, full) in enumerate(items, start=1):
+        index.add(item_id, {
+            "title": (title, 3.0),
+            "brief_description": (brief, 1.5),
+            "full_description": (full, 1.0),
+        })
+    build_seconds = time.perf_counter() - start
+    print(f"Built in {build_seconds:.1f}s")
+
+    # Queries: 1-3 words lifted from random titles, typed without diacritics,
+    # half of them with the last word cut short (search-as-you-type)
+    queries = []
+    for _ in range(args.queries):
+        words = fold_text(rng.choice(items)[0]).split()
+        picked = words[:rng.randint(1, min(3, len(words)))]
+        if rng.random() < 0.5 and len(picked[-1]) > 2:
+            picked[-1] = picked[-1][:-1]
+        queries.append(" ".join(picked))
+
+    # The first pass pays for building per-term ranked postings; the second is steady state
+    for label in ("first pass, cold term caches", "second pass, warm"):
+        latencies = []
+        empty = 0
+        for q in queries:
+            start = time.perf_counter()
+            hits = index.search(q, limit=20)
+            latencies.append((time.perf_counter() - start) * 1000)
+            empty += not hits
+
+        print(f"\nIndexed search over {args.items} items, {len(queries)} queries ({label})")
+        print(f"  p50 {percentile(latencies, 50):.2f} ms")
+        print(f"  p95 {percentile(latencies, 95):.2f} ms")
+        print(f"  p99 {percentile(latencies, 99):.2f} ms")
+        print(f"  mean {statistics.mean(latencies):.2f} ms, queries with no hits: {empty}")
+
+    # Baseline: substring scan over raw (accented) text, like ILIKE '%term%'.
+    # It also misses accent-free queries entirely, which the hit count shows.
+    sample = queries[:50]
+    scan_latencies = []
+    scan_hits = 0
+    for q in sample:
+        start = time.perf_counter()
+        matched = [i for i, (title, brief, full) in enumerate(items) if q in title.lower() or q in brief or q in full]
+        scan_latencies.append((time.perf_counter() - start) * 1000)
+        scan_hits += bool(matched)
+    print(f"\nSubstring scan baseline, {len(sample)} queries")
+    print(f"  p50 {percentile(scan_latencies, 50):.2f} ms")
+    print(f"  p95 {percentile(scan_latencies, 95):.2f} ms")
+    print(f"  queries with any hit: {scan_hits}/{len(sample)}")
+
+
+if __name__ == "__main__":
+    main()
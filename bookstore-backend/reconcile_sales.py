@@ -0,0 +1,31 @@
+"""
+Rebuild the denormalized total_sold counters on books and stationery from order_items.
+
+Run after manual data fixes or whenever the counters are suspected to have drifted.
+The Redis leaderboards (popular, best sellers, new releases) are rebuilt afterwards.
+
+Usage:
+    python reconcile_sales.py
+"""
+
+from app.database import SessionLocal, get_sync_redis
+from app.services.sales_service import rebuild_sales_counters
+from app.services.leaderboard_service import rebuild_leaderboards
+
+
+def main():
+    print("Connecting to database...")
+    db = SessionLocal()
+    try:
+        print("Recomputing sales counters from order_items...")
+        fixed = rebuild_sales_counters(db)
+        print(f"Done. Corrected {fixed['books']} book counters and {fixed['stationery']} stationery counters.")
+        print("Rebuilding book leaderboards in Redis...")
+        ranked = rebuild_leaderboards(db, get_sync_redis())
+        print(f"Done. {ranked} books ranked.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Print the slow-query report collected by the SQL profiler of every running API worker.
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS are ranked by total time over the rolling
+window, overall and per route. The workers need SLOW_QUERY_LOG_ENABLED=true (and
+SLOW_QUERY_EXPLAIN=true for --explain) and publish their figures to Redis every
+SLOW_QUERY_PUBLISH_INTERVAL seconds.
+
+Usage:
+    python slow_queries_report.py [--top 20] [--per-route 5] [--route /api/v1/books/{book_id}]
+                                  [--explain] [--json] [--reset]
+"""
+
+import argparse
+import json
+from app.database import get_sync_redis
+from app.monitoring.slow_queries import format_report, report, slow_query_log
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Slow-query report across all API workers")
+    parser.add_argument("--top", type=int, default=20, help="statements in the overall ranking")
+    parser.add_argument("--per-route", type=int, default=5, help="statements listed per route")
+    parser.add_argument("--route", help="only this route template")
+    parser.add_argument("--explain", action="store_true", help="show captured EXPLAIN output")
+    parser.add_argument("--json", action="store_true", help="print the raw report as JSON")
+    parser.add_argument("--reset", action="store_true", help="clear the figures of every worker")
+    args = parser.parse_args()
+
+    redis = get_sync_redis()
+    if args.reset:
+        slow_query_log.reset_all(redis)
+        print("Slow query log cleared on all workers.")
+        return
+    result = report(slow_query_log.collect(redis, local=False), top=args.top, per_route=args.per_route, route=args.route)
+    if args.json:
+        print(json.dumps(result, indent=2, default=str))
+    else:
+        print(format_report(result, explain=args.explain))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+# Throwaway SQLite files for the primary and one read replica. Set before any
+# app import: app.config reads the environment once.
+_DB_DIR = tempfile.mkdtemp(prefix="bookstore-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'primary.db')}"
+os.environ["DATABASE_REPLICA_URLS"] = f"sqlite:///{os.path.join(_DB_DIR, 'replica.db')}"
+
+import pytest
+from sqlalchemy.dialects.mysql import LONGTEXT
+from sqlalchemy.ext.compiler import compiles
+from app.database import engine, replicas
+from app.models.models import Base
+
+pytest_plugins = ["tests.plugins.query_budget"]
+
+
+@compiles(LONGTEXT, "sqlite")
+def _longtext_on_sqlite(type_, compiler, **kw):
+    return "TEXT"
+
+
+@pytest.fixture(scope="session")
+def databases():
+    """Primary and replica engines with the schema created on both."""
+    replica = replicas.engines[0]
+    for target in (engine, replica):
+        Base.metadata.drop_all(bind=target)
+        Base.metadata.create_all(bind=target)
+    yield engine, replica
+    engine.dispose()
+    replica.dispose()
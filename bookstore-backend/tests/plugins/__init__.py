@@ -0,0 +1 @@
+# Pytest plugins for the backend test suite
@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+from typing import Iterator, List
+from app.monitoring.db_stats import RequestDBStats, db_metrics
+import pytest
+
+# pytest plugin, registered by tests/conftest.py. Requests must go through an app
+# with DBStatsMiddleware and instrumented engines (app.main.app, or see
+# tests/test_query_budget.py).
+
+
+def _describe(stats: RequestDBStats, limit: int = 5) -> str:
+    worst = sorted(stats.statements.items(), key=lambda item: -item[1])[:limit]
+    lines = [f"{stats.route}: {stats.queries} queries, {stats.db_time * 1000:.1f} ms"]
+    lines += [f"  {count}x {' '.join(sql.split())[:200]}" for sql, count in worst]
+    return "\n".join(lines)
+
+
+@contextmanager
+def _budget(max_queries: int, allow_repeats: bool = False) -> Iterator[List[RequestDBStats]]:
+    served: List[RequestDBStats] = []
+    db_metrics.request_listeners.append(served.append)
+    try:
+        yield served
+    finally:
+        db_metrics.request_listeners.remove(served.append)
+    over = [stats for stats in served if stats.queries > max_queries]
+    if over:
+        pytest.fail(f"Query budget of {max_queries} exceeded:\n" + "\n".join(_describe(s) for s in over))
+    if not allow_repeats:
+        repeating = [stats for stats in served if stats.repeated()]
+        if repeating:
+            pytest.fail("Repeated statements (likely N+1):\n" + "\n".join(_describe(s) for s in repeating))
+
+
+@pytest.fixture
+def query_budget():
+    """Fail the test when a request served inside the block runs more than `max_queries` statements.
+
+        def test_book_list(client, query_budget):
+            with query_budget(3):
+                client.get("/api/v1/books/?limit=50")
+
+    Requests that repeat one statement db_repeat_threshold times or more fail
+    too unless `allow_repeats=True`. The block yields the RequestDBStats of
+    every request it saw, for finer assertions.
+    """
+    return _budget
+
+
+@pytest.fixture(autouse=True)
+def _query_budget_marker(request):
+    marker = request.node.get_closest_marker("query_budget")
+    if marker is None:
+        yield
+        return
+    with _budget(*marker.args, **marker.kwargs):
+        yield
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries, allow_repeats=False): fail when a request in the test runs more statements",
+    )
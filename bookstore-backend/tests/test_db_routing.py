@@ -0,0 +1,129 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+import time
+import pytest
+from app import database
+from app.config import settings
+from app.database import SessionLocal, get_db, read_replica, replicas
+from app.middleware.db_routing import ROUTE_HEADER, STICKY_COOKIE, ReadRoutingMiddleware
+from app.models.models import Book
+
+
+def _put_book(bind, title: str) -> None:
+    with Session(bind=bind) as db:
+        db.execute(delete(Book))
+        db.add(Book(book_id=1, title=title, price=1000, stock_quantity=1))
+        db.commit()
+
+
+def _title(bind) -> str:
+    with Session(bind=bind) as db:
+        return db.get(Book, 1).title
+
+
+def _probe(monkeypatch, lag=0.0, modified_ago=60) -> None:
+    """Run one lag probe with a replica `lag` seconds behind and the last catalog write `modified_ago` seconds back."""
+    def replica_lag(replica):
+        if lag is None:
+            raise OSError("replica unreachable")
+        return lag
+    monkeypatch.setattr(database, "_replica_lag", replica_lag)
+    monkeypatch.setattr(database, "_catalog_modified", lambda: int(time.time()) - modified_ago)
+    replicas.check()
+
+
+@pytest.fixture
+def books(databases):
+    """Book 1 on both databases, titled after the one it lives on."""
+    primary, replica = databases
+    _put_book(primary, "primary")
+    _put_book(replica, "replica")
+    return primary, replica
+
+
+@pytest.fixture
+def client(books, monkeypatch):
+    _probe(monkeypatch)
+    app = FastAPI()
+    app.add_middleware(ReadRoutingMiddleware)
+
+    @app.get("/api/v1/books/{book_id}/title")
+    async def read_book_title(book_id: int, db: Session = Depends(get_db)):
+        return db.get(Book, book_id).title
+
+    @app.put("/api/v1/books/{book_id}/title")
+    async def write_book_title(book_id: int, title: str, db: Session = Depends(get_db)):
+        db.get(Book, book_id).title = title
+        db.commit()
+        return title
+
+    @app.get("/api/v1/orders/{book_id}/title")
+    async def read_order_title(book_id: int, db: Session = Depends(get_db)):
+        return db.get(Book, book_id).title
+
+    return TestClient(app)
+
+
+def test_catalog_get_reads_from_replica(client):
+    assert client.get("/api/v1/books/1/title").json() == "replica"
+
+
+def test_other_get_stays_on_primary(client):
+    assert client.get("/api/v1/orders/1/title").json() == "primary"
+
+
+def test_route_header_overrides_path(client):
+    assert client.get("/api/v1/books/1/title", headers={ROUTE_HEADER: "primary"}).json() == "primary"
+    assert client.get("/api/v1/orders/1/title", headers={ROUTE_HEADER: "replica"}).json() == "replica"
+
+
+def test_write_goes_to_primary_and_sets_sticky_cookie(client, books):
+    primary, replica = books
+    response = client.put("/api/v1/books/1/title", params={"title": "edited"})
+    assert response.status_code == 200
+    assert STICKY_COOKIE in response.cookies
+    assert (_title(primary), _title(replica)) == ("edited", "replica")
+    # The cookie keeps this client on the primary; others still read the replica
+    assert client.get("/api/v1/books/1/title").json() == "edited"
+    client.cookies.clear()
+    assert client.get("/api/v1/books/1/title").json() == "replica"
+
+
+@pytest.mark.parametrize("lag, modified_ago", [
+    (settings.replica_max_lag_seconds + 1, 60),  # too far behind
+    (None, 60),                                  # probe failed
+    (0.0, 0),                                    # catalog written since the replica could have caught up
+])
+def test_lag_guard_falls_back_to_primary(client, monkeypatch, lag, modified_ago):
+    _probe(monkeypatch, lag=lag, modified_ago=modified_ago)
+    assert client.get("/api/v1/books/1/title").json() == "primary"
+
+
+def test_stale_probe_falls_back_to_primary(client, monkeypatch):
+    monkeypatch.setattr(settings, "replica_check_interval", 0.01)
+    time.sleep(0.05)
+    assert client.get("/api/v1/books/1/title").json() == "primary"
+
+
+def test_local_catalog_write_is_seen_before_next_probe(client):
+    assert client.get("/api/v1/books/1/title").json() == "replica"
+    replicas.note_catalog_write(int(time.time()))
+    assert client.get("/api/v1/books/1/title").json() == "primary"
+
+
+def test_session_reads_its_own_writes_on_primary(books, monkeypatch):
+    _probe(monkeypatch)
+    token = read_replica.set(True)
+    try:
+        with SessionLocal() as db:
+            assert db.get(Book, 1).title == "replica"
+            db.add(Book(book_id=2, title="new", price=1000, stock_quantity=1))
+            db.flush()
+            assert db.get(Book, 2, populate_existing=True).title == "new"
+            db.expire_all()
+            assert db.get(Book, 1).title == "primary"
+            db.rollback()
+    finally:
+        read_replica.reset(token)
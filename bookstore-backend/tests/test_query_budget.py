@@ -0,0 +1,66 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+import pytest
+from app.database import async_engine, engine, get_db
+from app.models.models import Book, Review, Role, User
+from app.monitoring.db_stats import DBStatsMiddleware, db_metrics
+from app.routers import books, reviews
+
+ROWS = 8
+
+
+@pytest.fixture(scope="module")
+def client(databases):
+    with Session(bind=engine) as db:
+        for model in (Review, Book, User, Role):
+            db.execute(delete(model))
+        db.add(Role(role_id=1, role_name="Customer"))
+        for i in range(1, ROWS + 1):
+            db.add(Book(book_id=i, title=f"Book {i}", price=1000 * i, stock_quantity=1, total_sold=i))
+            db.add(User(user_id=i, role_id=1, first_name="Reader", last_name=str(i), email=f"reader{i}@example.com"))
+            db.add(Review(book_id=i, user_id=i, rating=5, comment="Good"))
+        db.commit()
+
+    app = FastAPI()
+    app.add_middleware(DBStatsMiddleware)
+    db_metrics.instrument(engine, "primary")
+    db_metrics.instrument(async_engine.sync_engine, "primary_async")
+    app.include_router(books.router, prefix="/api/v1")
+    app.include_router(reviews.router, prefix="/api/v1")
+
+    @app.get("/naive-reviews")
+    async def naive_reviews(db: Session = Depends(get_db)):
+        # list_reviews before it used selectinload: one lazy load per review for user and book
+        return [{"user": r.user.last_name, "book": r.book.title} for r in db.query(Review).all()]
+
+    return TestClient(app)
+
+
+def test_catalog_list_within_budget(client, query_budget):
+    with query_budget(3) as served:
+        response = client.get("/api/v1/books/", params={"limit": ROWS})
+    assert response.status_code == 200
+    assert len(response.json()) == ROWS
+    assert [stats.route for stats in served] == ["/api/v1/books/"]
+
+
+@pytest.mark.query_budget(3)
+def test_list_reviews_within_budget(client):
+    response = client.get("/api/v1/reviews/")
+    assert response.status_code == 200
+    assert {review["book_title"] for review in response.json()} == {f"Book {i}" for i in range(1, ROWS + 1)}
+
+
+def test_budget_exceeded_fails(client, query_budget):
+    with pytest.raises(pytest.fail.Exception, match="Query budget of 1 exceeded"):
+        with query_budget(1):
+            client.get("/api/v1/reviews/")
+
+
+def test_n_plus_one_fails(client, query_budget):
+    with pytest.raises(pytest.fail.Exception, match="likely N\\+1") as failure:
+        with query_budget(100):
+            client.get("/naive-reviews")
+    assert f"{ROWS}x" in str(failure.value)
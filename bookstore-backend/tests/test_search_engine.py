@@ -0,0 +1,27 @@
+from app.search.engine import SearchIndex
+
+
+def _index(titles):
+    index = SearchIndex()
+    for key, title in enumerate(titles):
+        index.add(key, {"title": (title, 1.0)})
+    return index
+
+
+def test_match_all_is_uncapped():
+    index = _index([f"Sách số {i}" for i in range(700)])
+    assert len(index.match_all("sach")) == 700
+    assert len(index.search("sach", limit=50)) == 50
+
+
+def test_match_all_requires_every_word():
+    index = _index(["Đắc Nhân Tâm", "Nhà Giả Kim", "Tâm lý học"])
+    assert [key for key, _ in index.match_all("dac tam")] == [0]
+    # The last word also matches as a prefix
+    assert [key for key, _ in index.match_all("nha gi")] == [1]
+    assert index.match_all("dac kim") == []
+
+
+def test_search_keeps_partial_fallback():
+    index = _index(["Đắc Nhân Tâm", "Nhà Giả Kim"])
+    assert [key for key, _ in index.search("dac kim")] != []